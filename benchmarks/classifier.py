@@ -0,0 +1,131 @@
+"""
+Сравнение score_profession с исходной (построчной) реализацией:
+проверка совпадения результатов и замер ускорения на корпусе сохранённых вакансий.
+
+    python -m benchmarks.classifier --corpus vacancies.jsonl
+    python -m benchmarks.classifier --cache .cache/hh_http.sqlite
+
+Корпус — JSONL с полными ответами /vacancies/{id} либо HTTP-кэш скрапера.
+"""
+import argparse
+import html
+import json
+import re
+import unicodedata
+import sqlite3
+import time
+
+from vacancy_scraper.classifier_of_profession import score_profession
+from vacancy_scraper.extractor import extract_key_skills
+from vacancy_scraper.http_cache import HH_CACHE_PATH
+from vacancy_scraper.patterns_4_professional_role import PATTERNS
+
+
+def normalize_text(text: str) -> str | None:
+    # Исходная нормализация, без кэширования
+    if text is None:
+        return None
+    text = html.unescape(text)
+    text = unicodedata.normalize('NFKD', text).replace('\xa0', ' ')
+    text = re.sub(r'\s+', ' ', text.lower()).strip()
+    return text
+
+
+def normalize_description(text: str) -> str | None:
+    # Теги описания заменяются пробелами до unescape, как в text_normalization.normalize_description.
+    # Это намеренное изменение оценки: "data</p><p>engineer" теперь совпадает с "data\s*engineer"
+    if text is None:
+        return None
+    return normalize_text(re.sub(r'<[^>]*>', ' ', text))
+
+
+def score_profession_reference(name: str, desc: str, skills: list[str]) -> tuple[str, int] | None:
+    # Исходная реализация: re.search по каждому ключевому слову каждой профессии
+    n_name = normalize_text(name)
+    n_desc = normalize_description(desc)
+
+    if skills:
+        list_skills = [normalize_text(s[0]) for s in skills]
+    else:
+        list_skills = []
+    n_skills = " ".join(list_skills).lower()
+
+    best_prof, best_score = "", 0
+
+    for prof, k_words in PATTERNS.items():
+        score = 0
+        n_prof = normalize_text(prof)
+
+        if n_name:
+            name_matches = sum(1 for pr in n_prof.lower().split() if pr in n_name)
+            score += name_matches * 7
+
+        for kw in k_words:
+            if re.search(kw, n_name):
+                score += 7
+            if re.search(kw, n_desc):
+                score += 2
+            if re.search(kw, n_skills):
+                score += 3
+
+        if score > best_score:
+            best_prof = prof
+            best_score = score
+
+    return (best_prof, best_score) if best_score >= 15 else ("", 0)
+
+
+def load_corpus(corpus: str | None = None, cache: str | None = None) -> list[dict]:
+    if corpus:
+        with open(corpus, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    conn = sqlite3.connect(cache or HH_CACHE_PATH)
+    try:
+        rows = conn.execute("SELECT key, body FROM responses").fetchall()
+    finally:
+        conn.close()
+    return [json.loads(body) for key, body in rows if re.search(r"/vacancies/\d+$", key)]
+
+
+def _args(vac: dict) -> tuple:
+    return vac.get("name", ""), vac.get("description", "") or "", extract_key_skills(vac)
+
+
+def _timed(func, vacancies: list, repeat: int) -> tuple[list, float]:
+    best = float("inf")
+    result = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = [func(*_args(vac)) for vac in vacancies]
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+
+def run(vacancies: list, repeat: int = 3) -> dict:
+    expected, reference_time = _timed(score_profession_reference, vacancies, repeat)
+    actual, matcher_time = _timed(score_profession, vacancies, repeat)
+    mismatches = [vac.get("id") for vac, a, b in zip(vacancies, expected, actual) if a != b]
+    return {
+        "vacancies": len(vacancies),
+        "mismatches": mismatches,
+        "reference_s": round(reference_time, 4),
+        "matcher_s": round(matcher_time, 4),
+        "speedup": round(reference_time / matcher_time, 2) if matcher_time else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="JSONL с полными вакансиями")
+    parser.add_argument("--cache", help="путь к SQLite HTTP-кэшу (по умолчанию HH_CACHE_PATH)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    result = run(load_corpus(args.corpus, args.cache), args.repeat)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if result["mismatches"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Проверка HitMatrix против текущего классификатора: баллы по всем профессиям и итоговая
+профессия должны совпасть с score_vector/score_profession на каждой вакансии корпуса;
+плюс замер построения матрицы и векторного пересчёта.
+
+    python -m benchmarks.hit_matrix --corpus vacancies.jsonl
+    python -m benchmarks.hit_matrix --cache .cache/hh_http.sqlite
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.classifier import _args, load_corpus
+from vacancy_scraper.classifier_of_profession import score_profession, score_vector
+from vacancy_scraper.hit_matrix import HitMatrix
+
+
+def run(vacancies: list, repeat: int = 3) -> dict:
+    started = time.perf_counter()
+    matrix = HitMatrix.build(vacancies)
+    build_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    expected_scores = np.array([score_vector(*_args(vac)) for vac in vacancies], dtype=np.int64)
+    expected = [score_profession(*_args(vac)) for vac in vacancies]
+    classifier_time = time.perf_counter() - started
+
+    rescore_time = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        professions, best = matrix.classify()
+        rescore_time = min(rescore_time, time.perf_counter() - started)
+
+    scores = matrix.scores()
+    mismatches = [vac.get("id") for i, vac in enumerate(vacancies)
+                  if expected[i] != (professions[i], int(best[i]))
+                  or not np.array_equal(scores[i], expected_scores[i])]
+    return {
+        "vacancies": len(vacancies),
+        "mismatches": mismatches,
+        "hits": {field: int(len(rows)) for field, (rows, _) in matrix.hits.items()},
+        "build_s": round(build_time, 4),
+        "classifier_s": round(classifier_time, 4),
+        "rescore_s": round(rescore_time, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="JSONL с полными вакансиями")
+    parser.add_argument("--cache", help="путь к SQLite HTTP-кэшу (по умолчанию HH_CACHE_PATH)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    result = run(load_corpus(args.corpus, args.cache), args.repeat)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if result["mismatches"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Макробенчмарк полного ingest: filling_db против локальной заглушки API (benchmarks.stub_api)
+на синтетическом корпусе и отдельной базы в локальном Postgres.
+
+    python -m benchmarks.ingest --count 20000 --out .cache/bench/ingest.json
+    python -m benchmarks.ingest --count 5000 --modes values copy --latency 0.02
+
+Сервер Postgres берётся из DB_HOST/PORT/DB_USER/DB_PASSWORD (.env), база --db
+пересоздаётся по sql/schema.sql перед каждым полным прогоном. Режимы:
+    values       — полный обход, запись через execute_values
+    copy         — полный обход, запись через COPY
+    incremental  — повторный инкрементальный прогон по уже загруженной базе (новых вакансий нет —
+                   меряется стоимость холостого обхода)
+"""
+import argparse
+import os
+import socket
+import time
+
+import psycopg2
+from dotenv import load_dotenv
+
+from benchmarks.results import write_results
+from benchmarks.synthetic import AREA_ID, CATEGORY_ID, generate_vacancies
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql")
+BENCH_DB_NAME = "it_work_bench"
+MODES = ("values", "copy", "incremental")
+TABLES = ("vacancy", "vacancy_skill", "vacancy_work_format", "skill", "profession")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _admin_connect():
+    return psycopg2.connect(dbname="postgres", user=os.getenv("DB_USER"), password=os.getenv("DB_PASSWORD"),
+                            host=os.getenv("DB_HOST", "localhost"), port=os.getenv("PORT"))
+
+
+def recreate_database(name: str) -> None:
+    """Пересоздаёт базу name со схемой и базовыми отчётами проекта."""
+    from db import close_pool, get_connection
+    from db.filling_db import reset_reference_ids
+
+    # соединения пула и кэш id справочников относятся к удаляемой базе
+    close_pool()
+    reset_reference_ids()
+    admin = _admin_connect()
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cur:
+            cur.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+            cur.execute(f'CREATE DATABASE "{name}"')
+    finally:
+        admin.close()
+    conn = get_connection()
+    try:
+        with conn, conn.cursor() as cur:
+            for script in ("schema.sql", "insert_base_configs.sql"):
+                with open(os.path.join(SQL_DIR, script), encoding="utf-8") as f:
+                    cur.execute(f.read())
+    finally:
+        conn.close()
+
+
+def table_counts() -> dict:
+    from db import get_connection
+
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            counts = {}
+            for table in TABLES:
+                cur.execute(f"SELECT COUNT(*) FROM {table}")
+                counts[table] = cur.fetchone()[0]
+        conn.rollback()
+    finally:
+        conn.close()
+    return counts
+
+
+def run_mode(mode: str, db_name: str, batch_size: int, stub_api) -> dict:
+    from db.filling_db import filling_db
+    from vacancy_scraper.metrics import METRICS
+
+    if mode != "incremental":
+        recreate_database(db_name)
+    requests_before = stub_api.requests
+    started = time.perf_counter()
+    filling_db(incremental=mode == "incremental", use_copy=mode == "copy", batch_size=batch_size)
+    elapsed = time.perf_counter() - started
+    metrics = METRICS.to_dict()
+    written = sum(c["value"] for c in metrics["counters"]
+                  if c["name"] == "db_rows_total" and c["labels"] == {"table": "vacancy"})
+    stages = {h["labels"]["stage"]: round(h["sum"], 4) for h in metrics["histograms"]
+              if h["name"] == "db_batch_seconds"}
+    return {
+        "elapsed_s": round(elapsed, 4),
+        "written": written,
+        "written_per_s": round(written / elapsed, 1) if elapsed else None,
+        "http_requests": stub_api.requests - requests_before,
+        "db_stage_s": stages,
+        "tables": table_counts(),
+        "metrics": metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10000, help="размер синтетического корпуса")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", default=BENCH_DB_NAME, help="база для бенчмарка (будет пересоздана)")
+    parser.add_argument("--modes", nargs="*", choices=MODES, default=list(MODES))
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа заглушки, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов заглушки 429/503")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=10000, help="лимит запросов в секунду к заглушке")
+    parser.add_argument("--out", help="куда сохранить результат (JSON)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    if args.db == os.getenv("DB_NAME"):
+        parser.error(f"--db совпадает с рабочей базой DB_NAME={args.db}: бенчмарк её пересоздаёт")
+
+    port = _free_port()
+    # настройки модулей читаются при импорте — окружение задаётся до первого импорта db/vacancy_scraper
+    os.environ.update({
+        "DB_NAME": args.db,
+        "HH_API_URL": f"http://127.0.0.1:{port}",
+        "HH_CONCURRENCY": str(args.concurrency),
+        "HH_RATE": str(args.rate),
+        "HH_CACHE_PATH": "",
+        "HH_ARCHIVE_DIR": "",
+        "METRICS_PATH": "",
+        "METRICS_PORT": "0",
+        "CATEGORY_ID": str(CATEGORY_ID),
+        "AREA_ID": str(AREA_ID),
+    })
+    from benchmarks.stub_api import start_stub
+
+    vacancies = generate_vacancies(args.count, args.seed)
+    server, _ = start_stub(vacancies, port, args.latency, args.error_rate)
+    try:
+        results = {mode: run_mode(mode, args.db, args.batch_size, server.api) for mode in args.modes}
+    finally:
+        server.shutdown()
+        server.server_close()
+    params = {key: getattr(args, key) for key in ("count", "seed", "batch_size", "latency", "error_rate",
+                                            "concurrency", "rate")}
+    write_results("ingest", params, results, args.out)
+
+
+if __name__ == "__main__":
+    main()
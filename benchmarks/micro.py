@@ -0,0 +1,105 @@
+"""
+Микробенчмарки горячих функций на синтетическом корпусе (benchmarks.synthetic):
+классификация, извлечение полей, сборка строк для БД, сборка SQL отчётов.
+
+    python -m benchmarks.micro --count 5000 --seed 1 --out .cache/bench/micro.json
+    python -m benchmarks.micro --only classify_batch build_sql_rollups
+
+Результаты сравниваются между коммитами через benchmarks.results.
+"""
+import argparse
+import itertools
+
+from benchmarks.classifier import _args
+from benchmarks.results import measure, write_results
+from benchmarks.synthetic import generate_vacancies, listing_of
+from services.reports import build_sql_from_config
+from vacancy_scraper.classifier_of_profession import classify_batch, score_profession
+from vacancy_scraper.extractor import (
+    build_rows,
+    extract_date,
+    extract_experience,
+    extract_key_skills,
+    extract_salary,
+    extract_work_format,
+)
+from vacancy_scraper.text_normalization import normalize_description
+
+
+def report_configs() -> list[dict]:
+    """Сетка конфигов графиков и таблиц по vacancy — как в report_configs, во всех сочетаниях."""
+    filters_set = [
+        None,
+        [{"field": "profession", "op": "=", "value": "Python разработчик"}],
+        [{"field": "created_at", "op": ">=", "value": "2025-01-01"}],
+        [{"field": "skill", "op": "in", "value": ["Python", "SQL"]}],
+        [{"field": "salary_avg", "op": "between", "value": [100000, 300000]}],
+    ]
+    configs = []
+    for chart, x, agg, flt, period in itertools.product(
+            ["bar", "line", "pie"], ["created_at", "profession", "experience", "skill", "work_format"],
+            ["count", "count_distinct", "avg", "max"], filters_set, [None, "day", "month"]):
+        configs.append({"chart_type": chart, "base_table": "vacancy", "x_field": x, "y_agg_func": agg,
+                        "y_field": "salary_avg" if agg in ("avg", "max") else None,
+                        "filters_json": flt, "group_by_period": period})
+    for flt in filters_set:
+        configs.append({"chart_type": "table", "base_table": "vacancy",
+                        "x_field": "vacancy_id, profession, salary_avg, experience, created_at",
+                        "y_agg_func": "count", "filters_json": flt})
+        configs.append({"chart_type": "table", "base_table": "vacancy",
+                        "x_field": "vacancy_id, profession, skill, work_format, created_at",
+                        "y_agg_func": "array_agg", "filters_json": flt})
+    return configs
+
+
+def _build_all(configs: list, use_rollups: bool) -> None:
+    for cfg in configs:
+        build_sql_from_config(cfg, use_rollups=use_rollups)
+
+
+def _extract_all(vacancies: list) -> None:
+    for vac in vacancies:
+        extract_experience(vac)
+        extract_salary(vac)
+        extract_date(vac)
+        extract_work_format(vac)
+        extract_key_skills(vac)
+
+
+def run(vacancies: list, repeat: int = 5, only: list | None = None) -> dict:
+    pairs = [(listing_of(vac), vac) for vac in vacancies]
+    configs = report_configs()
+    n = len(vacancies)
+    cases = {
+        "score_profession": (lambda: [score_profession(*_args(vac)) for vac in vacancies], n),
+        "classify_batch": (lambda: classify_batch(vacancies), n),
+        "normalize_description": (lambda: [normalize_description(vac["description"]) for vac in vacancies], n),
+        "extract_fields": (lambda: _extract_all(vacancies), n),
+        "build_rows": (lambda: build_rows(pairs), n),
+        "build_sql_raw": (lambda: _build_all(configs, False), len(configs)),
+        "build_sql_rollups": (lambda: _build_all(configs, True), len(configs)),
+    }
+    results = {}
+    for name, (func, ops) in cases.items():
+        if only and name not in only:
+            continue
+        results[name] = measure(func, ops, repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=5000, help="размер синтетического корпуса")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="запустить только указанные бенчмарки")
+    parser.add_argument("--out", help="куда сохранить результат (JSON)")
+    args = parser.parse_args()
+
+    vacancies = generate_vacancies(args.count, args.seed)
+    results = run(vacancies, args.repeat, args.only)
+    write_results("micro", {"count": args.count, "seed": args.seed, "repeat": args.repeat}, results, args.out)
+
+
+if __name__ == "__main__":
+    main()
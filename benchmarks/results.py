@@ -0,0 +1,115 @@
+"""
+Общий формат результатов бенчмарков и сравнение двух прогонов.
+
+    python -m benchmarks.results base.json new.json
+
+Результат — JSON {"benchmark", "env": {commit, python, ...}, "params", "results": {имя: {...}}};
+сравниваются поля *_s и *_us (время, меньше — лучше) и *_per_s (пропускная способность, больше — лучше).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def environment() -> dict:
+    """Откуда получен результат: коммит, версия Python, машина."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        "commit": commit,
+        "dirty": dirty,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def measure(func, ops: int, repeat: int = 5) -> dict:
+    """func() выполняет ops операций; лучшее и медианное время из repeat запусков."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    best = min(times)
+    return {
+        "ops": ops,
+        "best_s": round(best, 6),
+        "median_s": round(statistics.median(times), 6),
+        "per_op_us": round(best / ops * 1e6, 3) if ops else None,
+        "ops_per_s": round(ops / best, 1) if best else None,
+    }
+
+
+def write_results(benchmark: str, params: dict, results: dict, out: str | None = None) -> dict:
+    """Печатает результат и, если задан out, сохраняет его в файл."""
+    document = {"benchmark": benchmark, "env": environment(), "params": params, "results": results}
+    text = json.dumps(document, ensure_ascii=False, indent=2)
+    if out:
+        if os.path.dirname(out):
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return document
+
+
+def compare(base: dict, new: dict) -> list[dict]:
+    """Строки сравнения по общим числовым метрикам; ratio > 1 — новый прогон лучше."""
+    rows = []
+    for name, base_result in base["results"].items():
+        new_result = new["results"].get(name)
+        if not isinstance(base_result, dict) or not isinstance(new_result, dict):
+            continue
+        for key, old in base_result.items():
+            value = new_result.get(key)
+            if not isinstance(old, (int, float)) or not isinstance(value, (int, float)) or not old or not value:
+                continue
+            if key.endswith("_per_s"):
+                ratio = value / old
+            elif key.endswith(("_s", "_us")):
+                ratio = old / value
+            else:
+                continue
+            rows.append({"name": name, "metric": key, "base": old, "new": value, "ratio": round(ratio, 3)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.9,
+                        help="ratio ниже порога считается регрессией (код выхода 1)")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{base['env'].get('commit')} -> {new['env'].get('commit')}")
+    regressions = 0
+    for row in compare(base, new):
+        mark = ""
+        if row["ratio"] < args.threshold:
+            mark = "  <-- регрессия"
+            regressions += 1
+        print(f"{row['name']:<36} {row['metric']:<12} {row['base']:>14} {row['new']:>14} x{row['ratio']}{mark}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Локальная заглушка API hh.ru поверх корпуса вакансий (обычно из benchmarks.synthetic):
+/professional_roles, поиск /vacancies с фильтрами professional_role, date_from, date_to
+и лимитом выдачи HH_SEARCH_LIMIT, карточки /vacancies/{id}.
+
+    python -m benchmarks.stub_api --count 20000 --port 8765
+    python -m benchmarks.stub_api --corpus .cache/synthetic.jsonl --latency 0.05 --error-rate 0.02
+
+latency — задержка каждого ответа (с), error_rate — доля ответов 429 (с Retry-After) и 503,
+чтобы проверять поведение клиента под ограничениями.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.synthetic import CATEGORY_ID, ROLE_IDS, generate_vacancies, listing_of
+from vacancy_scraper.scrapers import HH_SEARCH_LIMIT
+
+_VACANCY_RE = re.compile(r"^/vacancies/(\d+)$")
+
+
+class StubApi:
+    """Индекс корпуса: вакансии по id и по роли, отсортированные по дате публикации (новые первыми)."""
+
+    def __init__(self, vacancies: list[dict], latency: float = 0.0, error_rate: float = 0.0, seed: int = 1):
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.by_id = {}
+        self.by_role = {}
+        for vac in vacancies:
+            published = datetime.strptime(vac["published_at"], "%Y-%m-%dT%H:%M:%S%z")
+            self.by_id[vac["id"]] = json.dumps(vac, ensure_ascii=False).encode()
+            entry = (published, listing_of(vac))
+            for role in vac.get("professional_roles") or []:
+                self.by_role.setdefault(role["id"], []).append(entry)
+        for entries in self.by_role.values():
+            entries.sort(key=lambda entry: entry[0], reverse=True)
+        self.requests = 0
+
+    def roles(self) -> dict:
+        return {"categories": [{"id": str(CATEGORY_ID), "name": "Информационные технологии",
+                                "roles": [{"id": role_id} for role_id in ROLE_IDS]}]}
+
+    def search(self, query: dict) -> dict:
+        date_from = _parse_date(query.get("date_from"))
+        date_to = _parse_date(query.get("date_to"))
+        per_page = int(query.get("per_page", ["20"])[0])
+        page = int(query.get("page", ["0"])[0])
+        # вакансия с несколькими ролями из запроса попадает в выдачу один раз
+        found = {}
+        for role in query.get("professional_role") or list(self.by_role):
+            for published, listing in self.by_role.get(role, ()):
+                if date_from is not None and published < date_from:
+                    continue
+                if date_to is not None and published >= date_to:
+                    continue
+                found[listing["id"]] = (published, listing)
+        found = list(found.values())
+        found.sort(key=lambda entry: entry[0], reverse=True)
+        # как и hh.ru, отдаём не больше HH_SEARCH_LIMIT вакансий на запрос
+        visible = found[:HH_SEARCH_LIMIT]
+        items = [listing for _, listing in visible[page * per_page:(page + 1) * per_page]]
+        return {"items": items, "found": len(found), "page": page, "per_page": per_page,
+                "pages": -(-len(visible) // per_page)}
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def failure(self) -> int | None:
+        if not self.error_rate:
+            return None
+        with self._lock:
+            if self._random.random() >= self.error_rate:
+                return None
+            return self._random.choice((429, 503))
+
+
+def _parse_date(values: list | None) -> datetime | None:
+    return datetime.fromisoformat(values[0]) if values else None
+
+
+def _handler(api: StubApi):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            api.count_request()
+            if api.latency:
+                time.sleep(api.latency)
+            status = api.failure()
+            if status is not None:
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            url = urlsplit(self.path)
+            if url.path == "/professional_roles":
+                body = json.dumps(api.roles(), ensure_ascii=False).encode()
+            elif url.path == "/vacancies":
+                body = json.dumps(api.search(parse_qs(url.query)), ensure_ascii=False).encode()
+            elif match := _VACANCY_RE.match(url.path):
+                body = api.by_id.get(match.group(1))
+                if body is None:
+                    self.send_error(404)
+                    return
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def start_stub(vacancies: list[dict], port: int = 0, latency: float = 0.0,
+               error_rate: float = 0.0) -> tuple[ThreadingHTTPServer, str]:
+    """Запускает заглушку в фоновом потоке; port=0 — свободный порт. Возвращает (сервер, base_url)."""
+    api = StubApi(vacancies, latency, error_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(api))
+    server.daemon_threads = True
+    server.api = api
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="JSONL с полными вакансиями (иначе — синтетический корпус)")
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            vacancies = [json.loads(line) for line in f if line.strip()]
+    else:
+        vacancies = generate_vacancies(args.count, args.seed)
+    server, base_url = start_stub(vacancies, args.port, args.latency, args.error_rate)
+    print(f"Заглушка API: {base_url}, вакансий: {len(vacancies)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
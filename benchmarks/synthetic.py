@@ -0,0 +1,213 @@
+"""
+Генератор синтетических вакансий в формате ответов hh.ru: полная карточка /vacancies/{id}
+с HTML-описанием, навыками, зарплатой, опытом и форматами работы. При одинаковых
+seed и until корпус воспроизводится байт в байт.
+
+    python -m benchmarks.synthetic --count 10000 --seed 1 --out .cache/synthetic.jsonl
+
+Примерно каждая пятая вакансия — не из IT и классификатором не распознаётся.
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+# Роли категории «Информационные технологии» и регион (Санкт-Петербург), как в .env проекта
+CATEGORY_ID = 11
+AREA_ID = 2
+ROLE_IDS = ("10", "12", "25", "34", "36", "73", "96", "104", "107", "112", "113", "114", "116", "121", "124",
+            "125", "126", "148", "150", "155", "156", "160", "164", "165")
+
+# Профессия -> (названия вакансий, технологии для описания и навыков)
+PROFESSIONS = {
+    "Data Engineer": (
+        ["Data Engineer", "Senior Data Engineer", "Инженер данных", "ETL-разработчик"],
+        ["Spark", "Kafka", "Airflow", "dbt", "ClickHouse", "Hadoop", "Snowflake", "ETL", "SQL", "Python"],
+    ),
+    "Go разработчик": (
+        ["Go разработчик", "Golang developer", "Senior Go Developer", "Backend-разработчик (Go)"],
+        ["Golang", "Go", "gRPC", "PostgreSQL", "Kafka", "Docker", "микросервисы", "Redis"],
+    ),
+    "Python разработчик": (
+        ["Python разработчик", "Python developer", "Python-разработчик", "Middle Python Developer"],
+        ["Python", "Django", "FastAPI", "Flask", "PostgreSQL", "Celery", "Redis", "asyncio"],
+    ),
+    "Java разработчик": (
+        ["Java разработчик", "Java developer", "Senior Java Developer"],
+        ["Java", "Spring", "Spring Boot", "Hibernate", "Kafka", "PostgreSQL", "Maven"],
+    ),
+    "Frontend разработчик": (
+        ["Frontend разработчик", "Frontend developer", "Front-end разработчик", "UI developer"],
+        ["React", "Vue", "Angular", "TypeScript", "HTML5", "CSS3", "SCSS", "Webpack", "Vite", "Next.js"],
+    ),
+    "JavaScript разработчик": (
+        ["JavaScript разработчик", "Node.js разработчик", "Fullstack JavaScript developer"],
+        ["JavaScript", "TypeScript", "Node.js", "NestJS", "Express.js", "npm", "yarn", "Fastify"],
+    ),
+    "DevOps / SRE": (
+        ["DevOps инженер", "SRE инженер", "Platform Engineer", "DevOps engineer"],
+        ["Kubernetes", "Docker", "Terraform", "Ansible", "CI/CD", "GitLab", "Prometheus", "Linux"],
+    ),
+    "QA / Тестировщик": (
+        ["QA инженер", "Тестировщик", "QA Automation Engineer", "Инженер по тестированию"],
+        ["Selenium", "Pytest", "Postman", "тестирование", "QA", "Allure", "Jira"],
+    ),
+    "Data Scientist / ML Engineer": (
+        ["Data Scientist", "ML Engineer", "MLOps инженер", "Senior Data Scientist"],
+        ["PyTorch", "TensorFlow", "scikit-learn", "MLflow", "Python", "pandas", "numpy"],
+    ),
+    "Android разработчик": (
+        ["Android разработчик", "Android developer", "Kotlin разработчик"],
+        ["Android", "Kotlin", "Jetpack", "Compose", "Coroutines", "Gradle"],
+    ),
+    "iOS разработчик": (
+        ["iOS разработчик", "iOS developer", "Swift разработчик"],
+        ["iOS", "Swift", "SwiftUI", "Objective-C", "UIKit", "Xcode"],
+    ),
+    "1C разработчик": (
+        ["1C программист", "Программист 1С", "1С разработчик"],
+        ["1С", "1С:Бухгалтерия", "УПП", "Управление торговлей", "СКД"],
+    ),
+    "UX/UI дизайнер": (
+        ["UX/UI дизайнер", "Продуктовый дизайнер", "UI designer", "Интерфейсный дизайнер"],
+        ["Figma", "Sketch", "Adobe XD", "прототипирование", "wireframe", "Zeplin"],
+    ),
+    "Аналитик данных": (
+        ["Аналитик данных", "Data Analyst", "Product Analyst", "BI analyst", "Системный аналитик"],
+        ["SQL", "Excel", "Power BI", "Tableau", "pandas", "A/B tests", "статистика", "Яндекс Метрика"],
+    ),
+}
+
+# Вакансии вне IT
+OTHER = (
+    ["Менеджер по продажам", "Водитель-экспедитор", "Бухгалтер", "Администратор салона", "Курьер"],
+    ["CRM", "переговоры", "водительские права категории B", "первичная документация", "кассовая дисциплина"],
+)
+OTHER_SHARE = 0.2
+
+EXPERIENCE = [
+    ("noExperience", "Нет опыта"),
+    ("between1And3", "От 1 года до 3 лет"),
+    ("between3And6", "От 3 до 6 лет"),
+    ("moreThan6", "Более 6 лет"),
+]
+WORK_FORMATS = [
+    ("ON_SITE", "На\xa0месте работодателя"),
+    ("REMOTE", "Удалённо"),
+    ("HYBRID", "Гибрид"),
+    ("FIELD_WORK", "Разъездной"),
+]
+COMPANIES = ["Альфа", "Технологии будущего", "Северный код", "Нева Софт", "Облачные решения", "ДатаЛаб"]
+
+INTRO = [
+    "Мы — команда {company}, развиваем продукт для миллионов пользователей.",
+    "Компания &laquo;{company}&raquo; ищет в команду {title}.",
+    "{company} расширяет отдел разработки и приглашает {title}.",
+]
+DUTIES = [
+    "Разработка и поддержка сервисов на {tech}",
+    "Проектирование архитектуры с использованием {tech}",
+    "Code review и менторство, работа с {tech}",
+    "Оптимизация производительности, {tech}",
+    "Участие в планировании и оценке задач",
+]
+REQUIREMENTS = [
+    "Опыт коммерческой разработки от 2 лет",
+    "Уверенное знание {tech}",
+    "Понимание принципов ООП и SOLID",
+    "Опыт работы с {tech} будет плюсом",
+    "Английский на уровне чтения документации",
+]
+CONDITIONS = [
+    "Официальное оформление по ТК РФ",
+    "ДМС со стоматологией",
+    "Гибкое начало рабочего дня",
+    "Компенсация обучения и конференций",
+]
+
+
+def generate_vacancies(count: int, seed: int = 1, until: datetime | None = None, days: int = 90,
+                       first_id: int = 100000000) -> list[dict]:
+    """
+    count карточек с id подряд начиная с first_id; published_at — за days дней до until
+    (по умолчанию начало текущих суток UTC). Описания и навыки собираются из словаря PROFESSIONS.
+    """
+    rnd = random.Random(seed)
+    until = until or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    professions = list(PROFESSIONS.values())
+    vacancies = []
+    for i in range(count):
+        titles, techs = OTHER if rnd.random() < OTHER_SHARE else rnd.choice(professions)
+        title = rnd.choice(titles)
+        skills = rnd.sample(techs, k=min(len(techs), rnd.randint(0, 6)))
+        published = until - timedelta(seconds=rnd.randrange(days * 86400))
+        experience_id, experience_name = rnd.choice(EXPERIENCE)
+        formats = rnd.sample(WORK_FORMATS, k=rnd.choice((0, 1, 1, 1, 2, 3)))
+        vacancies.append({
+            "id": str(first_id + i),
+            "name": title,
+            "area": {"id": str(AREA_ID), "name": "Санкт-Петербург"},
+            "professional_roles": [{"id": rnd.choice(ROLE_IDS)}],
+            "salary": _salary(rnd),
+            "experience": {"id": experience_id, "name": experience_name},
+            "schedule": {"id": "fullDay", "name": "Полный день"},
+            "published_at": published.astimezone(timezone(timedelta(hours=3))).strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "work_format": [{"id": wf_id, "name": wf_name} for wf_id, wf_name in formats] or None,
+            "key_skills": [{"name": skill} for skill in skills],
+            "description": _description(rnd, title, techs),
+        })
+    return vacancies
+
+
+def listing_of(vacancy: dict) -> dict:
+    """Вакансия, как она приходит в выдаче поиска /vacancies (без описания и навыков)."""
+    return {key: value for key, value in vacancy.items() if key not in ("description", "key_skills")}
+
+
+def _salary(rnd: random.Random) -> dict | None:
+    kind = rnd.random()
+    if kind < 0.35:
+        return None
+    base = rnd.randrange(20000, 450000, 5000)
+    salary_from = base if kind < 0.85 else None
+    salary_to = base + rnd.randrange(0, 150000, 5000) if kind > 0.6 else None
+    return {"from": salary_from, "to": salary_to, "currency": "RUR", "gross": rnd.random() < 0.5}
+
+
+def _description(rnd: random.Random, title: str, techs: list) -> str:
+    company = rnd.choice(COMPANIES)
+
+    def fill(template: str) -> str:
+        return template.format(company=company, title=title, tech=rnd.choice(techs))
+
+    def items(templates: list, k: int) -> str:
+        return "".join(f"<li>{fill(t)};</li>" for t in rnd.sample(templates, k=k))
+
+    return (
+        f"<p>{fill(rnd.choice(INTRO))}</p>"
+        f"<p><strong>Обязанности:</strong></p><ul>{items(DUTIES, 3)}</ul>"
+        f"<p><strong>Требования:</strong></p><ul>{items(REQUIREMENTS, 3)}</ul>"
+        f"<p><strong>Условия:</strong></p><ul>{items(CONDITIONS, 2)}</ul>"
+        "<p>Будем рады видеть вас в&nbsp;команде!</p>"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--days", type=int, default=90, help="за сколько дней распределены даты публикации")
+    parser.add_argument("--until", type=datetime.fromisoformat,
+                        help="верхняя граница дат публикации (по умолчанию начало текущих суток UTC)")
+    parser.add_argument("--out", required=True, help="куда записать JSONL")
+    args = parser.parse_args()
+
+    vacancies = generate_vacancies(args.count, args.seed, args.until, args.days)
+    with open(args.out, "w", encoding="utf-8") as f:
+        for vac in vacancies:
+            f.write(json.dumps(vac, ensure_ascii=False) + "\n")
+    print(f"Записано вакансий: {len(vacancies)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,39 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
 import psycopg2
+from psycopg2 import pool as pg_pool
+from psycopg2 import extensions
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_connection():
-    return psycopg2.connect(
+# Пул соединений на процесс: потоки Streamlit и стадии ingest берут соединения отсюда.
+# DB_POOL_MIN соединений открываются сразу и держатся в пуле. psycopg2 закрывает соединение,
+# возвращённое в пул, если свободных уже DB_POOL_MIN, поэтому при нагрузке выше DB_POOL_MIN
+# каждое лишнее соединение открывается заново. DB_POOL_MIN стоит держать не ниже обычного
+# числа одновременно занятых соединений: filling_db держит до 3 (блокировка прогона, чтение
+# и запись стадий пайплайна), Streamlit — по одному на активную сессию.
+# `with get_connection() as conn:` только завершает транзакцию, соединение остаётся выданным
+# до close(); для коротких операций — connection(), он возвращает соединение в пул.
+# DB_POOL_MAX — жёсткий предел одновременно выданных.
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 4))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+# Сколько ждать свободного соединения, прежде чем упасть
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Соединение, простоявшее в пуле дольше, перед выдачей проверяется SELECT 1
+DB_POOL_CHECK_AFTER = float(os.getenv("DB_POOL_CHECK_AFTER", 30))
+
+_pool: pg_pool.ThreadedConnectionPool | None = None
+_pool_lock = threading.Lock()
+_slots: threading.BoundedSemaphore | None = None
+_returned_at: dict[int, float] = {}
+
+
+def _connect_params() -> dict:
+    return dict(
         dbname=os.getenv("DB_NAME"),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
@@ -14,3 +41,120 @@ def get_connection():
         port=os.getenv("PORT")
     )
 
+
+def _get_pool() -> pg_pool.ThreadedConnectionPool:
+    global _pool, _slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _slots = threading.BoundedSemaphore(DB_POOL_MAX)
+                _pool = pg_pool.ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, **_connect_params())
+    return _pool
+
+
+def _is_healthy(conn) -> bool:
+    if conn.closed:
+        return False
+    if time.monotonic() - _returned_at.get(id(conn), 0) < DB_POOL_CHECK_AFTER:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _checkout():
+    pool = _get_pool()
+    if not _slots.acquire(timeout=DB_POOL_TIMEOUT):
+        raise pg_pool.PoolError(f"Нет свободного соединения в пуле за {DB_POOL_TIMEOUT} с")
+    try:
+        while True:
+            conn = pool.getconn()
+            if _is_healthy(conn):
+                return conn
+            pool.putconn(conn, close=True)
+    except BaseException:
+        _slots.release()
+        raise
+
+
+def _release(conn) -> None:
+    broken = conn.closed
+    if not broken and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            broken = True
+    if broken:
+        _returned_at.pop(id(conn), None)
+    else:
+        _returned_at[id(conn)] = time.monotonic()
+    _get_pool().putconn(conn, close=broken)
+    _slots.release()
+
+
+class PooledConnection:
+    """
+    Соединение из пула с интерфейсом psycopg2-соединения.
+    `with conn:` как и в psycopg2 только коммитит/откатывает транзакцию;
+    в пул соединение возвращается через close() или когда объект больше не используется.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def _raw(self):
+        if self._conn is None:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        return self._conn
+
+    def __getattr__(self, name):
+        return getattr(self._raw(), name)
+
+    def __enter__(self):
+        self._raw().__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._raw().__exit__(exc_type, exc, tb)
+
+    @property
+    def closed(self) -> int:
+        return 1 if self._conn is None else self._conn.closed
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            _release(conn)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def get_connection() -> PooledConnection:
+    return PooledConnection(_checkout())
+
+
+@contextmanager
+def connection():
+    """Соединение из пула на время блока: коммит при успехе, откат при ошибке, возврат в пул."""
+    conn = get_connection()
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
@@ -0,0 +1,145 @@
+from datetime import datetime
+from psycopg2 import extras
+from psycopg2.extras import Json, RealDictCursor
+
+# Состояние прогона filling_db в Postgres, чтобы прерванный прогон продолжался с места остановки:
+# crawl_run — прогоны, crawl_page — обработанные страницы поиска,
+# crawl_vacancy — вакансии в очереди прогона, crawl_batch — записанные батчи.
+
+# Ключ advisory-блокировки прогона: один на все процессы filling_db
+RUN_LOCK_KEY = 746582001
+
+
+def acquire_run_lock(conn) -> bool:
+    """
+    Сессионная advisory-блокировка прогона; False — её держит другой процесс.
+    Держится, пока соединение открыто, коммиты её не снимают — соединение
+    не возвращать в пул без release_run_lock.
+    """
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (RUN_LOCK_KEY,))
+            return cur.fetchone()[0]
+
+
+def release_run_lock(conn) -> None:
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(%s)", (RUN_LOCK_KEY,))
+
+
+def start_or_resume_run(conn, date_from: datetime | None) -> dict:
+    """
+    Возвращает незавершённый прогон, если он есть, иначе создаёт новый.
+    У возобновлённого прогона сохраняются started_at и date_from исходного запуска.
+    Вызывается под acquire_run_lock: иначе два процесса продолжили бы один прогон.
+    """
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(
+            "SELECT run_id, started_at, date_from FROM crawl_run "
+            "WHERE finished_at IS NULL ORDER BY run_id DESC LIMIT 1"
+        )
+        run = cur.fetchone()
+        if run:
+            return {**run, "resumed": True}
+        cur.execute(
+            "INSERT INTO crawl_run (date_from) VALUES (%s) RETURNING run_id, started_at, date_from",
+            (date_from,)
+        )
+        return {**cur.fetchone(), "resumed": False}
+
+
+def get_done_pages(conn, run_id: int) -> dict:
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT page_key, items FROM crawl_page WHERE run_id = %s", (run_id,))
+            return dict(cur.fetchall())
+
+
+def get_run_vacancy_ids(conn, run_id: int) -> set:
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT vacancy_id FROM crawl_vacancy WHERE run_id = %s", (run_id,))
+            return {row[0] for row in cur.fetchall()}
+
+
+def get_pending_vacancies(conn, run_id: int, after_id: int = 0, limit: int = 1000) -> list:
+    """
+    Вакансии из поиска, которые попали в очередь прогона, но ещё не обработаны.
+    Читаются порциями по vacancy_id > after_id.
+    """
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT listing FROM crawl_vacancy "
+                "WHERE run_id = %s AND state = 'queued' AND vacancy_id > %s "
+                "ORDER BY vacancy_id LIMIT %s",
+                (run_id, after_id, limit)
+            )
+            return [row[0] for row in cur.fetchall()]
+
+
+def record_page(conn, run_id: int, page_key: str, total_items: int, queued: list) -> None:
+    """Страница поиска и отобранные из неё вакансии фиксируются одной транзакцией."""
+    with conn:
+        with conn.cursor() as cur:
+            if queued:
+                extras.execute_values(
+                    cur,
+                    "INSERT INTO crawl_vacancy (run_id, vacancy_id, listing) VALUES %s "
+                    "ON CONFLICT (run_id, vacancy_id) DO NOTHING",
+                    [(run_id, int(vac["id"]), Json(vac)) for vac in queued],
+                    page_size=len(queued),
+                )
+            cur.execute(
+                "INSERT INTO crawl_page (run_id, page_key, items) VALUES (%s, %s, %s) "
+                "ON CONFLICT (run_id, page_key) DO NOTHING",
+                (run_id, page_key, total_items)
+            )
+
+
+def record_batch(cur, run_id: int, vacancy_ids: list, written: int) -> None:
+    """Вызывается в транзакции записи батча: отметка батча коммитится вместе с данными."""
+    cur.execute(
+        "UPDATE crawl_vacancy SET state = 'processed' WHERE run_id = %s AND vacancy_id = ANY(%s)",
+        (run_id, vacancy_ids)
+    )
+    cur.execute(
+        "INSERT INTO crawl_batch (run_id, batch_no, vacancies, written) "
+        "SELECT %s, COALESCE(MAX(batch_no), 0) + 1, %s, %s FROM crawl_batch WHERE run_id = %s",
+        (run_id, len(vacancy_ids), written, run_id)
+    )
+
+
+def finish_run(cur, run_id: int) -> None:
+    # очередь завершённого прогона больше не нужна, счётчики остаются в crawl_page/crawl_batch
+    cur.execute("UPDATE crawl_run SET finished_at = now() WHERE run_id = %s", (run_id,))
+    cur.execute("DELETE FROM crawl_vacancy WHERE run_id = %s", (run_id,))
+
+
+def get_progress(conn, run_id: int | None = None) -> dict | None:
+    """
+    Счётчики прогона (по умолчанию последнего): страницы, вакансии в очереди,
+    обработанные и записанные вакансии, батчи.
+    """
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(
+            """
+            SELECT
+                r.run_id,
+                r.started_at,
+                r.finished_at,
+                (SELECT COUNT(*) FROM crawl_page p WHERE p.run_id = r.run_id) AS pages,
+                (SELECT COALESCE(SUM(p.items), 0) FROM crawl_page p WHERE p.run_id = r.run_id) AS listed,
+                (SELECT COUNT(*) FROM crawl_vacancy v
+                  WHERE v.run_id = r.run_id AND v.state = 'queued') AS pending,
+                (SELECT COUNT(*) FROM crawl_batch b WHERE b.run_id = r.run_id) AS batches,
+                (SELECT COALESCE(SUM(b.vacancies), 0) FROM crawl_batch b WHERE b.run_id = r.run_id) AS processed,
+                (SELECT COALESCE(SUM(b.written), 0) FROM crawl_batch b WHERE b.run_id = r.run_id) AS written
+            FROM crawl_run r
+            WHERE r.run_id = COALESCE(%s, (SELECT MAX(run_id) FROM crawl_run))
+            """,
+            (run_id,)
+        )
+        row = cur.fetchone()
+        return dict(row) if row else None
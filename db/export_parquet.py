@@ -0,0 +1,342 @@
+"""
+Выгрузка базы в Parquet для аналитики вне Postgres.
+
+    python -m db.export_parquet --out snapshots
+    python -m db.export_parquet --out snapshots --full
+
+Раскладка:
+    vacancy/month=YYYY-MM/part-<export>.parquet             — вакансии по месяцу created_at (UTC)
+    vacancy_skill/month=YYYY-MM/part-<export>.parquet       — связи, месяц берётся у вакансии
+    vacancy_work_format/month=YYYY-MM/part-<export>.parquet
+    deleted/part-<export>.parquet                           — удалённые вакансии (vacancy_id, seen_at)
+    profession/, experience/, work_format/, skill/          — справочники, перезаписываются целиком
+    _state.json                                             — отметка последней выгрузки
+
+Повторный запуск дописывает только вакансии, записанные ingest'ом после прошлой выгрузки
+(vacancy_listing.seen_at), вместе с их текущими навыками и форматами. seen_at — время начала
+транзакции записи, и батч, закоммиченный после выгрузки, может оказаться старше её отметки,
+поэтому выборка начинается на EXPORT_OVERLAP_MINUTES раньше отметки; версии, уже выгруженные
+в этом перекрытии, отсеиваются по (vacancy_id, seen_at) из _state.json.
+Обновлённая вакансия оказывается в нескольких part-файлах: актуальная версия —
+с наибольшим seen_at (у связей — тот же seen_at, что у версии вакансии).
+Вакансии, которые ingest удалил (перестали относиться к профессии), инкрементальная выгрузка
+записывает в deleted/ с seen_at удаления: если это наибольший seen_at вакансии, её больше нет.
+read_snapshot собирает текущее состояние таблицы по этим правилам.
+"""
+import argparse
+import glob
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from . import get_connection
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", "snapshots")
+# Сколько строк читается с сервера за раз (именованный курсор) и пишется одной row group
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 50000))
+# Перекрытие с прошлой выгрузкой: должно быть дольше самой длинной транзакции записи батча
+EXPORT_OVERLAP = timedelta(minutes=float(os.getenv("EXPORT_OVERLAP_MINUTES", 10)))
+
+# Вакансии без даты попадают в отдельный раздел
+UNKNOWN_MONTH = "unknown"
+
+_MONTH = "COALESCE(to_char(v.created_at AT TIME ZONE 'UTC', 'YYYY-MM'), %s)"
+# Вакансии без записи в vacancy_listing (загружены до её появления) выгружаются только при полной выгрузке
+_CHANGED = "(%s::timestamptz IS NULL OR l.seen_at > %s)"
+
+TIMESTAMP = pa.timestamp("us", tz="UTC")
+
+PARTITIONED = {
+    "vacancy": (
+        f"""
+        SELECT {_MONTH}, v.vacancy_id, v.profession_id, v.experience_id,
+               v.salary_avg::float8, v.created_at, l.seen_at
+        FROM vacancy v
+        LEFT JOIN vacancy_listing l ON l.vacancy_id = v.vacancy_id
+        WHERE {_CHANGED}
+        """,
+        pa.schema([
+            ("vacancy_id", pa.int64()),
+            ("profession_id", pa.int32()),
+            ("experience_id", pa.int32()),
+            ("salary_avg", pa.float64()),
+            ("created_at", TIMESTAMP),
+            ("seen_at", TIMESTAMP),
+        ]),
+    ),
+    "vacancy_skill": (
+        f"""
+        SELECT {_MONTH}, vs.vacancy_id, vs.skill_id, l.seen_at
+        FROM vacancy_skill vs
+        JOIN vacancy v ON v.vacancy_id = vs.vacancy_id
+        LEFT JOIN vacancy_listing l ON l.vacancy_id = v.vacancy_id
+        WHERE {_CHANGED}
+        """,
+        pa.schema([
+            ("vacancy_id", pa.int64()),
+            ("skill_id", pa.int32()),
+            ("seen_at", TIMESTAMP),
+        ]),
+    ),
+    "vacancy_work_format": (
+        f"""
+        SELECT {_MONTH}, vwf.vacancy_id, vwf.work_format_id, l.seen_at
+        FROM vacancy_work_format vwf
+        JOIN vacancy v ON v.vacancy_id = vwf.vacancy_id
+        LEFT JOIN vacancy_listing l ON l.vacancy_id = v.vacancy_id
+        WHERE {_CHANGED}
+        """,
+        pa.schema([
+            ("vacancy_id", pa.int64()),
+            ("work_format_id", pa.int32()),
+            ("seen_at", TIMESTAMP),
+        ]),
+    ),
+}
+
+# Удалённые вакансии: запись в vacancy_listing осталась, строки в vacancy уже нет.
+# Нужны только инкрементальной выгрузке — полная заменяет все прежние части
+DELETED = "deleted"
+DELETED_SQL = """
+    SELECT l.vacancy_id, l.seen_at
+    FROM vacancy_listing l
+    WHERE l.seen_at > %s
+      AND NOT EXISTS (SELECT 1 FROM vacancy v WHERE v.vacancy_id = l.vacancy_id)
+"""
+DELETED_SCHEMA = pa.schema([("vacancy_id", pa.int64()), ("seen_at", TIMESTAMP)])
+
+LOOKUPS = {
+    "profession": pa.schema([("profession_id", pa.int32()), ("name", pa.string())]),
+    "experience": pa.schema([("experience_id", pa.int32()), ("code", pa.string()), ("name", pa.string())]),
+    "work_format": pa.schema([("work_format_id", pa.int32()), ("code", pa.string()), ("name", pa.string())]),
+    "skill": pa.schema([("skill_id", pa.int32()), ("name", pa.string())]),
+}
+
+
+def export_parquet(out_dir: str = EXPORT_DIR, full: bool = False,
+                   chunk_rows: int = EXPORT_CHUNK_ROWS) -> dict:
+    """
+    Выгружает изменения с прошлой выгрузки (full=True — всё заново) в out_dir.
+    Все таблицы читаются из одного снимка (REPEATABLE READ), файлы появляются
+    под итоговыми именами только после успешной выгрузки. Возвращает счётчики строк.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    _remove_unfinished(out_dir)
+    state = {} if full else _load_state(out_dir)
+    watermark = state.get("watermark")
+    since = datetime.fromisoformat(watermark) - EXPORT_OVERLAP if watermark else None
+    # vacancy_id -> seen_at версий, выгруженных в перекрытии: повторно не пишутся
+    exported = state.get("exported", {})
+    export_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+
+    conn = get_connection()
+    written = []
+    versions = {}
+    try:
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT MAX(seen_at) FROM vacancy_listing")
+                new_watermark = cur.fetchone()[0]
+            counts = {}
+            for table, (sql, schema) in PARTITIONED.items():
+                counts[table], files = _export_partitioned(
+                    conn, table, sql, (UNKNOWN_MONTH, since, since), schema,
+                    out_dir, export_id, chunk_rows, exported, versions if table == "vacancy" else None)
+                written += files
+            if since is not None:
+                counts[DELETED], files = _export_deleted(conn, since, out_dir, export_id, chunk_rows,
+                                                         exported, versions)
+                written += files
+            for table, schema in LOOKUPS.items():
+                counts[table], files = _export_lookup(conn, table, schema, out_dir)
+                written += files
+    except BaseException:
+        for tmp, _ in written:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        raise
+    finally:
+        conn.set_session(isolation_level="DEFAULT", readonly="DEFAULT")
+        conn.close()
+
+    for tmp, final in written:
+        os.replace(tmp, final)
+    if full:
+        # полная выгрузка заменяет все прежние части
+        keep = {final for _, final in written}
+        for table in PARTITIONED:
+            for path in glob.glob(os.path.join(out_dir, table, "month=*", "part-*.parquet")):
+                if path not in keep:
+                    os.remove(path)
+        for path in glob.glob(os.path.join(out_dir, DELETED, "part-*.parquet")):
+            os.remove(path)
+    if new_watermark:
+        cutoff = new_watermark - EXPORT_OVERLAP
+        exported = {vacancy_id: seen_at for vacancy_id, seen_at in {**exported, **versions}.items()
+                    if datetime.fromisoformat(seen_at) > cutoff}
+    state = {
+        "watermark": new_watermark.isoformat() if new_watermark else watermark,
+        "last_export": export_id,
+        "rows": counts,
+        "exported": exported,
+    }
+    _save_state(out_dir, state)
+    return counts
+
+
+def _version(row: tuple) -> tuple:
+    # строка выгрузки: (месяц, vacancy_id, ..., seen_at)
+    return str(row[1]), row[-1].astimezone(timezone.utc).isoformat() if row[-1] else None
+
+
+def _export_partitioned(conn, table: str, sql: str, params: tuple, schema: pa.Schema,
+                        out_dir: str, export_id: str, chunk_rows: int,
+                        exported: dict, versions: dict | None = None) -> tuple[int, list]:
+    """
+    Строки из именованного курсора порциями; по ParquetWriter на месяц, row group на порцию.
+    Строки версий из exported пропускаются; versions, если задан, собирает выгруженные версии.
+    """
+    writers = {}
+    files = []
+    total = 0
+    try:
+        with conn.cursor(name=f"export_{table}") as cur:
+            cur.itersize = chunk_rows
+            cur.execute(sql, params)
+            while rows := cur.fetchmany(chunk_rows):
+                by_month = {}
+                for row in rows:
+                    vacancy_id, seen_at = _version(row)
+                    if seen_at is not None and exported.get(vacancy_id) == seen_at:
+                        continue
+                    if versions is not None and seen_at is not None:
+                        versions[vacancy_id] = seen_at
+                    by_month.setdefault(row[0], []).append(row[1:])
+                for month, month_rows in by_month.items():
+                    if month not in writers:
+                        path = os.path.join(out_dir, table, f"month={month}")
+                        os.makedirs(path, exist_ok=True)
+                        final = os.path.join(path, f"part-{export_id}.parquet")
+                        files.append((final + ".tmp", final))
+                        writers[month] = pq.ParquetWriter(final + ".tmp", schema)
+                    writers[month].write_table(_to_table(month_rows, schema))
+                total += sum(len(month_rows) for month_rows in by_month.values())
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return total, files
+
+
+def _export_deleted(conn, since: datetime, out_dir: str, export_id: str, chunk_rows: int,
+                    exported: dict, versions: dict) -> tuple[int, list]:
+    """Удалённые с прошлой выгрузки вакансии в deleted/part-<export>.parquet."""
+    writer = None
+    files = []
+    total = 0
+    try:
+        with conn.cursor(name="export_deleted") as cur:
+            cur.itersize = chunk_rows
+            cur.execute(DELETED_SQL, (since,))
+            while rows := cur.fetchmany(chunk_rows):
+                chunk = []
+                for row in rows:
+                    vacancy_id, seen_at = _version((None, *row))
+                    if exported.get(vacancy_id) == seen_at:
+                        continue
+                    versions[vacancy_id] = seen_at
+                    chunk.append(row)
+                if not chunk:
+                    continue
+                if writer is None:
+                    path = os.path.join(out_dir, DELETED)
+                    os.makedirs(path, exist_ok=True)
+                    final = os.path.join(path, f"part-{export_id}.parquet")
+                    files.append((final + ".tmp", final))
+                    writer = pq.ParquetWriter(final + ".tmp", DELETED_SCHEMA)
+                writer.write_table(_to_table(chunk, DELETED_SCHEMA))
+                total += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total, files
+
+
+def read_snapshot(out_dir: str, table: str) -> pd.DataFrame:
+    """
+    Текущее состояние таблицы по выгрузке: для vacancy и связей — строки актуальной версии
+    каждой вакансии (наибольший seen_at), без вакансий, удалённых после неё (deleted/).
+    """
+    frame = _read_parts(out_dir, table)
+    if table not in PARTITIONED:
+        return frame
+    versions = pd.concat([_read_parts(out_dir, "vacancy")[["vacancy_id", "seen_at"]],
+                          _read_parts(out_dir, DELETED)])
+    latest = frame["vacancy_id"].map(versions.groupby("vacancy_id")["seen_at"].max())
+    # seen_at нет только у вакансий из полной выгрузки, загруженных до vacancy_listing
+    keep = (frame["seen_at"] == latest) | (frame["seen_at"].isna() & latest.isna())
+    return frame[keep].reset_index(drop=True)
+
+
+def _read_parts(out_dir: str, table: str) -> pd.DataFrame:
+    schema = PARTITIONED[table][1] if table in PARTITIONED else {**LOOKUPS, DELETED: DELETED_SCHEMA}[table]
+    paths = sorted(glob.glob(os.path.join(out_dir, table, "**", "part-*.parquet"), recursive=True))
+    return pa.concat_tables([pq.read_table(path, schema=schema) for path in paths]
+                            or [schema.empty_table()]).to_pandas()
+
+
+def _export_lookup(conn, table: str, schema: pa.Schema, out_dir: str) -> tuple[int, list]:
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT {', '.join(schema.names)} FROM {table} ORDER BY 1")
+        rows = cur.fetchall()
+    path = os.path.join(out_dir, table)
+    os.makedirs(path, exist_ok=True)
+    final = os.path.join(path, "part-0.parquet")
+    pq.write_table(_to_table(rows, schema), final + ".tmp")
+    return len(rows), [(final + ".tmp", final)]
+
+
+def _to_table(rows: list, schema: pa.Schema) -> pa.Table:
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    return pa.Table.from_arrays([pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+                                schema=schema)
+
+
+def _remove_unfinished(out_dir: str) -> None:
+    # файлы прерванной выгрузки
+    for path in glob.glob(os.path.join(out_dir, "**", "*.tmp"), recursive=True):
+        os.remove(path)
+
+
+def _load_state(out_dir: str) -> dict:
+    path = os.path.join(out_dir, "_state.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_state(out_dir: str, state: dict) -> None:
+    path = os.path.join(out_dir, "_state.json")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=EXPORT_DIR, help="каталог выгрузки (по умолчанию EXPORT_DIR)")
+    parser.add_argument("--full", action="store_true", help="выгрузить всё, а не изменения с прошлого раза")
+    parser.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    counts = export_parquet(args.out, args.full, args.chunk_rows)
+    print(json.dumps(counts, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
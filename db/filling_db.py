@@ -1,9 +1,33 @@
 from psycopg2 import extras
+import asyncio
+import hashlib
+import io
+import json
 import os
+import time
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from vacancy_scraper.scrapers import get_professional_role_ids, get_vacancies
-from vacancy_scraper.extractor import data_extractor
-from . import get_connection
+from vacancy_scraper.scrapers import get_professional_role_ids, stream_vacancies, print_crawl_report, failed_pages
+from vacancy_scraper.extractor import build_rows, fetch_vacancy
+from vacancy_scraper.http_client import AsyncHttpClient, HH_MAX_CONCURRENCY
+from vacancy_scraper.raw_archive import RawArchive, get_archive
+from vacancy_scraper.metrics import METRICS, METRICS_PATH, start_http_server
+from . import connection, get_connection
+from .checkpoints import (
+    acquire_run_lock,
+    release_run_lock,
+    start_or_resume_run,
+    get_done_pages,
+    get_run_vacancy_ids,
+    get_pending_vacancies,
+    record_page,
+    record_batch,
+    finish_run,
+    get_progress,
+)
+from .migrate import apply_migrations
+from .repositories import bump_data_version
+from .rollups import mark_dirty_days, refresh_rollups
 
 load_dotenv()
 
@@ -11,20 +35,246 @@ headers = {
     "User-Agent": os.getenv("HH_USER_AGENT", "it_work_project/0.1")
 }
 
-def filling_db():
-    role_ids = get_professional_role_ids(headers, int(os.getenv("CATEGORY_ID")))
-    json_vac = get_vacancies(role_ids, int(os.getenv("AREA_ID")), headers)
-    vacancies = data_extractor(json_vac, headers)
-    with get_connection() as conn:
+# Поля вакансии из выдачи поиска, изменение которых требует перекачать карточку
+LISTING_FIELDS = ("name", "salary", "experience", "published_at", "work_format", "schedule", "area")
+# Запас по времени, чтобы не потерять вакансии на границе прошлого запуска
+INCREMENTAL_OVERLAP = timedelta(hours=1)
+
+# Тёплый кэш id справочников на время жизни процесса: name профессии / code опыта -> id.
+# Заполняется из БД в начале прогона (load_reference_ids) и пополняется только после
+# успешного коммита, чтобы не хранить id откатившихся строк.
+_profession_ids: dict[str, int] = {}
+_experience_ids: dict[str, int] = {}
+
+# С какого размера батча use_copy=None выбирает загрузку через COPY
+COPY_THRESHOLD = int(os.getenv("COPY_THRESHOLD", 5000))
+# Сколько вакансий пишется в БД одной транзакцией; очереди между стадиями того же размера
+BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 500))
+
+
+def filling_db(incremental: bool = True, use_copy: bool | None = None, batch_size: int = BATCH_SIZE):
+    """
+    Конвейер: поиск → карточки вакансий → классификация → запись батчами по batch_size.
+    Стадии связаны ограниченными очередями, каждый батч коммитится отдельно,
+    так что память не растёт с размером выдачи, а записанное переживает падение.
+
+    incremental=True: поиск только с момента прошлого успешного запуска (date_from),
+    карточки уже виденных вакансий не перекачиваются, если их данные в выдаче не изменились.
+    Без сохранённой отметки делается полный обход.
+    use_copy: True — загрузка через COPY в staging-таблицы, False — через execute_values,
+    None — COPY, если batch_size не меньше COPY_THRESHOLD.
+    Состояние прогона пишется в crawl_* (db.checkpoints): прерванный прогон при следующем
+    запуске продолжается — обработанные страницы поиска не скачиваются повторно,
+    а вакансии из очереди, не попавшие в записанные батчи, обрабатываются первыми.
+    Страницы пропускаются по номеру: новые вакансии выдачу не сдвигают (date_to прогона
+    зафиксирован), но если за время перерыва вакансии из окна сняли или обновили, выдача
+    сдвигается и часть вакансий не попадает ни на одну скачанную страницу. Отметка при этом
+    уходит вперёд, так что их подберёт только полный обход (incremental=False).
+    Одновременно идёт не больше одного прогона: на всё время прогона держится
+    advisory-блокировка (db.checkpoints.acquire_run_lock), второй процесс сразу падает.
+    В конце прогона пересчитываются дневные агрегаты (db.rollups) за затронутые дни.
+    Скачанные карточки сохраняются в архив сырых ответов (vacancy_scraper.raw_archive),
+    из которого db.replay повторяет классификацию и запись без обращения к hh.ru.
+    Метрики прогона (vacancy_scraper.metrics) пишутся в METRICS_PATH, при METRICS_PORT
+    во время прогона доступны в формате Prometheus.
+    Если страницы поиска не скачались, отметка не сдвигается; если не скачались только
+    карточки — сдвигается не дальше даты публикации самой старой из них (next_high_water_mark).
+    """
+    lock_conn = get_connection()
+    if not acquire_run_lock(lock_conn):
+        lock_conn.close()
+        raise RuntimeError("Прогон filling_db уже идёт в другом процессе")
+    try:
+        _fill(incremental, use_copy, batch_size)
+    finally:
+        try:
+            release_run_lock(lock_conn)
+        finally:
+            lock_conn.close()
+
+
+def _fill(incremental: bool, use_copy: bool | None, batch_size: int) -> None:
+    with connection() as conn:
+        apply_migrations(conn)
+        load_reference_ids(conn)
+    date_from = None
+    if incremental:
+        with connection() as conn:
+            mark = get_high_water_mark(conn)
+        if mark:
+            date_from = mark - INCREMENTAL_OVERLAP
+    if use_copy is None:
+        use_copy = batch_size >= COPY_THRESHOLD
+
+    with connection() as conn:
+        run = start_or_resume_run(conn, date_from)
+        if run["resumed"]:
+            print(f"Продолжаю прерванный прогон {run['run_id']}:", get_progress(conn, run["run_id"]))
+
+    METRICS.reset()
+    server = start_http_server()
+    try:
+        role_ids = get_professional_role_ids(headers, int(os.getenv("CATEGORY_ID")))
+        failures = {"pages": 0, "details": []}
+        asyncio.run(_run_pipeline(role_ids, int(os.getenv("AREA_ID")), run, incremental,
+                                  use_copy, batch_size, failures))
+
+        # отметку двигаем только после полного прохода и не дальше первой пропущенной вакансии
+        mark = next_high_water_mark(run["started_at"], failures)
+        with connection() as conn:
+            with conn.cursor() as cur:
+                if mark is not None:
+                    set_high_water_mark(cur, mark)
+                finish_run(cur, run["run_id"])
+                with METRICS.timer("db_batch_seconds", stage="refresh_rollups"):
+                    if refresh_rollups(cur):
+                        bump_data_version(cur)
+    finally:
+        # метрики пишутся и для упавшего прогона — по ним видно, где он остановился
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        if METRICS_PATH:
+            METRICS.write_json(METRICS_PATH)
+            print(f"Метрики прогона: {METRICS_PATH}")
+
+
+async def _run_pipeline(role_ids: list, area_id: int, run: dict, incremental: bool,
+                        use_copy: bool, batch_size: int, failures: dict) -> None:
+    listings = asyncio.Queue(maxsize=batch_size)
+    details = asyncio.Queue(maxsize=batch_size)
+    read_conn = get_connection()
+    write_conn = get_connection()
+    archive = get_archive()
+    try:
+        async with AsyncHttpClient(headers) as client:
+            tasks = [
+                asyncio.create_task(_crawl_stage(client, role_ids, area_id, run, incremental,
+                                                 read_conn, listings, failures)),
+                asyncio.create_task(_fetch_stage(client, listings, details, failures, archive)),
+                asyncio.create_task(_write_stage(details, write_conn, run["run_id"], use_copy, batch_size)),
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+    finally:
+        read_conn.close()
+        write_conn.close()
+        if archive is not None:
+            archive.close()
+
+
+async def _crawl_stage(client: AsyncHttpClient, role_ids: list, area_id: int, run: dict,
+                       incremental: bool, conn, listings: asyncio.Queue, failures: dict) -> None:
+    run_id = run["run_id"]
+    seen_ids = await asyncio.to_thread(get_run_vacancy_ids, conn, run_id)
+    done_pages = await asyncio.to_thread(get_done_pages, conn, run_id)
+    total = queued = 0
+    # соединение одно на стадию, а страницы приходят параллельно — транзакции по очереди
+    lock = asyncio.Lock()
+
+    # сначала — вакансии, поставленные в очередь прерванным прогоном
+    last_id = 0
+    while pending := await asyncio.to_thread(get_pending_vacancies, conn, run_id, last_id):
+        last_id = int(pending[-1]["id"])
+        for vac in pending:
+            await listings.put(vac)
+
+    async def on_items(items: list, key: str) -> None:
+        nonlocal total, queued
+        page_total = len(items)
+        items = [v for v in items if int(v["id"]) not in seen_ids]
+        seen_ids.update(int(v["id"]) for v in items)
+        total += len(items)
+        METRICS.inc("pipeline_items_total", len(items), stage="listed")
+        async with lock:
+            if incremental and items:
+                hashes = await asyncio.to_thread(get_seen_hashes, conn, [int(v["id"]) for v in items])
+                items = [v for v in items if hashes.get(int(v["id"])) != listing_hash(v)]
+            await asyncio.to_thread(record_page, conn, run_id, key, page_total, items)
+        queued += len(items)
+        METRICS.inc("pipeline_items_total", len(items), stage="queued")
+        for vac in items:
+            await listings.put(vac)
+
+    # date_to фиксирован на начало прогона, чтобы шарды и ключи страниц совпадали при возобновлении
+    report = await stream_vacancies(client, role_ids, area_id, on_items, run["date_from"],
+                                    run["started_at"], done_pages)
+    print_crawl_report(report)
+    failures["pages"] = failed_pages(report)
+    print(f"Новых или изменённых вакансий: {queued} из {total}")
+    for _ in range(HH_MAX_CONCURRENCY):
+        await listings.put(None)
+
+
+async def _fetch_stage(client: AsyncHttpClient, listings: asyncio.Queue, details: asyncio.Queue,
+                       failures: dict, archive: RawArchive | None = None) -> None:
+    async def worker(queue: asyncio.Queue, failed: list, failed_stage: str) -> None:
+        while (vac := await queue.get()) is not None:
+            full_vac = await fetch_vacancy(client, int(vac["id"]))
+            METRICS.inc("pipeline_items_total", stage="fetched" if full_vac is not None else failed_stage)
+            if full_vac is None:
+                failed.append(vac)
+            else:
+                if archive is not None:
+                    # сериализация и gzip — в потоке, чтобы не держать event loop
+                    await asyncio.to_thread(archive.append, vac, full_vac)
+                await details.put((vac, full_vac))
+
+    first_pass_failed = []
+    await asyncio.gather(*(worker(listings, first_pass_failed, "fetch_retried")
+                           for _ in range(HH_MAX_CONCURRENCY)))
+    # не скачанные карточки — ещё один заход в конце; оставшиеся не пускают отметку
+    # прогона дальше своей даты публикации (next_high_water_mark)
+    if first_pass_failed:
+        print(f"Повторно скачиваю карточки: {len(first_pass_failed)}")
+        retry = asyncio.Queue()
+        for vac in first_pass_failed + [None] * HH_MAX_CONCURRENCY:
+            retry.put_nowait(vac)
+        await asyncio.gather(*(worker(retry, failures["details"], "fetch_failed")
+                               for _ in range(HH_MAX_CONCURRENCY)))
+    await details.put(None)
+
+
+async def _write_stage(details: asyncio.Queue, conn, run_id: int, use_copy: bool, batch_size: int) -> None:
+    batch = []
+    written = 0
+    while (pair := await details.get()) is not None:
+        batch.append(pair)
+        if len(batch) >= batch_size:
+            written += await asyncio.to_thread(write_batch, conn, batch, use_copy, run_id)
+            batch = []
+    if batch:
+        written += await asyncio.to_thread(write_batch, conn, batch, use_copy, run_id)
+    print(f"Записано вакансий: {written}")
+
+
+def write_batch(conn, pairs: list, use_copy: bool = False, run_id: int | None = None) -> int:
+    """
+    pairs — [(вакансия из поиска, полная вакансия)]. Классифицирует батч и пишет его
+    одной транзакцией вместе с хэшами выдачи и отметкой батча прогона run_id.
+    Ранее записанные вакансии, которые больше не классифицируются, удаляются.
+    Возвращает число записанных вакансий.
+    """
+    started = time.perf_counter()
+    with METRICS.timer("db_batch_seconds", stage="build_rows"):
+        vacancies = build_rows(pairs)
+    with conn:
         with conn.cursor() as cur:
+            with METRICS.timer("db_batch_seconds", stage="resolve_ids"):
+                profession_ids = resolve_profession_ids(cur, [vac[1] for vac in vacancies])
+                experience_ids = resolve_experience_ids(cur, [vac[2] for vac in vacancies])
             list_for_vacancies = []
             list_for_work_format = []
             list_for_skills = []
             for vac in vacancies:
                 try:
                     id_vac = vac[0]
-                    id_profession = get_profession_id(conn, vac[1])
-                    id_experience = get_experience_id(conn, vac[2])
+                    id_profession = profession_ids[vac[1]]
+                    id_experience = experience_ids[vac[2]['id']]
                     salary = (vac[3] or {}).get('salary_avg')
                     date = vac[4]
 
@@ -36,34 +286,159 @@ def filling_db():
                     list_for_skills.append((id_vac, skills))
                 except Exception as e:
                     print("Пропускаю вакансию из-за:", e)
-            insert_vacancy(cur, list_for_vacancies)
-            insert_work_format(cur, list_for_work_format)
-            insert_skills(cur, list_for_skills)
+            vacancy_ids = [row[0] for row in list_for_vacancies]
+            # вакансии, которые больше не относятся ни к одной профессии (изменилась карточка
+            # или классификатор при db.replay), удаляются вместе с навыками и форматами
+            unclassified = sorted({int(vac["id"]) for vac, _ in pairs} - {vac[0] for vac in vacancies})
+            # дни до записи: у обновлённой вакансии могла смениться дата
+            mark_dirty_days(cur, vacancy_ids + unclassified)
+            delete_vacancies(cur, unclassified)
+            with METRICS.timer("db_batch_seconds", stage="copy" if use_copy else "insert"):
+                if use_copy:
+                    copy_load(cur, list_for_vacancies, list_for_work_format, list_for_skills)
+                else:
+                    insert_vacancy(cur, list_for_vacancies)
+                    insert_work_format(cur, list_for_work_format)
+                    insert_skills(cur, list_for_skills)
+            mark_dirty_days(cur, vacancy_ids)
+            insert_listing_hashes(cur, [(int(vac["id"]), listing_hash(vac)) for vac, _ in pairs])
+            if run_id is not None:
+                record_batch(cur, run_id, [int(vac["id"]) for vac, _ in pairs], len(list_for_vacancies))
+            # удалённые вакансии тоже меняют отчёты: кэш ReportCache должен устареть
+            if list_for_vacancies or unclassified:
+                bump_data_version(cur)
+    METRICS.observe("db_batch_seconds", time.perf_counter() - started, stage="total")
+    METRICS.inc("db_rows_total", len(list_for_vacancies), table="vacancy")
+    METRICS.inc("db_rows_total", sum(len(wf or ()) for _, wf in list_for_work_format), table="vacancy_work_format")
+    METRICS.inc("db_rows_total", sum(len(sk or ()) for _, sk in list_for_skills), table="vacancy_skill")
+    _profession_ids.update(profession_ids)
+    _experience_ids.update(experience_ids)
+    return len(list_for_vacancies)
 
 
+def listing_hash(vacancy: dict) -> str:
+    listing = {key: vacancy.get(key) for key in LISTING_FIELDS}
+    return hashlib.md5(json.dumps(listing, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
 
-def get_profession_id(conn, name:str) -> int:
+
+def get_high_water_mark(conn) -> datetime | None:
     with conn.cursor() as cursor:
-        cursor.execute(
-            "INSERT INTO profession (name) "
-            "VALUES (%s) "
+        cursor.execute("SELECT value FROM ingest_state WHERE key = 'high_water_mark'")
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+
+def next_high_water_mark(started_at: datetime, failures: dict) -> datetime | None:
+    """
+    Новая отметка по итогам прогона; None — не двигать. Не скачанные страницы поиска
+    оставляют отметку на месте, не скачанные карточки — сдвигают её не дальше даты
+    публикации самой старой из них: следующий прогон найдёт их снова (хэш выдачи
+    у них не записан, поэтому они попадут в очередь).
+    """
+    if failures["pages"]:
+        print(f"Отметка не сдвинута: не скачано страниц поиска — {failures['pages']}")
+        return None
+    if not failures["details"]:
+        return started_at
+    try:
+        oldest = min(datetime.strptime(vac["published_at"], "%Y-%m-%dT%H:%M:%S%z")
+                     for vac in failures["details"])
+    except (KeyError, TypeError, ValueError):
+        print(f"Отметка не сдвинута: не скачано карточек — {len(failures['details'])}")
+        return None
+    print(f"Не скачано карточек: {len(failures['details'])}, отметка — не дальше {oldest}")
+    return min(started_at, oldest)
+
+
+def set_high_water_mark(cur, value: datetime) -> None:
+    cur.execute(
+        "INSERT INTO ingest_state (key, value) VALUES ('high_water_mark', %s) "
+        "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value",
+        (value,)
+    )
+
+
+def get_seen_hashes(conn, ids: list) -> dict:
+    if not ids:
+        return {}
+    # транзакция закрывается сразу: соединение стадии поиска не висит idle in transaction,
+    # пока ждёт следующих страниц
+    with conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT vacancy_id, listing_hash FROM vacancy_listing WHERE vacancy_id = ANY(%s)",
+                (ids,)
+            )
+            return dict(cursor.fetchall())
+
+
+def insert_listing_hashes(cur, pairs: list) -> None:
+    if pairs:
+        query = ("INSERT INTO vacancy_listing (vacancy_id, listing_hash) VALUES %s "
+                 "ON CONFLICT (vacancy_id) DO UPDATE "
+                 "SET listing_hash = EXCLUDED.listing_hash, seen_at = now()")
+        extras.execute_values(cur, query, pairs, page_size=1000)
+
+
+
+def load_reference_ids(conn) -> None:
+    """Заполняет кэш id справочников из БД: батчи не делают upsert уже известных профессий и опыта."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT name, profession_id FROM profession")
+        _profession_ids.update(cur.fetchall())
+        cur.execute("SELECT code, experience_id FROM experience WHERE code IS NOT NULL")
+        _experience_ids.update(cur.fetchall())
+
+
+def reset_reference_ids() -> None:
+    """Сбрасывает кэш id справочников — например, после пересоздания базы."""
+    _profession_ids.clear()
+    _experience_ids.clear()
+
+
+def resolve_profession_ids(cur, names: list) -> dict:
+    """Один upsert на все новые профессии батча; известные берутся из _profession_ids."""
+    ids = dict(_profession_ids)
+    missing = sorted({name for name in names if name not in ids})
+    if missing:
+        rows = extras.execute_values(
+            cur,
+            "INSERT INTO profession (name) VALUES %s "
             "ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name "
-            "RETURNING profession_id",
-            (name,)
+            "RETURNING name, profession_id",
+            [(name,) for name in missing],
+            page_size=len(missing),
+            fetch=True,
         )
-        return int(cursor.fetchone()[0])
+        ids.update(rows)
+    return ids
 
 
-def get_experience_id(conn, exp:dict) -> int:
-    with conn.cursor() as cursor:
-        cursor.execute(
-            "INSERT INTO experience (code, name) "
-            "VALUES (%s, %s) "
+def resolve_experience_ids(cur, experiences: list) -> dict:
+    """То же для опыта, ключ — code (id из HH)."""
+    ids = dict(_experience_ids)
+    missing = {}
+    for exp in experiences:
+        if exp and exp.get('id') not in ids:
+            missing[exp.get('id')] = exp.get('name')
+    if missing:
+        rows = extras.execute_values(
+            cur,
+            "INSERT INTO experience (code, name) VALUES %s "
             "ON CONFLICT (code) DO UPDATE SET code = EXCLUDED.code "
-            "RETURNING experience_id",
-            (exp.get('id'), exp.get('name'))
+            "RETURNING code, experience_id",
+            sorted(missing.items(), key=lambda item: str(item[0])),
+            page_size=len(missing),
+            fetch=True,
         )
-        return int(cursor.fetchone()[0])
+        ids.update(rows)
+    return ids
+
+
+def delete_vacancies(cur, vacancy_ids: list) -> None:
+    if vacancy_ids:
+        cur.execute("DELETE FROM vacancy WHERE vacancy_id = ANY(%s)", (vacancy_ids,))
+        METRICS.inc("db_rows_deleted_total", cur.rowcount, table="vacancy")
 
 
 def insert_vacancy(cur, list_for_vacancies:list):
@@ -82,21 +457,26 @@ def insert_vacancy(cur, list_for_vacancies:list):
 
 def insert_work_format(cur, list_for_work_format:list):
     if list_for_work_format:
-        pairs = []
+        # все форматы батча без повторов: code -> name
+        formats = {}
         for rows_by_vacancy in list_for_work_format:
-            work_formats = rows_by_vacancy[1]
-            if work_formats:
-                query = ("INSERT INTO work_format (code, name) VALUES %s "
-                         "ON CONFLICT (code) DO UPDATE SET name = EXCLUDED.name "
-                         "RETURNING work_format_id")
-                extras.execute_values(cur, query, work_formats, page_size=100)
-                ids = cur.fetchall()
-                pairs.extend([(rows_by_vacancy[0], id_work_format[0]) for id_work_format in ids
-                        if ids])
-        if pairs:
+            for code, name in rows_by_vacancy[1] or []:
+                formats[code] = name
+        if formats:
+            # сортировка даёт одинаковый порядок блокировок при параллельных загрузках
+            query = ("INSERT INTO work_format (code, name) VALUES %s "
+                     "ON CONFLICT (code) DO UPDATE SET name = EXCLUDED.name "
+                     "WHERE work_format.name IS DISTINCT FROM EXCLUDED.name")
+            extras.execute_values(cur, query, sorted(formats.items()), page_size=len(formats))
+            cur.execute("SELECT code, work_format_id FROM work_format WHERE code = ANY(%s)",
+                        (list(formats),))
+            ids = dict(cur.fetchall())
+            pairs = {(rows_by_vacancy[0], ids[code])
+                     for rows_by_vacancy in list_for_work_format
+                     for code, _ in rows_by_vacancy[1] or []}
             query = ("INSERT INTO vacancy_work_format (vacancy_id, work_format_id) VALUES %s "
                      "ON CONFLICT (vacancy_id, work_format_id) DO NOTHING")
-            extras.execute_values(cur, query, pairs, page_size=1000)
+            extras.execute_values(cur, query, sorted(pairs), page_size=len(pairs))
         else:
             print("Ни для одной профессии не был указан формат работы")
     else:
@@ -105,22 +485,96 @@ def insert_work_format(cur, list_for_work_format:list):
 
 def insert_skills(cur, list_for_skills:list):
     if list_for_skills:
-        pairs = []
-        for rows_by_vacancy in list_for_skills:
-            skills = rows_by_vacancy[1]
-            if skills:
-                query = ("INSERT INTO skill (name) VALUES %s "
-                         "ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name "
-                         "RETURNING skill_id")
-                extras.execute_values(cur, query, skills, page_size=1000)
-                ids = cur.fetchall()
-                pairs.extend([(rows_by_vacancy[0], id_work_format[0]) for id_work_format in ids
-                        if ids])
-        if pairs:
+        names = {skill[0] for rows_by_vacancy in list_for_skills for skill in rows_by_vacancy[1] or []}
+        if names:
+            # DO NOTHING не блокирует уже существующие строки; id добираем отдельным SELECT,
+            # который видит и навыки, вставленные параллельной загрузкой
+            query = ("INSERT INTO skill (name) VALUES %s "
+                     "ON CONFLICT (name) DO NOTHING")
+            extras.execute_values(cur, query, [(name,) for name in sorted(names)], page_size=len(names))
+            cur.execute("SELECT name, skill_id FROM skill WHERE name = ANY(%s)", (list(names),))
+            ids = dict(cur.fetchall())
+            pairs = {(rows_by_vacancy[0], ids[skill[0]])
+                     for rows_by_vacancy in list_for_skills
+                     for skill in rows_by_vacancy[1] or []}
             query = ("INSERT INTO vacancy_skill (vacancy_id, skill_id) VALUES %s "
                      "ON CONFLICT (vacancy_id, skill_id) DO NOTHING")
-            extras.execute_values(cur, query, pairs, page_size=1000)
+            extras.execute_values(cur, query, sorted(pairs), page_size=len(pairs))
         else:
             print("Ни для одной вакансии не были прописаны ключевые навыки")
     else:
         print("Список навыков пуст")
+
+
+def copy_load(cur, list_for_vacancies:list, list_for_work_format:list, list_for_skills:list):
+    """
+    Загрузка больших объёмов: строки потоком идут через COPY во временные staging-таблицы,
+    затем сливаются в vacancy, skill/vacancy_skill, work_format/vacancy_work_format
+    set-based upsert'ами. Всё в транзакции вызывающего кода, staging удаляется при коммите.
+    """
+    if not list_for_vacancies:
+        print("Список вакансий пуст")
+        return
+
+    cur.execute(
+        "CREATE TEMP TABLE stage_vacancy (LIKE vacancy) ON COMMIT DROP;"
+        "CREATE TEMP TABLE stage_vacancy_skill (vacancy_id BIGINT, name TEXT) ON COMMIT DROP;"
+        "CREATE TEMP TABLE stage_vacancy_work_format (vacancy_id BIGINT, code TEXT, name TEXT) ON COMMIT DROP;"
+    )
+    _copy_rows(cur, "stage_vacancy (vacancy_id, profession_id, experience_id, salary_avg, created_at)",
+               list_for_vacancies)
+    _copy_rows(cur, "stage_vacancy_skill (vacancy_id, name)",
+               [(id_vac, skill[0]) for id_vac, skills in list_for_skills for skill in skills or []])
+    _copy_rows(cur, "stage_vacancy_work_format (vacancy_id, code, name)",
+               [(id_vac, code, name) for id_vac, formats in list_for_work_format for code, name in formats or []])
+
+    cur.execute(
+        "INSERT INTO vacancy (vacancy_id, profession_id, experience_id, salary_avg, created_at) "
+        "SELECT DISTINCT ON (vacancy_id) vacancy_id, profession_id, experience_id, salary_avg, created_at "
+        "FROM stage_vacancy ORDER BY vacancy_id "
+        "ON CONFLICT (vacancy_id) DO UPDATE "
+        "SET profession_id = EXCLUDED.profession_id, "
+        "experience_id = EXCLUDED.experience_id, "
+        "salary_avg = EXCLUDED.salary_avg, "
+        "created_at = EXCLUDED.created_at"
+    )
+    cur.execute(
+        "INSERT INTO skill (name) "
+        "SELECT DISTINCT name FROM stage_vacancy_skill ORDER BY name "
+        "ON CONFLICT (name) DO NOTHING"
+    )
+    cur.execute(
+        "INSERT INTO vacancy_skill (vacancy_id, skill_id) "
+        "SELECT DISTINCT st.vacancy_id, s.skill_id "
+        "FROM stage_vacancy_skill st JOIN skill s ON s.name = st.name "
+        "ON CONFLICT (vacancy_id, skill_id) DO NOTHING"
+    )
+    cur.execute(
+        "INSERT INTO work_format (code, name) "
+        "SELECT DISTINCT ON (code) code, name FROM stage_vacancy_work_format ORDER BY code "
+        "ON CONFLICT (code) DO UPDATE SET name = EXCLUDED.name "
+        "WHERE work_format.name IS DISTINCT FROM EXCLUDED.name"
+    )
+    cur.execute(
+        "INSERT INTO vacancy_work_format (vacancy_id, work_format_id) "
+        "SELECT DISTINCT st.vacancy_id, wf.work_format_id "
+        "FROM stage_vacancy_work_format st JOIN work_format wf ON wf.code = st.code "
+        "ON CONFLICT (vacancy_id, work_format_id) DO NOTHING"
+    )
+
+
+def _copy_rows(cur, table:str, rows:list) -> None:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} FROM STDIN", buffer)
+
+
+def _copy_value(value) -> str:
+    # текстовый формат COPY: NULL — \N, спецсимволы экранируются обратным слэшем
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
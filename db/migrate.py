@@ -0,0 +1,38 @@
+"""
+Применяет sql/migrate.sql к базе DB_NAME: создаёт недостающие таблицы ingest'а и отчётов
+в базе, созданной по старой версии schema.sql, и заполняет дневные агрегаты (db.rollups),
+если они ещё ни разу не пересчитывались.
+
+    python -m db.migrate
+"""
+import argparse
+import os
+
+from . import connection
+from .repositories import bump_data_version
+from .rollups import refresh_rollups, rollups_initialized
+
+MIGRATE_SQL = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql", "migrate.sql")
+
+
+def apply_migrations(conn) -> None:
+    """Все операторы файла идемпотентны (IF NOT EXISTS); коммит — за вызывающим кодом."""
+    with open(MIGRATE_SQL, encoding="utf-8") as f:
+        script = f.read()
+    with conn.cursor() as cur:
+        cur.execute(script)
+        if not rollups_initialized(cur):
+            # агрегаты на уже заполненной базе: без этого отчёты по ним были бы пустыми
+            if refresh_rollups(cur, full=True):
+                bump_data_version(cur)
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    with connection() as conn:
+        apply_migrations(conn)
+    print("Схема обновлена")
+
+
+if __name__ == "__main__":
+    main()
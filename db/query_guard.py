@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+import pandas as pd
+import psycopg2
+from psycopg2 import errors
+
+# Ограничения для запросов отчётов: statement_timeout на запрос (мс)
+# и предельная оценка стоимости из EXPLAIN, выше которой запрос не выполняется
+REPORT_STATEMENT_TIMEOUT_MS = int(os.getenv("REPORT_STATEMENT_TIMEOUT_MS", 30000))
+REPORT_MAX_COST = float(os.getenv("REPORT_MAX_COST", 5_000_000))
+# Как часто on_wait получает управление, пока запрос выполняется
+WAIT_INTERVAL = 0.25
+
+
+class QueryRefused(ValueError):
+    """Оценка стоимости запроса выше предела — запрос не запускался."""
+
+    def __init__(self, cost: float, max_cost: float):
+        super().__init__(f"Запрос слишком тяжёлый: оценка стоимости {cost:.0f} больше предела {max_cost:.0f}.")
+        self.cost = cost
+        self.max_cost = max_cost
+
+
+class QueryTimeout(RuntimeError):
+    """Запрос прерван по statement_timeout или отменён пользователем."""
+
+
+def explain(conn, sql: str, params=None, analyze: bool = False) -> dict:
+    """
+    Корневой узел плана из EXPLAIN (FORMAT JSON); при analyze запрос выполняется.
+    Внутри открытой транзакции откатывается только сам EXPLAIN (до SAVEPOINT),
+    незакоммиченная работа вызывающего кода остаётся.
+    """
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    in_transaction = conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    with conn.cursor() as cur:
+        if in_transaction:
+            cur.execute("SAVEPOINT query_guard_explain")
+        try:
+            cur.execute(f"EXPLAIN ({options}) {sql}", params or None)
+            result = cur.fetchone()[0]
+        finally:
+            if in_transaction:
+                cur.execute("ROLLBACK TO SAVEPOINT query_guard_explain")
+                cur.execute("RELEASE SAVEPOINT query_guard_explain")
+            else:
+                conn.rollback()
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]
+
+
+def estimate_cost(conn, sql: str, params=None) -> float:
+    return explain(conn, sql, params)["Plan"]["Total Cost"]
+
+
+def check_cost(conn, sql: str, params=None, max_cost: float | None = REPORT_MAX_COST) -> float:
+    """Оценка стоимости запроса; QueryRefused, если она выше max_cost (None — без предела)."""
+    cost = estimate_cost(conn, sql, params)
+    if max_cost is not None and cost > max_cost:
+        raise QueryRefused(cost, max_cost)
+    return cost
+
+
+def guarded_read(conn, sql: str, params=None, timeout_ms: int | None = REPORT_STATEMENT_TIMEOUT_MS,
+                 on_wait=None) -> pd.DataFrame:
+    """
+    pd.read_sql с statement_timeout на время запроса.
+    on_wait(elapsed) — вызывается каждые WAIT_INTERVAL с, пока запрос идёт в отдельном потоке;
+    если on_wait бросает исключение (например, Streamlit прерывает скрипт по кнопке),
+    запрос отменяется через conn.cancel(), а исключение пробрасывается дальше.
+    """
+    def read() -> pd.DataFrame:
+        with conn.cursor() as cur:
+            if timeout_ms:
+                cur.execute("SET LOCAL statement_timeout = %s", (int(timeout_ms),))
+        try:
+            return pd.read_sql(sql, conn, params=params)
+        except pd.errors.DatabaseError as e:
+            # pandas заворачивает ошибку драйвера; отмена/таймаут — отдельным исключением
+            if isinstance(e.__cause__, errors.QueryCanceled):
+                conn.rollback()
+                raise QueryTimeout(f"Запрос прерван: {e.__cause__}".strip()) from e
+            raise
+        except errors.QueryCanceled as e:
+            conn.rollback()
+            raise QueryTimeout(f"Запрос прерван: {e}".strip()) from e
+        finally:
+            if not conn.closed and conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_INTRANS:
+                with conn.cursor() as cur:
+                    cur.execute("SET LOCAL statement_timeout = DEFAULT")
+
+    if on_wait is None:
+        return read()
+
+    result = {}
+
+    def worker() -> None:
+        try:
+            result["df"] = read()
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=worker, daemon=True)
+    started = time.monotonic()
+    thread.start()
+    try:
+        while thread.is_alive():
+            thread.join(WAIT_INTERVAL)
+            if thread.is_alive():
+                on_wait(time.monotonic() - started)
+    except BaseException:
+        conn.cancel()
+        thread.join()
+        raise
+    if "error" in result:
+        raise result["error"]
+    return result["df"]
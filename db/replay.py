@@ -0,0 +1,70 @@
+"""
+Повтор обработки из архива сырых ответов (vacancy_scraper.raw_archive) без обращения к hh.ru:
+извлечение полей, классификация и запись в БД теми же write_batch, что и в filling_db.
+Полезно после изменения классификатора или извлечения и для восстановления базы.
+
+    python -m db.replay
+    python -m db.replay --since 2026-10-01 --until 2026-10-15 --copy
+
+Записи идут в порядке загрузки, поэтому из нескольких загрузок одной вакансии
+в базе остаётся последняя. Карточки, скачанные позже конца окна, архивная версия перезапишет —
+окно until стоит задавать не раньше последнего прогона, если база должна остаться актуальной.
+"""
+import argparse
+from datetime import datetime, timezone
+
+from vacancy_scraper.raw_archive import HH_ARCHIVE_DIR, iter_archive
+from . import get_connection
+from .filling_db import BATCH_SIZE, load_reference_ids, write_batch
+from .repositories import bump_data_version
+from .rollups import refresh_rollups
+
+
+def replay_archive(path: str = HH_ARCHIVE_DIR, since: datetime | None = None,
+                   until: datetime | None = None, batch_size: int = BATCH_SIZE,
+                   use_copy: bool = False) -> dict:
+    """Прогоняет записи архива батчами через write_batch; возвращает счётчики."""
+    conn = get_connection()
+    read = written = 0
+    # в одном батче вакансия встречается один раз — последняя загрузка
+    batch = {}
+    try:
+        with conn:
+            load_reference_ids(conn)
+        for listing, vacancy, _ in iter_archive(path, since, until):
+            read += 1
+            batch.pop(int(listing["id"]), None)
+            batch[int(listing["id"])] = (listing, vacancy)
+            if len(batch) >= batch_size:
+                written += write_batch(conn, list(batch.values()), use_copy)
+                batch = {}
+        if batch:
+            written += write_batch(conn, list(batch.values()), use_copy)
+        with conn:
+            with conn.cursor() as cur:
+                if refresh_rollups(cur):
+                    bump_data_version(cur)
+    finally:
+        conn.close()
+    return {"read": read, "written": written}
+
+
+def _date(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--archive", default=HH_ARCHIVE_DIR, help="каталог архива (по умолчанию HH_ARCHIVE_DIR)")
+    parser.add_argument("--since", type=_date, help="с какого времени загрузки (ISO, по умолчанию UTC)")
+    parser.add_argument("--until", type=_date, help="до какого времени загрузки, не включительно")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--copy", action="store_true", help="загрузка через COPY")
+    args = parser.parse_args()
+
+    print(replay_archive(args.archive, args.since, args.until, args.batch_size, args.copy))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,62 @@
 import json
 from psycopg2.extras import RealDictCursor
 import pandas as pd
-from . import get_connection
+from . import connection
+from .query_guard import REPORT_MAX_COST, REPORT_STATEMENT_TIMEOUT_MS, check_cost, guarded_read
 
 # Получение чистых данных их БД
 
 def get_all_vacancies(limit=1000):
-    with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("SELECT * FROM vacancy LIMIT %s", (limit,))
         return cur.fetchall()
 
 def get_all_experience(limit=1000):
-    with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("SELECT * FROM experience LIMIT %s", (limit,))
         return cur.fetchall()
 
 def get_all_profession(limit=1000):
-    with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("SELECT * FROM profession LIMIT %s", (limit,))
         return cur.fetchall()
 
 def get_all_skill(limit=5000):
-    with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("SELECT * FROM skill LIMIT %s", (limit,))
         return cur.fetchall()
 
 def get_all_vacancy_skill(limit=5000):
-    with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("SELECT * FROM vacancy_skill LIMIT %s", (limit,))
         return cur.fetchall()
 
 def get_all_vacancy_work_format(limit=5000):
-    with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("SELECT * FROM vacancy_work_format LIMIT %s", (limit,))
         return cur.fetchall()
 
 def get_all_work_format(limit=1000):
-    with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("SELECT * FROM work_format LIMIT %s", (limit,))
         return cur.fetchall()
 
 def get_report_configs():
-    with get_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
         cur.execute("SELECT * FROM report_configs WHERE is_active = TRUE ORDER BY id")
         return cur.fetchall()
 
 # Получение конкретного значения для создания графика
 
 def get_report_config(report_id: int):
-    with get_connection() as conn, conn.cursor() as cur:
+    with connection() as conn, conn.cursor() as cur:
         cur.execute("SELECT * FROM report_configs WHERE id = %s", (report_id,))
         return cur.fetchone()
 
 # Добавление данных в БД
 
 def create_report_config(data: dict):
-    with get_connection() as conn, conn.cursor() as cur:
+    with connection() as conn, conn.cursor() as cur:
         cur.execute(
             """
             INSERT INTO report_configs
@@ -150,5 +151,24 @@ def deactivate_report_config(conn, config_id: int) -> None:
     conn.commit()
 
 
-def run_sql(conn, sql: str, params=None) -> pd.DataFrame:
-    return pd.read_sql(sql, conn, params=params)
\ No newline at end of file
+def get_data_version(conn):
+    """Отметка последней записи данных ingest'ом (ingest_state.data_version), None если записей не было."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT value FROM ingest_state WHERE key = 'data_version'")
+        row = cur.fetchone()
+        return row[0] if row else None
+
+
+def bump_data_version(cur) -> None:
+    # версия данных для кэша отчётов (services.reports): меняется с каждым записанным батчем
+    cur.execute(
+        "INSERT INTO ingest_state (key, value) VALUES ('data_version', clock_timestamp()) "
+        "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value"
+    )
+
+
+def run_sql(conn, sql: str, params=None, timeout_ms: int | None = REPORT_STATEMENT_TIMEOUT_MS,
+            max_cost: float | None = REPORT_MAX_COST, on_wait=None) -> pd.DataFrame:
+    """Произвольный запрос с теми же ограничениями, что и отчёты (db.query_guard)."""
+    check_cost(conn, sql, params, max_cost)
+    return guarded_read(conn, sql, params, timeout_ms, on_wait)
\ No newline at end of file
@@ -0,0 +1,100 @@
+# Дневные агрегаты вакансий для отчётов: rollup_vacancy_daily (профессия × опыт),
+# rollup_skill_daily и rollup_work_format_daily (то же + навык / формат работы).
+# Пересчитываются целиком по «грязным» дням: write_batch помечает дни вакансий батча
+# (до и после записи — вакансия могла сменить дату), filling_db в конце прогона
+# вызывает refresh_rollups. День считается date_trunc('day', ...) в часовом поясе сессии,
+# поэтому ingest и отчёты должны работать с одним TimeZone (по умолчанию — серверный).
+
+# Вакансии грязных дней; вакансии без created_at попадают в день NULL
+_DIRTY_VACANCIES = """
+    WITH dirty AS (SELECT DISTINCT day FROM rollup_dirty_day),
+    src AS (
+        SELECT v.* FROM vacancy v
+        JOIN dirty d ON v.created_at >= d.day AND v.created_at < d.day + interval '1 day'
+        UNION ALL
+        SELECT v.* FROM vacancy v
+        WHERE v.created_at IS NULL AND EXISTS (SELECT 1 FROM dirty WHERE day IS NULL)
+    )
+"""
+
+_SALARY_COLUMNS = "salary_sum, salary_cnt, salary_min, salary_max"
+_SALARY_AGG = "SUM(v.salary_avg), COUNT(v.salary_avg), MIN(v.salary_avg), MAX(v.salary_avg)"
+
+_REFRESH = {
+    "rollup_vacancy_daily": f"""
+        {_DIRTY_VACANCIES}
+        INSERT INTO rollup_vacancy_daily
+            (day, profession_id, experience_id, vacancies, {_SALARY_COLUMNS})
+        SELECT date_trunc('day', v.created_at), v.profession_id, v.experience_id,
+               COUNT(*), {_SALARY_AGG}
+        FROM src v
+        GROUP BY 1, 2, 3
+    """,
+    "rollup_skill_daily": f"""
+        {_DIRTY_VACANCIES}
+        INSERT INTO rollup_skill_daily
+            (day, skill_id, profession_id, experience_id, vacancies, {_SALARY_COLUMNS})
+        SELECT date_trunc('day', v.created_at), vs.skill_id, v.profession_id, v.experience_id,
+               COUNT(*), {_SALARY_AGG}
+        FROM src v
+        LEFT JOIN vacancy_skill vs ON vs.vacancy_id = v.vacancy_id
+        GROUP BY 1, 2, 3, 4
+    """,
+    "rollup_work_format_daily": f"""
+        {_DIRTY_VACANCIES}
+        INSERT INTO rollup_work_format_daily
+            (day, work_format_id, profession_id, experience_id, vacancies, {_SALARY_COLUMNS})
+        SELECT date_trunc('day', v.created_at), vwf.work_format_id, v.profession_id, v.experience_id,
+               COUNT(*), {_SALARY_AGG}
+        FROM src v
+        LEFT JOIN vacancy_work_format vwf ON vwf.vacancy_id = v.vacancy_id
+        GROUP BY 1, 2, 3, 4
+    """,
+}
+
+
+def mark_dirty_days(cur, vacancy_ids: list) -> None:
+    """Помечает дни вакансий для пересчёта; вызывается до и после записи батча."""
+    if not vacancy_ids:
+        return
+    cur.execute(
+        "INSERT INTO rollup_dirty_day (day) "
+        "SELECT DISTINCT date_trunc('day', created_at) FROM vacancy WHERE vacancy_id = ANY(%s)",
+        (vacancy_ids,)
+    )
+
+
+def rollups_initialized(cur) -> bool:
+    cur.execute("SELECT 1 FROM ingest_state WHERE key = 'rollups_refreshed_at'")
+    return cur.fetchone() is not None
+
+
+def refresh_rollups(cur, full: bool = False) -> int:
+    """
+    Пересчитывает агрегаты за грязные дни (full=True — за все дни). Первый пересчёт
+    на базе (в ingest_state ещё нет rollups_refreshed_at) — всегда полный: таблицы,
+    созданные на уже заполненной базе, иначе остались бы пустыми.
+    Возвращает число пересчитанных дней.
+    """
+    # параллельная запись батча не должна пометить день, пока он пересчитывается
+    cur.execute("LOCK TABLE rollup_dirty_day IN SHARE ROW EXCLUSIVE MODE")
+    full = full or not rollups_initialized(cur)
+    if full:
+        cur.execute("DELETE FROM rollup_dirty_day")
+        cur.execute("INSERT INTO rollup_dirty_day (day) SELECT DISTINCT date_trunc('day', created_at) FROM vacancy")
+    cur.execute(
+        "INSERT INTO ingest_state (key, value) VALUES ('rollups_refreshed_at', now()) "
+        "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value"
+    )
+    cur.execute("SELECT COUNT(*) FROM (SELECT DISTINCT day FROM rollup_dirty_day) d")
+    days = cur.fetchone()[0]
+    if not days:
+        return 0
+    for table, insert_sql in _REFRESH.items():
+        cur.execute(
+            f"DELETE FROM {table} r USING (SELECT DISTINCT day FROM rollup_dirty_day) d "
+            "WHERE r.day IS NOT DISTINCT FROM d.day"
+        )
+        cur.execute(insert_sql)
+    cur.execute("DELETE FROM rollup_dirty_day")
+    return days
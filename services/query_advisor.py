@@ -0,0 +1,127 @@
+"""
+Проверка планов отчётов: EXPLAIN для SQL каждого активного report_configs
+и предупреждения о полных сканированиях больших таблиц и больших сортировках.
+
+    python -m services.query_advisor
+    python -m services.query_advisor --analyze --json
+
+--analyze выполняет запросы (EXPLAIN ANALYZE) и показывает реальные строки,
+время и сортировки, ушедшие на диск.
+"""
+import argparse
+import json
+import os
+
+from psycopg2.extras import RealDictCursor
+
+from db import connection
+from db.query_guard import explain
+from services.reports import build_sql_from_config
+
+# Пороги по оценке (или факту при --analyze) числа строк узла плана
+ADVISOR_SEQ_SCAN_ROWS = int(os.getenv("ADVISOR_SEQ_SCAN_ROWS", 10000))
+ADVISOR_SORT_ROWS = int(os.getenv("ADVISOR_SORT_ROWS", 10000))
+
+
+def _walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk(child)
+
+
+def _rows(node: dict) -> float:
+    # при ANALYZE — фактические строки за все циклы, иначе оценка планировщика
+    if "Actual Rows" in node:
+        return node["Actual Rows"] * node.get("Actual Loops", 1)
+    return node.get("Plan Rows", 0)
+
+
+def advise(plan: dict, seq_scan_rows: int = ADVISOR_SEQ_SCAN_ROWS,
+           sort_rows: int = ADVISOR_SORT_ROWS) -> list[dict]:
+    """Находки по узлам плана: [{"node", "relation", "rows", "message"}]."""
+    findings = []
+    for node in _walk(plan.get("Plan", plan)):
+        node_type = node.get("Node Type")
+        rows = _rows(node)
+        if node_type == "Seq Scan":
+            # полный просмотр оценивается по строкам таблицы до фильтра
+            scanned = rows + node.get("Rows Removed by Filter", 0) * node.get("Actual Loops", 1)
+            if scanned >= seq_scan_rows:
+                findings.append({
+                    "node": node_type,
+                    "relation": node.get("Relation Name"),
+                    "rows": int(scanned),
+                    "message": f"полное сканирование {node.get('Relation Name')}"
+                               + (f" с фильтром {node['Filter']}" if node.get("Filter") else ""),
+                })
+        elif node_type in ("Sort", "Incremental Sort"):
+            # top-N сортировка под LIMIT отдаёт мало строк, но читает весь вход
+            sorted_rows = _rows(node["Plans"][0]) if node.get("Plans") else rows
+            on_disk = node.get("Sort Space Type") == "Disk"
+            if sorted_rows >= sort_rows or on_disk:
+                findings.append({
+                    "node": node_type,
+                    "relation": None,
+                    "rows": int(sorted_rows),
+                    "message": f"сортировка по {', '.join(node.get('Sort Key', []))}"
+                               + (f" на диске ({node.get('Sort Space Used')} kB)" if on_disk else ""),
+                })
+    return findings
+
+
+def check_reports(conn, analyze: bool = False) -> list[dict]:
+    """План и находки для каждого активного отчёта."""
+    with conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("SELECT * FROM report_configs WHERE is_active = TRUE ORDER BY id")
+        configs = cur.fetchall()
+    results = []
+    for cfg in configs:
+        result = {"id": cfg["id"], "name": cfg["name"]}
+        try:
+            sql, params = build_sql_from_config(cfg)
+            plan = explain(conn, sql, params, analyze)
+        except Exception as e:
+            conn.rollback()
+            result["error"] = str(e)
+            results.append(result)
+            continue
+        result["total_cost"] = plan["Plan"]["Total Cost"]
+        if analyze:
+            result["execution_ms"] = plan.get("Execution Time")
+        result["findings"] = advise(plan)
+        results.append(result)
+    return results
+
+
+def print_report(results: list[dict]) -> None:
+    for result in results:
+        print(f"[{result['id']}] {result['name']}")
+        if "error" in result:
+            print(f"    ошибка: {result['error']}")
+            continue
+        line = f"    стоимость {result['total_cost']:.0f}"
+        if result.get("execution_ms") is not None:
+            line += f", {result['execution_ms']:.1f} мс"
+        print(line)
+        for finding in result["findings"]:
+            print(f"    ! {finding['message']} (~{finding['rows']} строк)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--analyze", action="store_true", help="выполнить запросы (EXPLAIN ANALYZE)")
+    parser.add_argument("--json", action="store_true", help="вывести результат в JSON")
+    args = parser.parse_args()
+
+    with connection() as conn:
+        results = check_reports(conn, args.analyze)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2, default=str))
+    else:
+        print_report(results)
+    if any(result.get("findings") or result.get("error") for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,18 @@
 from __future__ import annotations
 import json
+import os
+import re
+import threading
+from collections import OrderedDict
 import pandas as pd
+from db.query_guard import (
+    REPORT_MAX_COST,
+    REPORT_STATEMENT_TIMEOUT_MS,
+    QueryRefused,
+    check_cost,
+    guarded_read,
+)
+from db.repositories import get_data_version
 
 # Разрешённые значения
 ALLOWED_BASE_TABLES = {
@@ -29,6 +41,26 @@ JOINS = {
     """,
 }
 
+# --- m2m как массив на вакансию (табличный режим с y_agg_func='array_agg') ---
+ARRAY_JOINS = {
+    "skill": """
+        LEFT JOIN LATERAL (
+            SELECT array_agg(s.name ORDER BY s.name) AS skill
+            FROM vacancy_skill vs
+            JOIN skill s ON s.skill_id = vs.skill_id
+            WHERE vs.vacancy_id = v.vacancy_id
+        ) skill_arr ON TRUE
+    """,
+    "work_format": """
+        LEFT JOIN LATERAL (
+            SELECT array_agg(wf.name ORDER BY wf.name) AS work_format
+            FROM vacancy_work_format vwf
+            JOIN work_format wf ON wf.work_format_id = vwf.work_format_id
+            WHERE vwf.vacancy_id = v.vacancy_id
+        ) work_format_arr ON TRUE
+    """,
+}
+
 # --- Поля (логические имена) -> SQL выражение + требуемые JOIN keys ---
 # Совет: в report_configs хранить именно эти ключи (profession, skill, work_format...)
 FIELD_MAP = {
@@ -48,20 +80,68 @@ FIELD_MAP = {
     "work_format":  {"expr": "wf.name", "joins": ["work_format"]},
 }
 
-def _field_expr(field_key: str) -> tuple[str, set[str]]:
-    if field_key not in FIELD_MAP:
+# --- Дневные агрегаты (db.rollups): r — строка rollup_*_daily, day = date_trunc('day', created_at) ---
+# Графики по vacancy, которые из них считаются точно, строятся по агрегатам, а не по сырым строкам.
+# На базе, созданной до агрегатов, их заполняет python -m db.migrate (или первый запуск filling_db).
+REPORT_USE_ROLLUPS = os.getenv("REPORT_USE_ROLLUPS", "1") == "1"
+
+ROLLUP_TABLES = {
+    None: "rollup_vacancy_daily",
+    "skill": "rollup_skill_daily",
+    "work_format": "rollup_work_format_daily",
+}
+
+ROLLUP_JOINS = {
+    "profession": "LEFT JOIN profession p ON p.profession_id = r.profession_id",
+    "experience": "LEFT JOIN experience e ON e.experience_id = r.experience_id",
+    "skill": "LEFT JOIN skill s ON s.skill_id = r.skill_id",
+    "work_format": "LEFT JOIN work_format wf ON wf.work_format_id = r.work_format_id",
+}
+
+ROLLUP_FIELD_MAP = {
+    "created_at":   {"expr": "r.day", "joins": []},
+    "profession_id":{"expr": "r.profession_id", "joins": []},
+    "experience_id":{"expr": "r.experience_id", "joins": []},
+    "profession":   {"expr": "p.name", "joins": ["profession"]},
+    "experience":   {"expr": "e.name", "joins": ["experience"]},
+    "skill":        {"expr": "s.name", "joins": ["skill"]},
+    "work_format":  {"expr": "wf.name", "joins": ["work_format"]},
+}
+
+# В агрегатах одна вакансия — одна строка на (навык | формат), поэтому COUNT(DISTINCT vacancy_id)
+# по x = этому m2m-полю равен сумме vacancies
+ROLLUP_AGG = {
+    "count": "SUM(r.vacancies)",
+    "count_distinct": "SUM(r.vacancies)",
+    "sum": "SUM(r.salary_sum)",
+    "avg": "SUM(r.salary_sum) / NULLIF(SUM(r.salary_cnt), 0)",
+    "min": "MIN(r.salary_min)",
+    "max": "MAX(r.salary_max)",
+}
+
+# Табличные отчёты по vacancy читаются страницами по столько вакансий
+REPORT_PAGE_SIZE = int(os.getenv("REPORT_PAGE_SIZE", 1000))
+# Меньше этого страница не ужимается, даже если запрос дороже REPORT_MAX_COST
+REPORT_MIN_PAGE_SIZE = int(os.getenv("REPORT_MIN_PAGE_SIZE", 100))
+
+# Фильтр по created_at переносится на day только по границе суток
+_DATE_ONLY_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+ROLLUP_DATE_OPS = {">=", "<"}
+
+def _field_expr(field_key: str, field_map: dict = FIELD_MAP) -> tuple[str, set[str]]:
+    if field_key not in field_map:
         raise ValueError(f"Поле '{field_key}' не разрешено (нет в FIELD_MAP).")
-    meta = FIELD_MAP[field_key]
+    meta = field_map[field_key]
     return meta["expr"], set(meta["joins"])
 
-def _render_joins(required: set[str]) -> str:
+def _render_joins(required: set[str], joins: dict = JOINS) -> str:
     if not required:
         return ""
     parts = []
     for key in sorted(required):
-        if key not in JOINS:
+        if key not in joins:
             raise ValueError(f"Неизвестный join key: {key}")
-        parts.append(JOINS[key].strip())
+        parts.append(joins[key].strip())
     return "\n".join(parts)
 
 def _apply_group_period(x_expr: str, period: str | None) -> str:
@@ -95,7 +175,7 @@ def _agg_expr(agg: str | None, y_expr: str, required_joins: set[str]) -> str:
 
     return f"{agg.upper()}({y_expr})"
 
-def _build_where(filters) -> tuple[str, list, set[str]]:
+def _build_where(filters, field_map: dict = FIELD_MAP) -> tuple[str, list, set[str]]:
     if not filters:
         return "", [], set()
 
@@ -111,7 +191,7 @@ def _build_where(filters) -> tuple[str, list, set[str]]:
         if op not in ALLOWED_OPS:
             raise ValueError(f"Оператор '{op}' запрещён.")
 
-        expr, joins = _field_expr(field)
+        expr, joins = _field_expr(field, field_map)
         required_joins |= joins
 
         if op == "in":
@@ -133,10 +213,131 @@ def _build_where(filters) -> tuple[str, list, set[str]]:
 
     return "WHERE " + " AND ".join(clauses), params, required_joins
 
-def build_sql_from_config(cfg: dict) -> tuple[str, list]:
+def _rollup_sql(chart_type: str, x_field: str, y_agg: str, y_field: str | None,
+                filters: list, group_by_period: str | None) -> tuple[str, list] | None:
+    """
+    SQL графика по дневным агрегатам или None, если конфиг из них точно не считается:
+    created_at — только с group_by_period, y — только по salary_avg,
+    не больше одного m2m-поля (и тогда оно же x), created_at в фильтрах — только >= / < по дате.
+    """
+    agg = (y_agg or "").lower().strip()
+    if agg not in ROLLUP_AGG:
+        return None
+    if agg in ("sum", "avg", "min", "max") and y_field != "salary_avg":
+        return None
+    if x_field not in ROLLUP_FIELD_MAP or (x_field == "created_at") != bool(group_by_period):
+        return None
+
+    fields = [x_field] + [f.get("field") for f in filters]
+    if agg in ("count", "count_distinct") and y_field:
+        fields.append(y_field)
+    for f in filters:
+        if f.get("field") == "created_at" and not (
+            (f.get("op") or "").strip() in ROLLUP_DATE_OPS
+            and isinstance(f.get("value"), str) and _DATE_ONLY_RE.match(f["value"])
+        ):
+            return None
+    if any(field not in ROLLUP_FIELD_MAP and field not in ("vacancy_id", "salary_avg") for field in fields):
+        return None
+    if any(f.get("field") in ("vacancy_id", "salary_avg") for f in filters):
+        return None
+    m2m = {field for field in fields if field in ("skill", "work_format")}
+    if len(m2m) > 1 or (m2m and x_field not in m2m):
+        return None
+    table = ROLLUP_TABLES[m2m.pop() if m2m else None]
+
+    where_sql, params, required_joins = _build_where(filters, ROLLUP_FIELD_MAP)
+    x_expr_raw, x_joins = _field_expr(x_field, ROLLUP_FIELD_MAP)
+    required_joins |= x_joins
+    x_expr = _apply_group_period(x_expr_raw, group_by_period)
+    join_sql = _render_joins(required_joins, ROLLUP_JOINS)
+
+    if chart_type == "pie":
+        where_sql += (" AND " if where_sql else "WHERE ") + f"{x_expr_raw} IS NOT NULL"
+    limit_sql = "LIMIT 10" if chart_type == "pie" and x_field == "skill" else ""
+
+    sql = f"""
+        SELECT
+            {x_expr} AS x,
+            {ROLLUP_AGG[agg]} AS y
+        FROM {table} r
+        {join_sql}
+        {where_sql}
+        GROUP BY {x_expr}
+        ORDER BY y DESC
+        {limit_sql}
+    """.strip()
+    return sql, params
+
+def _table_page_sql(select_exprs: list, join_sql: str, outer_where_sql: str, outer_params: list,
+                    where_sql: str, where_params: list, where_joins: set[str],
+                    cursor: tuple | None, page_size: int) -> tuple[str, list]:
+    """
+    Страница табличного отчёта: page_size вакансий после cursor = (created_at, vacancy_id)
+    последней вакансии предыдущей страницы, порядок created_at DESC NULLS LAST, vacancy_id DESC.
+    Строки страницы выбираются из vacancy по where_sql (keyset по индексу (created_at, vacancy_id))
+    и только потом к ним присоединяются join_sql и применяется outer_where_sql, поэтому строки
+    одной вакансии не разрываются между страницами.
+    Вакансии без даты идут отдельной веткой после датированных.
+    """
+    conditions = [where_sql[len("WHERE "):]] if where_sql else []
+    # m2m в фильтре размножает строки — вакансии страницы берём через DISTINCT
+    distinct = "DISTINCT " if _needs_distinct_vacancy(where_joins) else ""
+    page_joins = _render_joins(where_joins)
+
+    branches = []
+    branch_params = []
+    created_at, vacancy_id = cursor if cursor else (None, None)
+    if cursor is None or created_at is not None:
+        keyset = ["v.created_at IS NOT NULL"]
+        if cursor is not None:
+            keyset.append("(v.created_at, v.vacancy_id) < (%s, %s)")
+        branches.append((keyset, "v.created_at DESC, v.vacancy_id DESC",
+                         [created_at, vacancy_id] if cursor is not None else []))
+    keyset = ["v.created_at IS NULL"]
+    if cursor is not None and created_at is None:
+        keyset.append("v.vacancy_id < %s")
+    branches.append((keyset, "v.vacancy_id DESC",
+                     [vacancy_id] if cursor is not None and created_at is None else []))
+
+    parts = []
+    for keyset, order, keyset_params in branches:
+        parts.append(f"""
+            (SELECT {distinct}v.*
+            FROM vacancy v
+            {page_joins}
+            WHERE {" AND ".join(conditions + keyset)}
+            ORDER BY {order}
+            LIMIT %s)
+        """.strip())
+        branch_params += where_params + keyset_params + [page_size]
+
+    sql = f"""
+        WITH page AS (
+            SELECT * FROM (
+                {" UNION ALL ".join(parts)}
+            ) b
+            ORDER BY created_at DESC NULLS LAST, vacancy_id DESC
+            LIMIT %s
+        )
+        SELECT {", ".join(select_exprs)},
+            v.created_at AS page_created_at,
+            v.vacancy_id AS page_vacancy_id
+        FROM page v
+        {join_sql}
+        {outer_where_sql}
+        ORDER BY v.created_at DESC NULLS LAST, v.vacancy_id DESC
+    """.strip()
+    return sql, branch_params + [page_size] + outer_params
+
+def build_sql_from_config(cfg: dict, use_rollups: bool = REPORT_USE_ROLLUPS,
+                          cursor: tuple | None = None,
+                          page_size: int = REPORT_PAGE_SIZE) -> tuple[str, list]:
     """
     cfg — строка из report_configs (dict):
     name, chart_type, base_table, x_field, y_agg_func, y_field, filters_json, group_by_period
+    use_rollups — графики, которые точно считаются по дневным агрегатам, строить по ним.
+    cursor, page_size — страница табличного отчёта по vacancy (см. fetch_report_page).
     """
     chart_type = (cfg.get("chart_type") or "").lower().strip()
     base_table = (cfg.get("base_table") or "").lower().strip()
@@ -196,29 +397,35 @@ def build_sql_from_config(cfg: dict) -> tuple[str, list]:
         if not keys:
             raise ValueError("Для chart_type='table' нужно x_field со списком полей через запятую.")
 
+        # y_agg_func='array_agg': одна строка на вакансию, навыки/форматы — массивами.
+        # Фильтры отбирают вакансии, в массивах — все навыки/форматы вакансии.
+        aggregate = y_agg.lower() == "array_agg"
+        if aggregate:
+            required_joins = set()
+
         select_exprs = []
+        array_joins = []
         for k in keys:
+            if aggregate and k in ARRAY_JOINS:
+                select_exprs.append(f"{k}_arr.{k} AS {k}")
+                array_joins.append(ARRAY_JOINS[k].strip())
+                continue
             expr, joins = _field_expr(k)
             required_joins |= joins
             select_exprs.append(f"{expr} AS {k}")
 
-        join_sql = _render_joins(required_joins)
-
-        # Если выбран skill/work_format, строки будут размножаться (по навыкам/форматам).
-        # Это ОК для “полной информации”, но если не хочешь — можно потом сделать агрегирование array_agg.
-        sql = f"""
-            SELECT {", ".join(select_exprs)}
-            FROM vacancy v
-            {join_sql}
-            {where_sql}
-            ORDER BY v.created_at DESC
-            LIMIT 1000
-        """.strip()
-        return sql, params
+        join_sql = "\n".join(filter(None, [_render_joins(required_joins)] + array_joins))
+        outer_where_sql, outer_params = ("", []) if aggregate else (where_sql, params)
+        return _table_page_sql(select_exprs, join_sql, outer_where_sql, outer_params,
+                               where_sql, params, where_joins, cursor, page_size)
 
     # 2.2) GRAPH режим: x + агрегированный y
     if not x_field:
         raise ValueError("Для графика нужен x_field.")
+    if use_rollups:
+        rollup = _rollup_sql(chart_type, x_field, y_agg, y_field, filters, group_by_period)
+        if rollup is not None:
+            return rollup
     x_expr, x_joins = _field_expr(x_field)
     required_joins |= x_joins
     x_expr = _apply_group_period(x_expr, group_by_period)
@@ -260,7 +467,144 @@ def build_sql_from_config(cfg: dict) -> tuple[str, list]:
 
     return sql, params
 
-def fetch_report_df(conn, cfg_row: dict) -> pd.DataFrame:
+# --- Кэш результатов отчётов ---
+# Ключ — (sql, params) из build_sql_from_config + версия данных ingest_state.data_version,
+# которую filling_db меняет при каждой записи. Новые данные → новая версия → старые записи удаляются.
+# Версия только растёт: запрос, прочитавший версию раньше параллельного, не откатывает кэш назад.
+REPORT_CACHE_MAX_MB = int(os.getenv("REPORT_CACHE_MAX_MB", 256))
+
+
+class ReportCache:
+    """
+    LRU по памяти DataFrame'ов; потокобезопасен (Streamlit выполняет скрипты в потоках).
+    Хранит и отдаёт копии: вызывающий код может менять полученный DataFrame.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: OrderedDict = OrderedDict()
+        self._sizes: dict = {}
+        self._total = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, version) -> pd.DataFrame | None:
+        with self._lock:
+            if self._is_stale(version):
+                return None
+            self._invalidate(version)
+            df = self._items.get(key)
+            if df is None:
+                return None
+            self._items.move_to_end(key)
+        return df.copy()
+
+    def put(self, key: tuple, version, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            return
+        df = df.copy()
+        with self._lock:
+            # результат, прочитанный по устаревшей версии, не кэшируем
+            if self._is_stale(version):
+                return
+            self._invalidate(version)
+            if key in self._items:
+                self._total -= self._sizes.pop(key)
+                del self._items[key]
+            self._items[key] = df
+            self._sizes[key] = size
+            self._total += size
+            while self._total > self.max_bytes:
+                old_key, _ = self._items.popitem(last=False)
+                self._total -= self._sizes.pop(old_key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self._total = 0
+
+    def _is_stale(self, version) -> bool:
+        # версия — отметка времени ingest_state.data_version, None — данных ещё не было
+        return self._version is not None and (version is None or version < self._version)
+
+    def _invalidate(self, version) -> None:
+        if version != self._version:
+            self._items.clear()
+            self._sizes.clear()
+            self._total = 0
+            self._version = version
+
+
+report_cache = ReportCache(REPORT_CACHE_MAX_MB * 1024 * 1024)
+
+
+def _read_report(conn, sql: str, params: list, use_cache: bool, timeout_ms: int | None,
+                 max_cost: float | None, on_wait) -> pd.DataFrame:
+    def read() -> pd.DataFrame:
+        check_cost(conn, sql, params, max_cost)
+        return guarded_read(conn, sql, params, timeout_ms, on_wait)
+
+    if not use_cache:
+        return read()
+
+    version = get_data_version(conn)
+    key = (sql, tuple(params))
+    df = report_cache.get(key, version)
+    if df is None:
+        df = read()
+        report_cache.put(key, version, df)
+    return df
+
+
+def fetch_report_df(conn, cfg_row: dict, use_cache: bool = True,
+                    timeout_ms: int | None = REPORT_STATEMENT_TIMEOUT_MS,
+                    max_cost: float | None = REPORT_MAX_COST, on_wait=None) -> pd.DataFrame:
+    """
+    Результат отчёта по конфигу (для табличного отчёта по vacancy — первая страница).
+    При use_cache=True повторный запрос того же SQL отдаётся из памяти,
+    пока ingest не записал новые данные.
+    Запрос с оценкой стоимости выше max_cost не выполняется (QueryRefused),
+    дольше timeout_ms — прерывается (QueryTimeout); on_wait — см. db.query_guard.guarded_read.
+    Графики при превышении max_cost не упрощаются: в отличие от страниц таблицы
+    (fetch_report_page уменьшает страницу), такой отчёт отклоняется целиком.
+    """
+    if is_paged_report(cfg_row):
+        return fetch_report_page(conn, cfg_row, use_cache=use_cache, timeout_ms=timeout_ms,
+                                 max_cost=max_cost, on_wait=on_wait)[0]
     sql, params = build_sql_from_config(cfg_row)
-    return pd.read_sql(sql, conn, params=params)
+    return _read_report(conn, sql, params, use_cache, timeout_ms, max_cost, on_wait)
+
 
+def is_paged_report(cfg_row: dict) -> bool:
+    return ((cfg_row.get("chart_type") or "").lower().strip() == "table"
+            and (cfg_row.get("base_table") or "").lower().strip() == "vacancy")
+
+
+def fetch_report_page(conn, cfg_row: dict, cursor: tuple | None = None,
+                      page_size: int = REPORT_PAGE_SIZE, use_cache: bool = True,
+                      timeout_ms: int | None = REPORT_STATEMENT_TIMEOUT_MS,
+                      max_cost: float | None = REPORT_MAX_COST, on_wait=None) -> tuple[pd.DataFrame, tuple | None]:
+    """
+    Страница табличного отчёта по vacancy: (DataFrame, cursor следующей страницы).
+    cursor=None — первая страница; следующий cursor None, если страниц больше нет.
+    Если страница дороже max_cost, размер страницы уменьшается вдвое,
+    но не ниже REPORT_MIN_PAGE_SIZE.
+    """
+    while True:
+        sql, params = build_sql_from_config(cfg_row, cursor=cursor, page_size=page_size)
+        try:
+            df = _read_report(conn, sql, params, use_cache, timeout_ms, max_cost, on_wait)
+            break
+        except QueryRefused:
+            if page_size <= REPORT_MIN_PAGE_SIZE:
+                raise
+            page_size = max(page_size // 2, REPORT_MIN_PAGE_SIZE)
+    next_cursor = None
+    if df["page_vacancy_id"].nunique() >= page_size:
+        last = df.iloc[-1]
+        created_at = last["page_created_at"]
+        next_cursor = (None if pd.isna(created_at) else pd.Timestamp(created_at).to_pydatetime(),
+                       int(last["page_vacancy_id"]))
+    return df.drop(columns=["page_created_at", "page_vacancy_id"]), next_cursor
@@ -0,0 +1,19 @@
+-- Индексы под отчёты для уже созданной базы (в schema.sql они есть с самого начала).
+-- CONCURRENTLY не блокирует запись ingest'а; выполнять вне транзакции:
+--   psql -d $DB_NAME -f sql/indexes.sql
+
+-- created_at растёт почти монотонно с порядком вставки, BRIN хватает для диапазонов дат
+-- и занимает килобайты вместо мегабайт у btree
+CREATE INDEX CONCURRENTLY IF NOT EXISTS vacancy_created_at_brin ON vacancy USING brin (created_at);
+-- постраничный вывод табличных отчётов: keyset по (created_at, vacancy_id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS vacancy_created_at_vacancy_id ON vacancy (created_at, vacancy_id);
+-- фильтры и JOIN по справочникам
+CREATE INDEX CONCURRENTLY IF NOT EXISTS vacancy_profession_id ON vacancy (profession_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS vacancy_experience_id ON vacancy (experience_id);
+-- обратные индексы m2m: первичные ключи (vacancy_id, ...) не помогают искать вакансии по навыку/формату
+CREATE INDEX CONCURRENTLY IF NOT EXISTS vacancy_skill_skill_id ON vacancy_skill (skill_id, vacancy_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS vacancy_work_format_work_format_id ON vacancy_work_format (work_format_id, vacancy_id);
+
+ANALYZE vacancy;
+ANALYZE vacancy_skill;
+ANALYZE vacancy_work_format;
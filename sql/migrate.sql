@@ -0,0 +1,80 @@
+-- Таблицы, добавленные в schema.sql после первого релиза, для уже созданной базы.
+-- Идемпотентно: можно выполнять повторно, filling_db применяет файл при каждом запуске.
+--   psql -d $DB_NAME -f sql/migrate.sql
+
+CREATE TABLE IF NOT EXISTS ingest_state (
+    key             TEXT PRIMARY KEY,       -- 'high_water_mark' и т.п.
+    value           TIMESTAMPTZ
+);
+CREATE TABLE IF NOT EXISTS vacancy_listing (
+    vacancy_id      BIGINT PRIMARY KEY,     -- id из HH, в т.ч. не прошедшие классификацию
+    listing_hash    TEXT NOT NULL,          -- хэш данных вакансии из выдачи поиска
+    seen_at         TIMESTAMPTZ DEFAULT now()
+);
+-- Состояние прогонов filling_db (db.checkpoints)
+CREATE TABLE IF NOT EXISTS crawl_run (
+    run_id          SERIAL PRIMARY KEY,
+    started_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+    date_from       TIMESTAMPTZ,            -- граница инкрементального поиска
+    finished_at     TIMESTAMPTZ             -- NULL, пока прогон не завершён
+);
+CREATE TABLE IF NOT EXISTS crawl_page (
+    run_id          INT REFERENCES crawl_run(run_id) ON DELETE CASCADE,
+    page_key        TEXT,                   -- параметры шарда + номер страницы (JSON)
+    items           INT NOT NULL,           -- вакансий на странице
+    PRIMARY KEY (run_id, page_key)
+);
+CREATE TABLE IF NOT EXISTS crawl_vacancy (
+    run_id          INT REFERENCES crawl_run(run_id) ON DELETE CASCADE,
+    vacancy_id      BIGINT,
+    listing         JSONB NOT NULL,         -- вакансия из выдачи поиска
+    state           TEXT NOT NULL DEFAULT 'queued', -- 'queued' / 'processed'
+    PRIMARY KEY (run_id, vacancy_id)
+);
+CREATE TABLE IF NOT EXISTS crawl_batch (
+    run_id          INT REFERENCES crawl_run(run_id) ON DELETE CASCADE,
+    batch_no        INT,
+    vacancies       INT NOT NULL,           -- обработано вакансий (скачано и классифицировано)
+    written         INT NOT NULL,           -- из них записано в vacancy
+    written_at      TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (run_id, batch_no)
+);
+-- Дневные агрегаты (db.rollups); пустые таблицы заполняет db.migrate при первом запуске
+CREATE TABLE IF NOT EXISTS rollup_vacancy_daily (
+    day             TIMESTAMPTZ,
+    profession_id   INT,
+    experience_id   INT,
+    vacancies       BIGINT NOT NULL,
+    salary_sum      NUMERIC,
+    salary_cnt      BIGINT NOT NULL,
+    salary_min      NUMERIC,
+    salary_max      NUMERIC
+);
+CREATE TABLE IF NOT EXISTS rollup_skill_daily (
+    day             TIMESTAMPTZ,
+    skill_id        INT,                    -- NULL — вакансии без навыков
+    profession_id   INT,
+    experience_id   INT,
+    vacancies       BIGINT NOT NULL,
+    salary_sum      NUMERIC,
+    salary_cnt      BIGINT NOT NULL,
+    salary_min      NUMERIC,
+    salary_max      NUMERIC
+);
+CREATE TABLE IF NOT EXISTS rollup_work_format_daily (
+    day             TIMESTAMPTZ,
+    work_format_id  INT,                    -- NULL — вакансии без формата работы
+    profession_id   INT,
+    experience_id   INT,
+    vacancies       BIGINT NOT NULL,
+    salary_sum      NUMERIC,
+    salary_cnt      BIGINT NOT NULL,
+    salary_min      NUMERIC,
+    salary_max      NUMERIC
+);
+CREATE INDEX IF NOT EXISTS rollup_vacancy_daily_day ON rollup_vacancy_daily (day);
+CREATE INDEX IF NOT EXISTS rollup_skill_daily_day ON rollup_skill_daily (day);
+CREATE INDEX IF NOT EXISTS rollup_work_format_daily_day ON rollup_work_format_daily (day);
+CREATE TABLE IF NOT EXISTS rollup_dirty_day (
+    day             TIMESTAMPTZ
+);
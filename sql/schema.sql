@@ -47,3 +47,87 @@ CREATE TABLE report_configs (
     group_by_period TEXT,                   -- 'day', 'month', 'year' (если нужно)
     is_active       BOOLEAN DEFAULT TRUE
 );
+CREATE TABLE ingest_state (
+    key             TEXT PRIMARY KEY,       -- 'high_water_mark' и т.п.
+    value           TIMESTAMPTZ
+);
+CREATE TABLE vacancy_listing (
+    vacancy_id      BIGINT PRIMARY KEY,     -- id из HH, в т.ч. не прошедшие классификацию
+    listing_hash    TEXT NOT NULL,          -- хэш данных вакансии из выдачи поиска
+    seen_at         TIMESTAMPTZ DEFAULT now()
+);
+CREATE TABLE crawl_run (
+    run_id          SERIAL PRIMARY KEY,
+    started_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+    date_from       TIMESTAMPTZ,            -- граница инкрементального поиска
+    finished_at     TIMESTAMPTZ             -- NULL, пока прогон не завершён
+);
+CREATE TABLE crawl_page (
+    run_id          INT REFERENCES crawl_run(run_id) ON DELETE CASCADE,
+    page_key        TEXT,                   -- параметры шарда + номер страницы (JSON)
+    items           INT NOT NULL,           -- вакансий на странице
+    PRIMARY KEY (run_id, page_key)
+);
+CREATE TABLE crawl_vacancy (
+    run_id          INT REFERENCES crawl_run(run_id) ON DELETE CASCADE,
+    vacancy_id      BIGINT,
+    listing         JSONB NOT NULL,         -- вакансия из выдачи поиска
+    state           TEXT NOT NULL DEFAULT 'queued', -- 'queued' / 'processed'
+    PRIMARY KEY (run_id, vacancy_id)
+);
+CREATE TABLE crawl_batch (
+    run_id          INT REFERENCES crawl_run(run_id) ON DELETE CASCADE,
+    batch_no        INT,
+    vacancies       INT NOT NULL,           -- обработано вакансий (скачано и классифицировано)
+    written         INT NOT NULL,           -- из них записано в vacancy
+    written_at      TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (run_id, batch_no)
+);
+-- Дневные агрегаты для отчётов (services.reports подставляет их вместо vacancy, где это точно).
+-- day = date_trunc('day', created_at); NULL — вакансии без даты.
+CREATE TABLE rollup_vacancy_daily (
+    day             TIMESTAMPTZ,
+    profession_id   INT,
+    experience_id   INT,
+    vacancies       BIGINT NOT NULL,
+    salary_sum      NUMERIC,
+    salary_cnt      BIGINT NOT NULL,
+    salary_min      NUMERIC,
+    salary_max      NUMERIC
+);
+CREATE TABLE rollup_skill_daily (
+    day             TIMESTAMPTZ,
+    skill_id        INT,                    -- NULL — вакансии без навыков
+    profession_id   INT,
+    experience_id   INT,
+    vacancies       BIGINT NOT NULL,
+    salary_sum      NUMERIC,
+    salary_cnt      BIGINT NOT NULL,
+    salary_min      NUMERIC,
+    salary_max      NUMERIC
+);
+CREATE TABLE rollup_work_format_daily (
+    day             TIMESTAMPTZ,
+    work_format_id  INT,                    -- NULL — вакансии без формата работы
+    profession_id   INT,
+    experience_id   INT,
+    vacancies       BIGINT NOT NULL,
+    salary_sum      NUMERIC,
+    salary_cnt      BIGINT NOT NULL,
+    salary_min      NUMERIC,
+    salary_max      NUMERIC
+);
+CREATE INDEX rollup_vacancy_daily_day ON rollup_vacancy_daily (day);
+CREATE INDEX rollup_skill_daily_day ON rollup_skill_daily (day);
+CREATE INDEX rollup_work_format_daily_day ON rollup_work_format_daily (day);
+-- дни, которые надо пересчитать в rollup_* (заполняется при записи батчей)
+CREATE TABLE rollup_dirty_day (
+    day             TIMESTAMPTZ
+);
+-- Индексы под отчёты (services.reports); для уже созданной базы — sql/indexes.sql
+CREATE INDEX vacancy_created_at_brin ON vacancy USING brin (created_at);
+CREATE INDEX vacancy_created_at_vacancy_id ON vacancy (created_at, vacancy_id);
+CREATE INDEX vacancy_profession_id ON vacancy (profession_id);
+CREATE INDEX vacancy_experience_id ON vacancy (experience_id);
+CREATE INDEX vacancy_skill_skill_id ON vacancy_skill (skill_id, vacancy_id);
+CREATE INDEX vacancy_work_format_work_format_id ON vacancy_work_format (work_format_id, vacancy_id);
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import json
+from contextlib import contextmanager
 from typing import Any
 import ast
 
@@ -10,14 +11,14 @@ import streamlit as st
 import matplotlib.pyplot as plt
 from streamlit.runtime.state.query_params import process_query_params
 
-from db import get_connection
+from db import connection
+from db.query_guard import QueryRefused
 from db.repositories import (
     fetch_report_configs,
     insert_report_config,
     deactivate_report_config,
-    run_sql,
 )
-from services.reports import build_sql_from_config
+from services.reports import build_sql_from_config, fetch_report_df, fetch_report_page, is_paged_report
 
 
 # -----------------------------
@@ -74,7 +75,7 @@ def _reload_configs_cache() -> None:
 
 @st.cache_data(ttl=60)
 def _cached_configs(only_active: bool = True) -> pd.DataFrame:
-    with get_connection() as conn:
+    with connection() as conn:
         return fetch_report_configs(conn, only_active=only_active)
 
 def _coerce_filters_value(op: str, value_text: str) -> Any:
@@ -212,6 +213,59 @@ def _render_chart(chart_type: str, df: pd.DataFrame) -> None:
         st.dataframe(df, use_container_width=True)
 
 
+@contextmanager
+def _cancellable(key: str):
+    """
+    Кнопка "Отменить" и время выполнения, пока идёт запрос отчёта.
+    Нажатие кнопки перезапускает скрипт: Streamlit прерывает текущий прогон на очередном
+    вызове st.* из on_wait, и guarded_read отменяет запрос в Postgres.
+    Чтобы перезапуск не выполнил запрос заново, вызывающий код проверяет _cancelled(key).
+    """
+    button = st.empty()
+    status = st.empty()
+    button.button("Отменить", key=f"cancel_{key}")
+
+    def on_wait(elapsed: float) -> None:
+        status.caption(f"Запрос выполняется {elapsed:.0f} с…")
+
+    try:
+        yield on_wait
+    finally:
+        button.empty()
+        status.empty()
+
+def _cancelled(*keys: str) -> bool:
+    """Нажата ли на прошлом прогоне кнопка "Отменить" у одного из запросов keys."""
+    return any(st.session_state.get(f"cancel_{key}") for key in keys)
+
+
+def _render_table_pages(cfg: dict) -> None:
+    """
+    Табличный отчёт по vacancy: первая страница сразу, следующие — по кнопке.
+    Загруженные страницы и cursor следующей хранятся в session_state.
+    """
+    state = st.session_state.get("table_pages")
+    if state is None or state["report_id"] != cfg["id"]:
+        with connection() as conn:
+            with _cancellable("page") as on_wait:
+                df, cursor = fetch_report_page(conn, cfg, on_wait=on_wait)
+        state = {"report_id": cfg["id"], "df": df, "cursor": cursor}
+        st.session_state["table_pages"] = state
+
+    _render_chart("table", state["df"])
+    st.caption(f"Загружено строк: {len(state['df'])}")
+    # отмена догрузки оставляет уже загруженные страницы и не запрашивает следующую заново
+    if _cancelled("next_page"):
+        st.info("Загрузка следующей страницы отменена.")
+    if state["cursor"] is not None and st.button("Загрузить ещё") and not _cancelled("next_page"):
+        with connection() as conn:
+            with _cancellable("next_page") as on_wait:
+                df, cursor = fetch_report_page(conn, cfg, state["cursor"], on_wait=on_wait)
+        state["df"] = pd.concat([state["df"], df], ignore_index=True)
+        state["cursor"] = cursor
+        st.rerun()
+
+
 # -----------------------------
 # Загрузка конфигов и выбор
 # -----------------------------
@@ -257,18 +311,35 @@ if preview_sql_btn:
     except Exception as e:
         st.error(f"Ошибка построения SQL: {e}")
 
+# Показанный отчёт держим в session_state: кнопка "Загрузить ещё" перезапускает скрипт.
+# Отмена тоже перезапускает скрипт — отчёт сбрасываем, иначе запрос пошёл бы снова.
+# Отмену догрузки страниц ("next_page") и предпросмотра ("preview") проверяют места их запросов
+if _cancelled("show", "page"):
+    st.session_state.pop("shown_report", None)
+    st.session_state.pop("table_pages", None)
+    st.info("Запрос отчёта отменён.")
+
 if show_btn:
-    try:
-        sql, params = build_sql_from_config(selected)
-        with get_connection() as conn:
-            df = run_sql(conn, sql, params=params)
+    st.session_state["shown_report"] = selected["id"]
+    st.session_state.pop("table_pages", None)
 
+if st.session_state.get("shown_report") == selected["id"]:
+    try:
         st.subheader(selected["name"])
         if selected.get("description"):
             st.write(selected["description"])
 
-        _render_chart(selected["chart_type"], df)
-
+        if is_paged_report(selected):
+            _render_table_pages(selected)
+        else:
+            with connection() as conn:
+                with _cancellable("show") as on_wait:
+                    df = fetch_report_df(conn, selected, on_wait=on_wait)
+            _render_chart(selected["chart_type"], df)
+
+    except QueryRefused as e:
+        # графики не упрощаются автоматически (в отличие от страниц таблиц) — только сузить выборку
+        st.warning(f"{e} Сузьте фильтры отчёта, например период created_at.")
     except Exception as e:
         st.error(f"Ошибка построения/выполнения отчёта: {e}")
 
@@ -311,7 +382,11 @@ if new_btn:
                     default=["vacancy_id", "profession", "salary_avg", "experience", "created_at"],
                 )
                 x_field = ", ".join(picked)
-                y_agg_func = st.selectbox("y_agg_func (в table не используется, но обязателен)", ["count", "count_distinct"], index=0)
+                y_agg_func = st.selectbox(
+                    "y_agg_func (array_agg — строка на вакансию, навыки/форматы списком)",
+                    ["count", "count_distinct", "array_agg"],
+                    index=0,
+                )
                 y_field = None
                 group_by_period = None
 
@@ -376,14 +451,17 @@ if new_btn:
             "is_active": True,
         }
 
-        if preview_btn:
+        if _cancelled("preview"):
+            st.info("Предпросмотр отменён.")
+        if preview_btn and not _cancelled("preview"):
             try:
                 sql, params = build_sql_from_config(draft_cfg)
                 st.code(sql, language="sql")
                 st.write("params:", params)
 
-                with get_connection() as conn:
-                    df = run_sql(conn, sql, params=params)
+                with connection() as conn:
+                    with _cancellable("preview") as on_wait:
+                        df = fetch_report_df(conn, draft_cfg, on_wait=on_wait)
 
                 st.subheader("Результат предпросмотра")
                 _render_chart(chart_type, df)
@@ -400,7 +478,7 @@ if new_btn:
                 return
 
             try:
-                with get_connection() as conn:
+                with connection() as conn:
                     new_id = insert_report_config(
                         conn=conn,
                         name=name.strip(),
@@ -446,7 +524,7 @@ with st.expander("Управление конфигурациями"):
             }
             pick = st.selectbox("Выберите конфиг для деактивации", list(id_map.keys()))
             if st.button("Сделать is_active=false"):
-                with get_connection() as conn:
+                with connection() as conn:
                     deactivate_report_config(conn, id_map[pick])
                 st.success("Деактивировано.")
                 _reload_configs_cache()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Настройки модулей читаются при импорте: тесты не пишут кэш, архив и метрики на диск
+os.environ.update({"HH_CACHE_PATH": "", "HH_ARCHIVE_DIR": "", "METRICS_PATH": "", "METRICS_PORT": "0"})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,59 @@
+import re
+from datetime import datetime, timezone
+
+import pytest
+
+from benchmarks.classifier import _args, score_profession_reference
+from benchmarks.synthetic import generate_vacancies
+from vacancy_scraper.classifier_of_profession import MATCHER, KeywordMatcher, score_profession, score_vector
+
+# Корпус фиксирован: seed и until заданы явно
+SAMPLE = generate_vacancies(400, seed=7, until=datetime(2026, 1, 1, tzinfo=timezone.utc))
+
+# Описания без разметки и с ключевыми словами на границе тегов (теги заменяются пробелами)
+PLAIN = [
+    {"name": "Senior Python Developer", "description": "Django, FastAPI, PostgreSQL, asyncio",
+     "key_skills": [{"name": "Python"}, {"name": "Django"}]},
+    {"name": "Программист 1С", "description": "Доработка конфигураций 1С:Бухгалтерия, СКД",
+     "key_skills": [{"name": "1С"}]},
+    {"name": "C++ developer", "description": "Разработка на C++ и Qt, STL, многопоточность",
+     "key_skills": [{"name": "C++"}]},
+    {"name": "Frontend разработчик (React)", "description": "React, TypeScript, Redux, Webpack",
+     "key_skills": []},
+    {"name": "Водитель-экспедитор", "description": "Доставка грузов по городу", "key_skills": None},
+    {"name": "", "description": "", "key_skills": None},
+    {"name": "Инженер данных", "description": "<p>Data</p><p>Engineer</p><ul><li>Spark</li><li>Airflow</li></ul>",
+     "key_skills": [{"name": "Kafka"}]},
+    {"name": "Backend developer", "description": "<ul><li>Java 17</li><li>spring</li><li>boot</li></ul>",
+     "key_skills": [{"name": "Java"}]},
+    {"name": "Разработчик", "description": "&lt;b&gt;python&lt;/b&gt; <b>django</b>", "key_skills": None},
+]
+
+
+@pytest.mark.parametrize("vacancy", SAMPLE + PLAIN)
+def test_score_profession_matches_reference(vacancy):
+    assert score_profession(*_args(vacancy)) == score_profession_reference(*_args(vacancy))
+
+
+@pytest.mark.parametrize("pattern, text, expected", [
+    (r"\bpy+thon\b", "pyyython developer", True),
+    (r"\bpy+thon\b", "pthon developer", False),
+    (r"\bgo?lang\b", "glang and go", True),
+    (r"\bk8s\b|\bkubernetes\b", "kubernetes", True),
+    (r"\bjava\b", "javascript", False),
+    (r"\bjava\b", "my java", True),
+    (r"\bsql\b", "nosql", False),
+])
+def test_matcher_agrees_with_plain_regex(pattern, text, expected):
+    matcher = KeywordMatcher({"X": [pattern]})
+    assert bool(re.search(pattern, text)) is expected
+    assert bool(matcher.matches(text)) is expected
+
+
+def test_keyword_across_tag_boundary_matches():
+    engineer = MATCHER.professions.index("Data Engineer")
+    tagged = score_vector("Инженер данных", "<p>Data</p><p>Engineer</p>", None)
+    glued = score_vector("Инженер данных", "dataengineer", None)
+    # теги заменяются пробелами: data\s*engineer даёт +2 за описание, как и для текста без тегов
+    assert tagged[engineer] == glued[engineer] == 2
+    assert score_vector("", "<p>spring</p><p>boot</p>", None) == score_vector("", "spring boot", None)
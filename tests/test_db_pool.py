@@ -0,0 +1,16 @@
+import psycopg2
+import pytest
+
+from db import PooledConnection
+
+
+def test_returned_connection_raises_interface_error():
+    conn = PooledConnection(None)
+    assert conn.closed
+    with pytest.raises(psycopg2.InterfaceError):
+        conn.cursor()
+    with pytest.raises(psycopg2.InterfaceError):
+        with conn:
+            pass
+    with pytest.raises(psycopg2.InterfaceError):
+        conn.__exit__(None, None, None)
@@ -0,0 +1,41 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pyarrow.parquet as pq
+
+from db.export_parquet import DELETED, DELETED_SCHEMA, PARTITIONED, _to_table, read_snapshot
+
+T1 = datetime(2026, 10, 1, tzinfo=timezone.utc)
+T2 = T1 + timedelta(hours=1)
+T3 = T2 + timedelta(hours=1)
+
+
+def _part(out_dir, table: str, export: str, rows: list, month: str | None = "2026-09") -> None:
+    schema = PARTITIONED[table][1] if table in PARTITIONED else DELETED_SCHEMA
+    path = os.path.join(out_dir, table, f"month={month}") if month else os.path.join(out_dir, table)
+    os.makedirs(path, exist_ok=True)
+    pq.write_table(_to_table(rows, schema), os.path.join(path, f"part-{export}.parquet"))
+
+
+def test_snapshot_keeps_latest_versions_and_drops_deleted(tmp_path):
+    out = str(tmp_path)
+    _part(out, "vacancy", "1", [(1, 1, 1, 100.0, T1, T1), (2, 1, 1, None, T1, T1), (3, 2, 1, None, T1, None)])
+    _part(out, "vacancy_skill", "1", [(1, 10, T1), (2, 10, T1), (2, 11, T1), (3, 12, None)])
+    # 1 обновлена, 2 удалена, 3 загружена до vacancy_listing и не менялась
+    _part(out, "vacancy", "2", [(1, 2, 1, 200.0, T1, T2)])
+    _part(out, "vacancy_skill", "2", [(1, 11, T2)])
+    _part(out, DELETED, "2", [(2, T2)], month=None)
+
+    vacancies = read_snapshot(out, "vacancy")
+    assert sorted(zip(vacancies["vacancy_id"], vacancies["profession_id"])) == [(1, 2), (3, 2)]
+    skills = read_snapshot(out, "vacancy_skill")
+    assert sorted(zip(skills["vacancy_id"], skills["skill_id"])) == [(1, 11), (3, 12)]
+
+
+def test_vacancy_restored_after_deletion(tmp_path):
+    out = str(tmp_path)
+    _part(out, "vacancy", "1", [(1, 1, 1, None, T1, T1)])
+    _part(out, DELETED, "2", [(1, T2)], month=None)
+    _part(out, "vacancy", "3", [(1, 3, 1, None, T1, T3)])
+    assert read_snapshot(out, "vacancy")["profession_id"].tolist() == [3]
+    assert read_snapshot(out, "vacancy_work_format").empty
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from benchmarks.stub_api import StubApi, start_stub
+from benchmarks.synthetic import generate_vacancies
+from vacancy_scraper.extractor import fetch_vacancy_details
+
+VACANCIES = generate_vacancies(40, seed=5)
+
+
+@pytest.fixture(scope="module")
+def stub():
+    server, base_url = start_stub(VACANCIES)
+    yield server, base_url
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetches_details_in_request_order(stub):
+    server, base_url = stub
+    ids = [int(vac["id"]) for vac in reversed(VACANCIES)]
+    before = server.api.requests
+    details = asyncio.run(fetch_vacancy_details(ids, {}, concurrency=8, rate=1000, base_url=base_url))
+    assert [vac["id"] for vac in details] == [str(id_vac) for id_vac in ids]
+    assert details[0] == VACANCIES[-1]
+    assert server.api.requests - before == len(ids)
+
+
+def test_missing_vacancy_is_none(stub):
+    _, base_url = stub
+    first = int(VACANCIES[0]["id"])
+    details = asyncio.run(fetch_vacancy_details([first, 1, first + 1], {}, rate=1000, base_url=base_url))
+    assert details[0]["id"] == str(first)
+    assert details[1] is None
+    assert details[2]["id"] == str(first + 1)
+
+
+def test_search_lists_multi_role_vacancy_once():
+    vac = dict(VACANCIES[0], professional_roles=[{"id": "96"}, {"id": "104"}])
+    api = StubApi([vac] + VACANCIES[1:])
+    found = api.search({"professional_role": ["96", "104"], "per_page": ["100"]})
+    ids = [item["id"] for item in found["items"]]
+    assert ids.count(vac["id"]) == 1
+    assert found["found"] == len(ids)
@@ -0,0 +1,48 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from benchmarks.synthetic import generate_vacancies
+from vacancy_scraper.classifier_of_profession import best_profession, score_vector
+from vacancy_scraper.extractor import extract_key_skills
+from vacancy_scraper.hit_matrix import HitMatrix
+
+SAMPLE = generate_vacancies(300, seed=3, until=datetime(2026, 1, 1, tzinfo=timezone.utc))
+# без названия, описания и навыков — нулевые баллы по всем профессиям
+EMPTY = [{"id": "1", "name": "", "description": "", "key_skills": None},
+         {"id": "2", "name": "Курьер", "description": "<p>Доставка</p>", "key_skills": []}]
+
+
+@pytest.fixture(scope="module")
+def matrix() -> HitMatrix:
+    return HitMatrix.build(SAMPLE + EMPTY)
+
+
+@pytest.fixture(scope="module")
+def vectors() -> list:
+    return [score_vector(vac["name"], vac["description"], extract_key_skills(vac)) for vac in SAMPLE + EMPTY]
+
+
+def test_scores_match_score_vector(matrix, vectors):
+    assert matrix.scores().tolist() == vectors
+
+
+@pytest.mark.parametrize("threshold", [15, 30, 1, 0, -5])
+def test_classify_matches_best_profession(matrix, vectors, threshold):
+    professions, scores = matrix.classify(threshold=threshold)
+    expected = [best_profession(vector, threshold) for vector in vectors]
+    assert list(zip(professions, scores.tolist())) == expected
+
+
+def test_zero_scores_stay_unclassified_with_non_positive_threshold(matrix):
+    professions, scores = matrix.classify(threshold=0)
+    assert professions[-2:] == ["", ""]
+    assert scores[-2:].tolist() == [0, 0]
+
+
+def test_save_and_load_roundtrip(matrix, tmp_path):
+    path = str(tmp_path / "hits.npz")
+    matrix.save(path)
+    loaded = HitMatrix.load(path)
+    assert loaded.ids.tolist() == matrix.ids.tolist()
+    assert loaded.classify()[0] == matrix.classify()[0]
@@ -0,0 +1,42 @@
+import sqlite3
+
+from vacancy_scraper.http_cache import HttpCache
+
+
+def _keys(path: str) -> list:
+    conn = sqlite3.connect(path)
+    try:
+        return sorted(key for key, in conn.execute("SELECT key FROM responses"))
+    finally:
+        conn.close()
+
+
+def test_get_does_not_write_until_flush(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = HttpCache(path)
+    cache.put("a", b"1")
+    before = sqlite3.connect(path).execute("SELECT accessed_at FROM responses").fetchone()[0]
+    assert cache.get("a").body == b"1"
+    assert sqlite3.connect(path).execute("SELECT accessed_at FROM responses").fetchone()[0] == before
+    cache.close()
+    assert sqlite3.connect(path).execute("SELECT accessed_at FROM responses").fetchone()[0] > before
+
+
+def test_evicts_least_recently_read_with_running_size(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = HttpCache(path, max_bytes=30)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"x" * 10)
+    cache.put("a", b"x" * 10)  # замена не увеличивает суммарный размер
+    cache.put("c", b"x" * 10)
+    assert _keys(path) == ["a", "b", "c"]
+    cache.get("b")
+    cache.put("d", b"x" * 10)
+    # a записан раньше c, b прочитан последним
+    assert _keys(path) == ["b", "c", "d"]
+    cache.close()
+    # суммарный размер после переоткрытия считается по базе
+    cache = HttpCache(path, max_bytes=30)
+    cache.put("e", b"x" * 10)
+    assert len(_keys(path)) == 3
+    cache.close()
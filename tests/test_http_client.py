@@ -0,0 +1,214 @@
+import asyncio
+
+import pytest
+import requests
+
+from vacancy_scraper import http_client
+from vacancy_scraper.http_cache import HttpCache
+from vacancy_scraper.http_client import (
+    BREAKER_POLL,
+    AdaptiveLimiter,
+    AsyncHttpClient,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetriesExhaustedError,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(http_client.time, "monotonic", fake)
+    return fake
+
+
+def test_limiter_halves_once_per_generation():
+    async def scenario():
+        limiter = AdaptiveLimiter(8, 1, 16)
+        first = await limiter.acquire()
+        second = await limiter.acquire()
+        await limiter.release(first, True)
+        assert limiter.limit == 4
+        # ответ на запрос, ушедший до уменьшения, лимит второй раз не режет
+        await limiter.release(second, True)
+        assert limiter.limit == 4
+        third = await limiter.acquire()
+        await limiter.release(third, True)
+        assert limiter.limit == 2
+
+    asyncio.run(scenario())
+
+
+def test_limiter_does_not_go_below_minimum():
+    async def scenario():
+        limiter = AdaptiveLimiter(2, 1, 16)
+        for _ in range(3):
+            await limiter.release(await limiter.acquire(), True)
+        assert limiter.limit == 1
+
+    asyncio.run(scenario())
+
+
+def test_limiter_grows_after_limit_healthy_responses():
+    async def scenario():
+        limiter = AdaptiveLimiter(3, 1, 4)
+        for _ in range(2):
+            await limiter.release(await limiter.acquire(), False)
+        assert limiter.limit == 3
+        await limiter.release(await limiter.acquire(), False)
+        assert limiter.limit == 4
+        for _ in range(10):
+            await limiter.release(await limiter.acquire(), False)
+        assert limiter.limit == 4
+        # отмена (None) ни на что не влияет
+        await limiter.release(await limiter.acquire(), None)
+        assert limiter.limit == 4
+
+    asyncio.run(scenario())
+
+
+def test_breaker_opens_after_failures(clock):
+    breaker = CircuitBreaker("host", failures=3, cooldown=10, max_trips=4)
+    for _ in range(2):
+        breaker.record_failure(False)
+    assert breaker.check() == (0.0, False)
+    breaker.record_failure(False)
+    wait, probe = breaker.check()
+    assert wait == pytest.approx(10)
+    assert not probe
+
+
+def test_breaker_probe_success_closes(clock):
+    breaker = CircuitBreaker("host", failures=1, cooldown=10, max_trips=4)
+    breaker.record_failure(False)
+    clock.now += 10
+    assert breaker.check() == (0.0, True)
+    # пока идёт проба, остальные запросы ждут её исхода
+    assert breaker.check() == (BREAKER_POLL, False)
+    breaker.record_success()
+    assert breaker.check() == (0.0, False)
+
+
+def test_breaker_probe_failure_reopens_with_doubled_cooldown(clock):
+    breaker = CircuitBreaker("host", failures=1, cooldown=10, max_trips=4)
+    breaker.record_failure(False)
+    clock.now += 10
+    assert breaker.check() == (0.0, True)
+    breaker.record_failure(True)
+    wait, probe = breaker.check()
+    assert wait == pytest.approx(20)
+    assert not probe
+
+
+def test_breaker_ignores_late_failures_while_open(clock):
+    breaker = CircuitBreaker("host", failures=1, cooldown=10, max_trips=4)
+    breaker.record_failure(False)
+    breaker.record_failure(False)
+    assert breaker.check()[0] == pytest.approx(10)
+
+
+def test_breaker_cancelled_probe_lets_next_request_probe(clock):
+    breaker = CircuitBreaker("host", failures=1, cooldown=10, max_trips=4)
+    breaker.record_failure(False)
+    clock.now += 10
+    assert breaker.check() == (0.0, True)
+    breaker.cancel_probe()
+    assert breaker.check() == (0.0, True)
+
+
+def test_breaker_gives_up_after_max_trips(clock):
+    breaker = CircuitBreaker("host", failures=1, cooldown=10, max_trips=2)
+    breaker.record_failure(False)
+    clock.now += 10
+    assert breaker.check() == (0.0, True)
+    breaker.record_failure(True)
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+
+def _client(monkeypatch, get) -> AsyncHttpClient:
+    client = AsyncHttpClient({}, base_url="http://stub.test", retries=1)
+    client.breaker = CircuitBreaker(client.host, failures=1, cooldown=0, max_trips=10)
+    monkeypatch.setattr(client.session, "get", get)
+    monkeypatch.setattr(http_client, "backoff", lambda attempt, server_delay=None: 0)
+    return client
+
+
+def test_sync_probe_is_released_on_unexpected_error(monkeypatch):
+    def get(url, headers=None, timeout=None):
+        raise requests.TooManyRedirects("loop")
+
+    client = _client(monkeypatch, get)
+    client.breaker.record_failure(False)
+    with pytest.raises(requests.TooManyRedirects):
+        client.get_json_sync("/professional_roles")
+    assert client.breaker.check() == (0.0, True)
+
+
+def test_exhausted_retries_raise(monkeypatch):
+    def get(url, headers=None, timeout=None):
+        raise requests.ConnectionError("refused")
+
+    client = _client(monkeypatch, get)
+    with pytest.raises(RetriesExhaustedError):
+        client.get_json_sync("/vacancies/1")
+    with pytest.raises(RetriesExhaustedError):
+        asyncio.run(client.get_json("/vacancies/1"))
+
+
+def test_host_unavailable_propagates_through_fetch_and_search():
+    from vacancy_scraper.extractor import fetch_vacancy
+    from vacancy_scraper.scrapers import _get_page
+
+    class DeadClient:
+        async def get_json(self, path, params=None, revalidate=False):
+            raise CircuitOpenError("host недоступен")
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(fetch_vacancy(DeadClient(), 1))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(_get_page(DeadClient(), {}, 0))
+
+
+def _response(status: int, body: bytes = b"") -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    return response
+
+
+def test_revalidate_skips_fresh_cache_entry(monkeypatch, tmp_path):
+    calls = []
+
+    def get(url, headers=None, timeout=None):
+        calls.append(headers)
+        return _response(200, b'{"id": "1", "name": "new"}')
+
+    client = _client(monkeypatch, get)
+    client.cache = HttpCache(str(tmp_path / "cache.sqlite"))
+    client.cache.put("http://stub.test/vacancies/1", b'{"id": "1", "name": "old"}', etag='"v1"')
+    assert asyncio.run(client.get_json("/vacancies/1"))["name"] == "old"
+    assert not calls
+    assert asyncio.run(client.get_json("/vacancies/1", revalidate=True))["name"] == "new"
+    assert calls == [{"If-None-Match": '"v1"'}]
+    client.cache.close()
+
+
+def test_exhausted_retries_fail_only_the_request():
+    from vacancy_scraper.extractor import fetch_vacancy
+    from vacancy_scraper.scrapers import _get_page
+
+    class FlakyClient:
+        async def get_json(self, path, params=None, revalidate=False):
+            raise RetriesExhaustedError("HTTP 503 после 2 попыток")
+
+    assert asyncio.run(fetch_vacancy(FlakyClient(), 1)) is None
+    assert asyncio.run(_get_page(FlakyClient(), {}, 0)) is None
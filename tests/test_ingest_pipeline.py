@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timezone
+
+import requests
+
+from db import filling_db
+from db.filling_db import _fetch_stage, next_high_water_mark
+from vacancy_scraper import http_client
+from vacancy_scraper.http_client import AsyncHttpClient, CircuitBreaker
+
+STARTED = datetime(2026, 10, 18, tzinfo=timezone.utc)
+
+
+def _listing(vacancy_id: int, published_at: str = "2026-10-10T12:00:00+0300") -> dict:
+    return {"id": str(vacancy_id), "published_at": published_at}
+
+
+def test_fetch_stage_retries_failed_details(monkeypatch):
+    calls = {}
+
+    async def fetch_vacancy(client, vacancy_id):
+        calls[vacancy_id] = calls.get(vacancy_id, 0) + 1
+        # 2 скачивается со второй попытки, 3 — никогда
+        if vacancy_id == 3 or (vacancy_id == 2 and calls[vacancy_id] == 1):
+            return None
+        return {"id": str(vacancy_id)}
+
+    monkeypatch.setattr(filling_db, "fetch_vacancy", fetch_vacancy)
+
+    async def scenario():
+        listings, details = asyncio.Queue(), asyncio.Queue()
+        for vac in [_listing(1), _listing(2), _listing(3)] + [None] * filling_db.HH_MAX_CONCURRENCY:
+            listings.put_nowait(vac)
+        failures = {"pages": 0, "details": []}
+        await _fetch_stage(None, listings, details, failures)
+        fetched = []
+        while (pair := details.get_nowait()) is not None:
+            fetched.append(pair[1]["id"])
+        return sorted(fetched), failures
+
+    fetched, failures = asyncio.run(scenario())
+    assert fetched == ["1", "2"]
+    assert [vac["id"] for vac in failures["details"]] == ["3"]
+    assert calls == {1: 1, 2: 2, 3: 2}
+
+
+def test_card_with_exhausted_retries_does_not_stop_the_run(monkeypatch):
+    def get(url, headers=None, timeout=None):
+        response = requests.Response()
+        # карточка 3 всегда отвечает 503
+        response.status_code = 503 if url.endswith("/vacancies/3") else 200
+        response._content = b"" if response.status_code == 503 else f'{{"id": "{url[-1]}"}}'.encode()
+        return response
+
+    client = AsyncHttpClient({}, base_url="http://stub.test", retries=1)
+    client.breaker = CircuitBreaker(client.host, failures=1, cooldown=0, max_trips=10)
+    monkeypatch.setattr(client.session, "get", get)
+    monkeypatch.setattr(http_client, "backoff", lambda attempt, server_delay=None: 0)
+
+    async def scenario():
+        listings, details = asyncio.Queue(), asyncio.Queue()
+        for vac in [_listing(1), _listing(3), _listing(2)] + [None] * filling_db.HH_MAX_CONCURRENCY:
+            listings.put_nowait(vac)
+        failures = {"pages": 0, "details": []}
+        await _fetch_stage(client, listings, details, failures)
+        fetched = []
+        while (pair := details.get_nowait()) is not None:
+            fetched.append(pair[1]["id"])
+        return sorted(fetched), failures
+
+    fetched, failures = asyncio.run(scenario())
+    assert fetched == ["1", "2"]
+    assert [vac["id"] for vac in failures["details"]] == ["3"]
+
+
+def test_mark_moves_to_run_start_without_failures():
+    assert next_high_water_mark(STARTED, {"pages": 0, "details": []}) == STARTED
+
+
+def test_mark_stays_when_search_pages_failed():
+    assert next_high_water_mark(STARTED, {"pages": 1, "details": []}) is None
+
+
+def test_mark_stops_at_oldest_failed_detail():
+    failures = {"pages": 0, "details": [_listing(1, "2026-10-12T10:00:00+0300"),
+                                        _listing(2, "2026-10-05T10:00:00+0300")]}
+    assert next_high_water_mark(STARTED, failures) == datetime(2026, 10, 5, 7, tzinfo=timezone.utc)
+
+
+class _FakeConn:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return self
+
+
+def test_batch_with_only_deletions_bumps_data_version(monkeypatch):
+    calls = []
+    monkeypatch.setattr(filling_db, "build_rows", lambda pairs: [])
+    for name in ("mark_dirty_days", "delete_vacancies", "insert_vacancy", "insert_work_format",
+                 "insert_skills", "insert_listing_hashes"):
+        monkeypatch.setattr(filling_db, name, lambda cur, *args, name=name: calls.append(name))
+    monkeypatch.setattr(filling_db, "resolve_profession_ids", lambda cur, names: {})
+    monkeypatch.setattr(filling_db, "resolve_experience_ids", lambda cur, items: {})
+    monkeypatch.setattr(filling_db, "bump_data_version", lambda cur: calls.append("bump_data_version"))
+
+    # вакансия больше не классифицируется: батч только удаляет
+    assert filling_db.write_batch(_FakeConn(), [(_listing(1), {"id": "1"})]) == 0
+    assert "delete_vacancies" in calls
+    assert calls[-1] == "bump_data_version"
@@ -0,0 +1,36 @@
+import socket
+import urllib.request
+
+from vacancy_scraper.metrics import Metrics, start_http_server
+
+
+def test_prometheus_declares_each_metric_type_once():
+    metrics = Metrics()
+    metrics.inc("db_rows_total", 3, table="vacancy")
+    metrics.inc("db_rows_total", 1, table="skill")
+    metrics.set("queue_size", 5, queue="listings")
+    metrics.observe("db_batch_seconds", 0.02, stage="insert")
+    lines = metrics.to_prometheus().splitlines()
+    assert lines.count("# TYPE db_rows_total counter") == 1
+    assert lines.index("# TYPE db_rows_total counter") < lines.index('db_rows_total{table="skill"} 1')
+    assert "# TYPE queue_size gauge" in lines
+    assert "# TYPE db_batch_seconds histogram" in lines
+    assert 'db_batch_seconds_count{stage="insert"} 1' in lines
+
+
+def test_server_listens_on_localhost_by_default():
+    assert start_http_server(port=0) is None
+    server = start_http_server(port=_free_port())
+    try:
+        assert server.server_address[0] == "127.0.0.1"
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as resp:
+            assert resp.status == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
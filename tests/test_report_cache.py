@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from services.reports import ReportCache
+
+V1 = datetime(2026, 10, 18, 9, tzinfo=timezone.utc)
+V2 = V1 + timedelta(minutes=5)
+
+
+def _frame(value: int) -> pd.DataFrame:
+    return pd.DataFrame({"x": ["a"], "y": [value]})
+
+
+def test_hit_within_version_and_miss_after_new_data():
+    cache = ReportCache(1 << 20)
+    cache.put("q", V1, _frame(1))
+    assert cache.get("q", V1)["y"][0] == 1
+    assert cache.get("q", V2) is None
+
+
+def test_stale_version_does_not_move_cache_back():
+    cache = ReportCache(1 << 20)
+    cache.put("q", V2, _frame(2))
+    # запрос, прочитавший версию до записи нового батча, приходит позже
+    cache.put("other", V1, _frame(1))
+    assert cache.get("other", V1) is None
+    assert cache.get("q", V2)["y"][0] == 2
+    assert cache.get("other", V2) is None
+
+
+def test_cached_frame_is_not_shared_with_callers():
+    cache = ReportCache(1 << 20)
+    df = _frame(1)
+    cache.put("q", V1, df)
+    df.loc[0, "y"] = 100
+    hit = cache.get("q", V1)
+    hit.loc[0, "y"] = 200
+    assert cache.get("q", V1)["y"][0] == 1
+
+
+def test_evicts_least_recently_used():
+    size = int(_frame(1).memory_usage(deep=True).sum())
+    cache = ReportCache(size * 2)
+    cache.put("a", V1, _frame(1))
+    cache.put("b", V1, _frame(2))
+    cache.get("a", V1)
+    cache.put("c", V1, _frame(3))
+    assert cache.get("b", V1) is None
+    assert cache.get("a", V1) is not None
+
+
+def test_page_cursor_from_object_dtype_created_at(monkeypatch):
+    from services import reports
+
+    created = V1.replace(year=2025)
+    df = pd.DataFrame({"vacancy_id": [1, 2],
+                       "page_created_at": pd.Series([created, created], dtype=object),
+                       "page_vacancy_id": [1, 2]})
+    monkeypatch.setattr(reports, "_read_report", lambda *args: df)
+    cfg = {"chart_type": "table", "base_table": "vacancy", "x_field": "vacancy_id", "y_agg_func": "count"}
+    page, cursor = reports.fetch_report_page(None, cfg, page_size=2)
+    assert cursor == (created, 2)
+    assert list(page.columns) == ["vacancy_id"]
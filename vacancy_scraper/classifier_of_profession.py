@@ -1,46 +1,171 @@
-import re, unicodedata, html
-from vacancy_scraper.extractor import *
+import re
+import os
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from vacancy_scraper.patterns_4_professional_role import *
+from vacancy_scraper.metrics import METRICS
+from vacancy_scraper.text_normalization import normalize_text, normalize_description, normalize_skill
 
-def normalize_text(text:str) -> str | None:
-    if text is None:
+
+WORD_RE = re.compile(r"\w+")
+# Символы регулярки, после которых предыдущий литерал может отсутствовать или повторяться
+_QUANTIFIERS = set("?*+{")
+
+
+def _literal_prefix(pattern:str) -> str | None:
+    """
+    Литерал, с которого обязано начинаться слово при совпадении шаблона вида r"\bpython...".
+    None — если шаблон так не разбирается (тогда он проверяется регуляркой всегда).
+    """
+    if not pattern.startswith(r"\b") or "|" in re.sub(r"\(.*?\)", "", pattern):
         return None
-    text = html.unescape(text)
-    text = unicodedata.normalize('NFKD', text).replace('\xa0', ' ')
-    text = re.sub(r'\s+', ' ', text.lower()).strip()
-    return text
+    body = pattern[2:]
+    prefix = ""
+    for i, ch in enumerate(body):
+        if not (ch.isalnum() or ch == "_"):
+            break
+        if i + 1 < len(body) and body[i + 1] in _QUANTIFIERS:
+            break
+        prefix += ch
+    return prefix or None
 
 
-def score_profession(name: str, desc: str, skills: list[str]) -> tuple[str, int] | None:
+def _fast_pattern(pattern:str, prefix:str | None) -> re.Pattern:
+    r"""
+    r"\bpython\b" -> r"python(?<!\wpython)\b": тот же смысл, но шаблон начинается с литерала,
+    и движок re ищет его быстрым поиском подстроки вместо проверки \b в каждой позиции.
+    """
+    if prefix is None:
+        return re.compile(pattern)
+    rest = pattern[2 + len(prefix):]
+    return re.compile(f"{prefix}(?<!\\w{prefix}){rest}")
+
+
+def _has_word_with_prefix(sorted_words:list, prefix:str) -> bool:
+    i = bisect_left(sorted_words, prefix)
+    return i < len(sorted_words) and sorted_words[i].startswith(prefix)
+
+
+class KeywordMatcher:
+    """
+    Скомпилированный один раз набор ключевых слов из PATTERNS.
+    Каждое поле разбивается на слова один раз; регулярка ключевого слова запускается,
+    только если в тексте есть слово, начинающееся с её литерального префикса.
+    Баллы совпадают с исходным алгоритмом: 7 за имя, 2 за описание, 3 за навыки.
+    """
+
+    NAME_WEIGHT, DESC_WEIGHT, SKILLS_WEIGHT = 7, 2, 3
+
+    def __init__(self, patterns:dict):
+        self.professions = list(patterns)
+        self.profession_words = [normalize_text(prof).lower().split() for prof in self.professions]
+        self.keywords = []      # уникальные шаблоны
+        self.owners = []        # индексы профессий для каждого шаблона (с повторами)
+        index = {}
+        for prof_idx, k_words in enumerate(patterns.values()):
+            for kw in k_words:
+                if kw not in index:
+                    index[kw] = len(self.keywords)
+                    prefix = _literal_prefix(kw)
+                    self.keywords.append((_fast_pattern(kw, prefix), prefix))
+                    self.owners.append([])
+                self.owners[index[kw]].append(prof_idx)
+        self.prefixes = sorted({prefix for _, prefix in self.keywords if prefix})
+
+    def matches(self, text:str | None) -> list[int]:
+        """Индексы ключевых слов из self.keywords, которые находятся в тексте."""
+        text = text or ""
+        words = sorted(set(WORD_RE.findall(text)))
+        present = {prefix for prefix in self.prefixes if _has_word_with_prefix(words, prefix)}
+        return [i for i, (regex, prefix) in enumerate(self.keywords)
+                if (prefix is None or prefix in present) and regex.search(text)]
+
+    def name_word_hits(self, n_name:str | None) -> list[int]:
+        """Сколько слов из названия каждой профессии входит в название вакансии."""
+        if not n_name:
+            return [0] * len(self.professions)
+        return [sum(1 for pr in words if pr in n_name) for words in self.profession_words]
+
+    def scores(self, n_name:str | None, n_desc:str | None, n_skills:str | None) -> list[int]:
+        """Баллы по всем профессиям в порядке self.professions."""
+        scores = [hits * self.NAME_WEIGHT for hits in self.name_word_hits(n_name)]
+        for text, weight in ((n_name, self.NAME_WEIGHT), (n_desc, self.DESC_WEIGHT),
+                             (n_skills, self.SKILLS_WEIGHT)):
+            for kw_idx in self.matches(text):
+                for prof_idx in self.owners[kw_idx]:
+                    scores[prof_idx] += weight
+        return scores
+
+
+MATCHER = KeywordMatcher(PATTERNS)
+
+
+# Минимальный балл, с которого вакансия относится к профессии
+SCORE_THRESHOLD = 15
+
+
+def normalize_fields(name: str, desc: str, skills: list[str]) -> tuple[str | None, str | None, str]:
+    """Нормализованные название, описание и навыки (через пробел), по которым считаются баллы."""
     n_name = normalize_text(name)
-    n_desc = normalize_text(desc)
+    n_desc = normalize_description(desc)
 
     if skills:
-        list_skills = [normalize_text(s[0]) for s in skills]
+        list_skills = [normalize_skill(s[0]) for s in skills]
     else:
         list_skills = []
-    n_skills = " ".join(list_skills).lower()
-
-    best_prof, best_score = "", 0
+    return n_name, n_desc, " ".join(list_skills)
 
-    for prof, k_words in PATTERNS.items():
-        score = 0
-        n_prof = normalize_text(prof)
 
-        if n_name:
-            name_matches = sum(1 for pr in n_prof.lower().split() if pr in n_name)
-            score += name_matches * 7
+def score_vector(name: str, desc: str, skills: list[str]) -> list[int]:
+    """Баллы по всем профессиям в порядке MATCHER.professions."""
+    return MATCHER.scores(*normalize_fields(name, desc, skills))
 
-        for kw in k_words:
-            if re.search(kw, n_name):
-                score += 7
-            if re.search(kw, n_desc):
-                score += 2
-            if re.search(kw, n_skills):
-                score += 3
 
+def best_profession(scores: list[int], threshold: int = SCORE_THRESHOLD) -> tuple[str, int]:
+    best_prof, best_score = "", 0
+    for prof, score in zip(MATCHER.professions, scores):
         if score > best_score:
             best_prof = prof
             best_score = score
 
-    return (best_prof, best_score) if best_score >= 15 else ("", 0)
+    return (best_prof, best_score) if best_score >= threshold else ("", 0)
+
+
+def score_profession(name: str, desc: str, skills: list[str]) -> tuple[str, int] | None:
+    return best_profession(score_vector(name, desc, skills))
+
+
+def classify_batch(vacancies: list[dict], processes: int | None = 1, chunk_size: int = 200) -> list[dict]:
+    """
+    Классифицирует список полных вакансий (/vacancies/{id}).
+    processes=1 — в текущем процессе, None — по числу ядер, иначе размер пула процессов.
+    Для каждой вакансии возвращает {"id", "profession", "score", "scores": {профессия: балл}}.
+    """
+    started = time.perf_counter()
+    items = [(vac.get("id"), vac.get("name", ""), vac.get("description", ""),
+              [(s["name"],) for s in vac.get("key_skills") or []]) for vac in vacancies]
+    processes = processes or os.cpu_count() or 1
+
+    if processes == 1 or len(items) <= chunk_size:
+        vectors = _score_chunk(items)
+    else:
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            vectors = [vec for part in pool.map(_score_chunk, chunks) for vec in part]
+
+    result = []
+    for (id_vac, *_), scores in zip(items, vectors):
+        profession, score = best_profession(scores)
+        result.append({"id": id_vac, "profession": profession, "score": score,
+                       "scores": dict(zip(MATCHER.professions, scores))})
+    if items:
+        # при пуле процессов время на отдельную вакансию не измерить — берём среднее по батчу
+        METRICS.observe("classify_seconds_per_vacancy", (time.perf_counter() - started) / len(items),
+                        count=len(items))
+        METRICS.inc("classified_vacancies_total", len(items))
+    return result
+
+
+def _score_chunk(items: list) -> list[list[int]]:
+    return [score_vector(name, desc, skills) for _, name, desc, skills in items]
@@ -1,24 +1,61 @@
-import requests
-import time
-from vacancy_scraper.classifier_of_profession import score_profession
+import asyncio
+from vacancy_scraper.classifier_of_profession import classify_batch
+from vacancy_scraper.http_client import AsyncHttpClient, HH_API_URL, HH_CONCURRENCY, HH_RATE, HostUnavailableError
+
+def data_extractor(vacancies:list, headers:dict, concurrency:int = HH_CONCURRENCY,
+                   rate:float = HH_RATE, base_url:str = HH_API_URL, fetched:list | None = None,
+                   processes:int | None = 1):
+    full_vacancies = asyncio.run(
+        fetch_vacancy_details([int(vac["id"]) for vac in vacancies], headers, concurrency, rate, base_url)
+    )
+    pairs = [(vac, full_vac) for vac, full_vac in zip(vacancies, full_vacancies) if full_vac is not None]
+    if fetched is not None:
+        fetched.extend(int(vac["id"]) for vac, _ in pairs)
+    data = build_rows(pairs, processes)
+    print(f"Карточек получено: {len(pairs)} из {len(vacancies)}, отнесено к профессиям: {len(data)}")
+    return data
+
+
+def build_rows(pairs:list, processes:int | None = 1) -> list:
+    """
+    pairs — [(вакансия из поиска, полная вакансия)]. Классифицирует пачку целиком
+    и возвращает строки только для вакансий, отнесённых к какой-либо профессии.
+    """
+    classified = classify_batch([full_vac for _, full_vac in pairs], processes=processes)
 
-def data_extractor(vacancies:list, headers:dict):
     data = []
-    for vac in vacancies:
-        id_vac = int(vac["id"])
-        full_vac = requests.get(f"https://api.hh.ru/vacancies/{id_vac}", headers=headers).json()
-        profession = score_profession(full_vac.get("name", ""), full_vac.get("description", ""), extract_key_skills(full_vac))
-        if profession[0] != '':
+    for (vac, full_vac), profession in zip(pairs, classified):
+        if profession["profession"] != '':
             dt = []
-            dt.extend([id_vac, profession[0], extract_experience(vac),
+            dt.extend([int(vac["id"]), profession["profession"], extract_experience(vac),
                          extract_salary(full_vac), extract_date(full_vac),
                          extract_work_format(full_vac), extract_key_skills(full_vac)])
             data.append(dt)
-        time.sleep(0.25)
-    print(data)
     return data
 
 
+async def fetch_vacancy_details(ids:list, headers:dict, concurrency:int = HH_CONCURRENCY,
+                                rate:float = HH_RATE, base_url:str = HH_API_URL) -> list:
+    """
+    Параллельно скачивает /vacancies/{id}. Порядок результата совпадает с ids,
+    на месте вакансий, которые не удалось получить, стоит None.
+    """
+    async with AsyncHttpClient(headers, concurrency, rate, base_url) as client:
+        return await asyncio.gather(*(fetch_vacancy(client, id_vac) for id_vac in ids))
+
+
+async def fetch_vacancy(client:AsyncHttpClient, id_vac:int) -> dict | None:
+    # карточку всегда перепроверяем (условным запросом, если она есть в кэше): в ingest её
+    # запрашивают, когда изменилась вакансия в выдаче, и ответ из кэша был бы устаревшим
+    try:
+        return await client.get_json(f"/vacancies/{id_vac}", revalidate=True)
+    except HostUnavailableError:
+        raise
+    except Exception as e:
+        print(f"Не удалось получить вакансию {id_vac}:", e)
+        return None
+
+
 def extract_key_skills(vacancy:dict) -> list | None:
     if vacancy.get("key_skills") is None:
         return None
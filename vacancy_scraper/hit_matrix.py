@@ -0,0 +1,155 @@
+"""
+Разреженная матрица попаданий «вакансия × ключевое слово» по полям (название, описание, навыки).
+Регулярки прогоняются один раз при построении; пересчёт баллов с другими весами и порогом
+делается векторно в NumPy без повторного разбора текстов.
+
+    python -m vacancy_scraper.hit_matrix --archive .cache/raw_archive --out .cache/hit_matrix.npz
+    python -m vacancy_scraper.hit_matrix --matrix .cache/hit_matrix.npz --weights 7 2 3 --threshold 15
+
+Матрица привязана к PATTERNS, по которым построена: при изменении ключевых слов её нужно перестроить.
+"""
+import argparse
+import json
+import os
+from collections import Counter
+
+import numpy as np
+
+from vacancy_scraper.classifier_of_profession import MATCHER, SCORE_THRESHOLD, KeywordMatcher, normalize_fields
+from vacancy_scraper.extractor import extract_key_skills
+
+HIT_MATRIX_PATH = os.getenv("HIT_MATRIX_PATH", ".cache/hit_matrix.npz")
+
+FIELDS = ("name", "desc", "skills")
+DEFAULT_WEIGHTS = (KeywordMatcher.NAME_WEIGHT, KeywordMatcher.DESC_WEIGHT, KeywordMatcher.SKILLS_WEIGHT)
+
+
+class HitMatrix:
+    """
+    ids — id вакансий (строки матрицы); hits[field] = (rows, cols) — попадания ключевого слова cols
+    (индекс в MATCHER.keywords) в поле field вакансии rows; name_words — V×P число слов названия
+    профессии в названии вакансии (даёт баллы с весом названия наравне с ключевыми словами).
+    """
+
+    def __init__(self, ids: np.ndarray, hits: dict, name_words: np.ndarray,
+                 keywords: list[str], professions: list[str]):
+        self.ids = ids
+        self.hits = hits
+        self.name_words = name_words
+        self.keywords = keywords
+        self.professions = professions
+
+    @classmethod
+    def build(cls, vacancies: list[dict], matcher: KeywordMatcher = MATCHER) -> "HitMatrix":
+        """По полным вакансиям /vacancies/{id}; нормализация та же, что в classify_batch."""
+        ids = []
+        rows = {field: [] for field in FIELDS}
+        cols = {field: [] for field in FIELDS}
+        name_words = []
+        for row, vac in enumerate(vacancies):
+            ids.append(int(vac["id"]))
+            texts = normalize_fields(vac.get("name", ""), vac.get("description", ""),
+                                     extract_key_skills(vac))
+            name_words.append(matcher.name_word_hits(texts[0]))
+            for field, text in zip(FIELDS, texts):
+                matched = matcher.matches(text)
+                rows[field] += [row] * len(matched)
+                cols[field] += matched
+        hits = {field: (np.array(rows[field], dtype=np.int32), np.array(cols[field], dtype=np.int32))
+                for field in FIELDS}
+        name_words = np.array(name_words, dtype=np.int16).reshape(len(ids), len(matcher.professions))
+        return cls(np.array(ids, dtype=np.int64), hits, name_words,
+                   [regex.pattern for regex, _ in matcher.keywords], list(matcher.professions))
+
+    def save(self, path: str = HIT_MATRIX_PATH) -> None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        arrays = {f"{field}_{part}": arr for field, pair in self.hits.items()
+                  for part, arr in zip(("rows", "cols"), pair)}
+        np.savez_compressed(path, ids=self.ids, name_words=self.name_words,
+                            keywords=np.array(self.keywords), professions=np.array(self.professions),
+                            **arrays)
+
+    @classmethod
+    def load(cls, path: str = HIT_MATRIX_PATH, matcher: KeywordMatcher = MATCHER) -> "HitMatrix":
+        with np.load(path) as data:
+            keywords = data["keywords"].tolist()
+            professions = data["professions"].tolist()
+            if keywords != [regex.pattern for regex, _ in matcher.keywords] or professions != matcher.professions:
+                raise ValueError(f"Матрица {path} построена по другим PATTERNS — её нужно перестроить.")
+            hits = {field: (data[f"{field}_rows"], data[f"{field}_cols"]) for field in FIELDS}
+            return cls(data["ids"], hits, data["name_words"], keywords, professions)
+
+    def scores(self, weights: tuple = DEFAULT_WEIGHTS, matcher: KeywordMatcher = MATCHER) -> np.ndarray:
+        """Баллы V×P: веса (название, описание, навыки) применяются к попаданиям по полям."""
+        owners = owner_matrix(matcher)
+        n_rows = len(self.ids)
+        scores = self.name_words.astype(np.int64) * weights[0]
+        for field, weight in zip(FIELDS, weights):
+            rows, cols = self.hits[field]
+            if not len(rows) or not weight:
+                continue
+            # ключевое слово может принадлежать нескольким профессиям (и одной — несколько раз)
+            contributions = owners[cols]
+            for prof_idx in range(owners.shape[1]):
+                scores[:, prof_idx] += weight * np.bincount(
+                    rows, weights=contributions[:, prof_idx], minlength=n_rows
+                ).astype(np.int64)
+        return scores
+
+    def classify(self, weights: tuple = DEFAULT_WEIGHTS,
+                 threshold: int = SCORE_THRESHOLD) -> tuple[list[str], np.ndarray]:
+        """
+        Профессия и балл для каждой вакансии — как best_profession: первая профессия
+        с наибольшим положительным баллом, "" и 0 при балле ниже threshold или без попаданий.
+        """
+        scores = self.scores(weights)
+        best = scores.argmax(axis=1) if scores.size else np.zeros(len(self.ids), dtype=np.int64)
+        best_scores = scores[np.arange(len(self.ids)), best] if scores.size else np.zeros(len(self.ids))
+        # при threshold <= 0 нулевой балл не делает вакансию первой профессией из списка
+        passed = (best_scores >= threshold) & (best_scores > 0)
+        professions = [self.professions[idx] if ok else "" for idx, ok in zip(best, passed)]
+        return professions, np.where(passed, best_scores, 0)
+
+
+def owner_matrix(matcher: KeywordMatcher = MATCHER) -> np.ndarray:
+    """K×P: сколько раз ключевое слово k встречается в списке профессии p."""
+    owners = np.zeros((len(matcher.keywords), len(matcher.professions)), dtype=np.int64)
+    for kw_idx, prof_ids in enumerate(matcher.owners):
+        for prof_idx in prof_ids:
+            owners[kw_idx, prof_idx] += 1
+    return owners
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--archive", help="построить матрицу по архиву сырых ответов (последняя загрузка вакансии)")
+    parser.add_argument("--corpus", help="построить матрицу по JSONL с полными вакансиями")
+    parser.add_argument("--out", default=HIT_MATRIX_PATH, help="куда сохранить построенную матрицу")
+    parser.add_argument("--matrix", default=HIT_MATRIX_PATH, help="готовая матрица для пересчёта")
+    parser.add_argument("--weights", type=int, nargs=3, default=DEFAULT_WEIGHTS,
+                        metavar=("NAME", "DESC", "SKILLS"))
+    parser.add_argument("--threshold", type=int, default=SCORE_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.archive or args.corpus:
+        if args.archive:
+            from vacancy_scraper.raw_archive import iter_archive
+            latest = {int(vac["id"]): vac for _, vac, _ in iter_archive(args.archive)}
+            vacancies = list(latest.values())
+        else:
+            with open(args.corpus, encoding="utf-8") as f:
+                vacancies = [json.loads(line) for line in f if line.strip()]
+        matrix = HitMatrix.build(vacancies)
+        matrix.save(args.out)
+    else:
+        matrix = HitMatrix.load(args.matrix)
+
+    professions, _ = matrix.classify(tuple(args.weights), args.threshold)
+    counts = Counter(professions)
+    print(json.dumps({"vacancies": len(professions), "unclassified": counts.pop("", 0),
+                      "professions": dict(counts.most_common())}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+
+HH_CACHE_PATH = os.getenv("HH_CACHE_PATH", ".cache/hh_http.sqlite")
+HH_CACHE_MAX_MB = int(os.getenv("HH_CACHE_MAX_MB", 512))
+# Время обращения (для LRU) копится в памяти и пишется в базу пачкой из стольких ключей
+ACCESS_FLUSH_EVERY = int(os.getenv("HH_CACHE_ACCESS_FLUSH", 256))
+
+# TTL (в секундах) по эндпоинтам: первое совпадение по пути запроса.
+# Справочники почти не меняются, поиск и карточки живут недолго.
+# По истечении TTL ответ не выбрасывается, а перепроверяется через ETag/Last-Modified.
+# Карточки вакансий extractor.fetch_vacancy перепроверяет всегда (revalidate=True),
+# кэш для них лишь позволяет получить 304 вместо полного ответа.
+DEFAULT_TTLS = [
+    (re.compile(r"^/professional_roles"), 7 * 24 * 3600),
+    (re.compile(r"^/vacancies/\d+"), 3600),
+    (re.compile(r"^/vacancies"), 600),
+]
+
+
+class CacheEntry:
+    def __init__(self, body: bytes, etag: str | None, last_modified: str | None, stored_at: float):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.stored_at < ttl
+
+
+class HttpCache:
+    """
+    Дисковый кэш HTTP-ответов в SQLite с вытеснением по LRU,
+    когда суммарный размер тел превышает max_bytes.
+    Чтение не пишет в базу: время обращения копится в памяти и сохраняется пачкой
+    (при записи ответа, каждые ACCESS_FLUSH_EVERY ключей и при close), суммарный размер
+    считается один раз при открытии и дальше ведётся в памяти.
+    """
+
+    def __init__(self, path: str = HH_CACHE_PATH, max_bytes: int = HH_CACHE_MAX_MB * 1024 * 1024,
+                 ttls: list | None = None):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttls = ttls if ttls is not None else DEFAULT_TTLS
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # в WAL коммит без fsync безопасен для целостности; при сбое теряются лишь последние ответы
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, body BLOB NOT NULL, etag TEXT, last_modified TEXT, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._accessed: dict[str, float] = {}
+
+    def ttl_for(self, path: str) -> float:
+        for pattern, ttl in self.ttls:
+            if pattern.search(path):
+                return ttl
+        return 0
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._accessed[key] = time.time()
+            if len(self._accessed) >= ACCESS_FLUSH_EVERY:
+                self._flush_accessed()
+                self._conn.commit()
+        return CacheEntry(*row)
+
+    def put(self, key: str, body: bytes, etag: str | None = None, last_modified: str | None = None) -> None:
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._accessed.pop(key, None)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, body, etag, last_modified, stored_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, body, etag, last_modified, now, now, len(body))
+            )
+            self._size += len(body) - (old[0] if old else 0)
+            self._flush_accessed()
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, key: str) -> None:
+        """Ответ подтверждён сервером (304) — продлеваем TTL."""
+        now = time.time()
+        with self._lock:
+            self._accessed.pop(key, None)
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key)
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._accessed.clear()
+            self._size = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_accessed()
+            self._conn.commit()
+            self._conn.close()
+
+    def _flush_accessed(self) -> None:
+        if self._accessed:
+            self._conn.executemany("UPDATE responses SET accessed_at = ? WHERE key = ?",
+                                   [(at, key) for key, at in self._accessed.items()])
+            self._accessed.clear()
+
+    def _evict(self) -> None:
+        if self._size <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        to_delete = []
+        for key, size in rows:
+            if self._size <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            self._size -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", to_delete)
+
+
+_default_cache: HttpCache | None = None
+
+
+def get_default_cache() -> HttpCache | None:
+    """Общий кэш процесса; HH_CACHE_PATH='' отключает кэширование."""
+    global _default_cache
+    if not HH_CACHE_PATH:
+        return None
+    if _default_cache is None:
+        _default_cache = HttpCache()
+    return _default_cache
@@ -0,0 +1,416 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from vacancy_scraper.http_cache import HttpCache, get_default_cache
+from vacancy_scraper.metrics import METRICS, endpoint_of
+
+HH_API_URL = os.getenv("HH_API_URL", "https://api.hh.ru")
+
+# Лимиты hh.ru не документированы жёстко, поэтому держим запас:
+# не больше HH_RATE запросов в секунду. Параллельность подбирается на ходу (AdaptiveLimiter):
+# стартует с HH_CONCURRENCY и растёт до HH_MAX_CONCURRENCY, пока ответы здоровые
+HH_CONCURRENCY = int(os.getenv("HH_CONCURRENCY", 4))
+HH_MAX_CONCURRENCY = max(int(os.getenv("HH_MAX_CONCURRENCY", 16)), HH_CONCURRENCY)
+HH_RATE = float(os.getenv("HH_RATE", 4))
+HH_TIMEOUT = float(os.getenv("HH_TIMEOUT", 15))
+
+# Повторы при 429, 5xx, капче и сетевых ошибках: экспоненциальная пауза с полным джиттером,
+# base * 2^попытка, но не больше HH_BACKOFF_MAX; Retry-After от сервера — нижняя граница паузы
+HH_RETRIES = int(os.getenv("HH_RETRIES", 5))
+HH_BACKOFF_BASE = float(os.getenv("HH_BACKOFF_BASE", 0.5))
+HH_BACKOFF_MAX = float(os.getenv("HH_BACKOFF_MAX", 60))
+
+# Автомат на хост: размыкается после HH_BREAKER_FAILURES неудач подряд на HH_BREAKER_COOLDOWN с
+# (пауза удваивается при каждом повторном размыкании, до BREAKER_MAX_COOLDOWN);
+# после HH_BREAKER_MAX_TRIPS размыканий подряд хост считается недоступным
+HH_BREAKER_FAILURES = int(os.getenv("HH_BREAKER_FAILURES", 5))
+HH_BREAKER_COOLDOWN = float(os.getenv("HH_BREAKER_COOLDOWN", 30))
+HH_BREAKER_MAX_TRIPS = int(os.getenv("HH_BREAKER_MAX_TRIPS", 4))
+BREAKER_MAX_COOLDOWN = 300
+# Как часто ждущие запросы проверяют исход пробного запроса
+BREAKER_POLL = 0.1
+
+
+class TokenBucket:
+    """
+    Token bucket: в среднем rate токенов в секунду, всплеск не больше capacity.
+    pause() останавливает выдачу токенов (Retry-After от сервера).
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            paused = self._paused_until - time.monotonic()
+            if paused > 0:
+                METRICS.inc("hh_rate_limit_sleep_seconds_total", paused)
+                await asyncio.sleep(paused)
+                # за паузу токены не копятся, иначе после неё уйдёт всплеск
+                self._tokens = 0
+                self._updated = time.monotonic()
+            self._refill()
+            if self._tokens < 1:
+                delay = (1 - self._tokens) / self.rate
+                METRICS.inc("hh_rate_limit_sleep_seconds_total", delay)
+                await asyncio.sleep(delay)
+                self._refill()
+            self._tokens -= 1
+
+
+class AdaptiveLimiter:
+    """
+    AIMD-ограничение параллельности: после limit здоровых ответов подряд лимит растёт на 1
+    (до maximum), при перегрузке (429, 5xx, капча, сетевая ошибка) уменьшается вдвое (до minimum).
+    Уменьшение срабатывает один раз на поколение: ответы на запросы, отправленные
+    до предыдущего уменьшения, его не повторяют.
+    """
+
+    def __init__(self, initial: float, minimum: int = 1, maximum: int = HH_MAX_CONCURRENCY, name: str = ""):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.name = name
+        self._in_flight = 0
+        self._successes = 0
+        self._generation = 0
+        self._cond = asyncio.Condition()
+        METRICS.set("hh_concurrency_limit", int(self.limit), host=name)
+
+    async def acquire(self) -> int:
+        """Ждёт свободного места; возвращает поколение для release."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+            return self._generation
+
+    async def release(self, generation: int, overloaded: bool | None) -> None:
+        """overloaded: True — перегрузка, False — здоровый ответ, None — без вывода (отмена)."""
+        async with self._cond:
+            self._in_flight -= 1
+            if overloaded and generation == self._generation:
+                self.limit = max(float(self.minimum), self.limit / 2)
+                self._generation += 1
+                self._successes = 0
+            elif overloaded is False:
+                self._successes += 1
+                if self._successes >= int(self.limit) and self.limit < self.maximum:
+                    self.limit += 1
+                    self._successes = 0
+            METRICS.set("hh_concurrency_limit", int(self.limit), host=self.name)
+            self._cond.notify_all()
+
+
+class HostUnavailableError(RuntimeError):
+    """Хост не отвечает: дальше обходить выдачу бессмысленно, прогон прерывается."""
+
+
+class CircuitOpenError(HostUnavailableError):
+    """Автомат размыкался HH_BREAKER_MAX_TRIPS раз подряд без успешного ответа."""
+
+
+class RetriesExhaustedError(RuntimeError):
+    """
+    429, 5xx, капча или сетевая ошибка повторялись все retries попыток. Относится к одному
+    запросу, а не к хосту: вызывающий код считает его неудачным и продолжает работу.
+    """
+
+
+class CircuitBreaker:
+    """
+    Автомат на хост. После failures неудач подряд размыкается на cooldown: запросы к хосту ждут,
+    затем проходит один пробный. Успех замыкает автомат, неудача пробы размыкает его снова
+    с удвоенной паузой. После max_trips размыканий подряд запросы, пока автомат разомкнут,
+    сразу падают с CircuitOpenError. Потокобезопасен.
+    """
+
+    def __init__(self, host: str, failures: int = HH_BREAKER_FAILURES,
+                 cooldown: float = HH_BREAKER_COOLDOWN, max_trips: int = HH_BREAKER_MAX_TRIPS):
+        self.host = host
+        self.failures = failures
+        self.cooldown = cooldown
+        self.max_trips = max_trips
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._trips = 0
+        self._open_until = 0.0
+        self._probing = False
+
+    def check(self) -> tuple[float, bool]:
+        """(сколько подождать перед повторной проверкой, этот запрос — пробный); (0, ...) — можно слать."""
+        with self._lock:
+            if not self._trips:
+                return 0.0, False
+            wait = self._open_until - time.monotonic()
+            if wait > 0:
+                if self._trips >= self.max_trips:
+                    raise CircuitOpenError(f"{self.host} недоступен: {self._trips} размыканий подряд")
+                return wait, False
+            if self._probing:
+                return BREAKER_POLL, False
+            self._probing = True
+            return 0.0, True
+
+    async def wait(self) -> bool:
+        while True:
+            wait, probe = self.check()
+            if not wait:
+                return probe
+            await asyncio.sleep(wait)
+
+    def wait_sync(self) -> bool:
+        while True:
+            wait, probe = self.check()
+            if not wait:
+                return probe
+            time.sleep(wait)
+
+    def cancel_probe(self) -> None:
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trips = 0
+            self._probing = False
+
+    def record_failure(self, probe: bool) -> None:
+        with self._lock:
+            if probe:
+                self._probing = False
+            elif self._trips:
+                # ответ на запрос, ушедший до размыкания, — автомат уже учёл неудачи
+                return
+            else:
+                self._failures += 1
+                if self._failures < self.failures:
+                    return
+            self._failures = 0
+            self._trips += 1
+            trips = self._trips
+            self._open_until = time.monotonic() + min(self.cooldown * 2 ** (trips - 1), BREAKER_MAX_COOLDOWN)
+        METRICS.inc("hh_circuit_open_total", host=self.host)
+        print(f"Автомат {self.host} разомкнут ({trips}-й раз подряд)")
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+# Подобранный лимит параллельности по хосту: следующий клиент стартует с него
+_host_limits: dict[str, float] = {}
+_hosts_lock = threading.Lock()
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    """Один автомат на хост на процесс — общий для всех клиентов."""
+    with _hosts_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+
+def retry_after(response: requests.Response) -> float | None:
+    """Retry-After в секундах: число или HTTP-дата."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def failure_reason(response: requests.Response) -> str | None:
+    """Почему ответ стоит повторить ("429", "5xx", "captcha"); None — ответ окончательный."""
+    if response.status_code == 429:
+        return "429"
+    if response.status_code >= 500:
+        return "5xx"
+    # hh.ru отвечает на подозрительную частоту 403 с ошибкой captcha_required
+    if response.status_code == 403 and b"captcha_required" in response.content:
+        return "captcha"
+    return None
+
+
+def backoff(attempt: int, server_delay: float | None = None) -> float:
+    delay = random.uniform(0, min(HH_BACKOFF_MAX, HH_BACKOFF_BASE * 2 ** attempt))
+    return max(delay, server_delay or 0.0)
+
+
+class AsyncHttpClient:
+    """
+    Асинхронная обёртка над requests.Session: параллельность ограничивает AdaptiveLimiter,
+    частоту запросов — TokenBucket, хост защищает общий CircuitBreaker.
+    429, 5xx, капча и сетевые ошибки повторяются до retries раз с паузой backoff,
+    затем — RetriesExhaustedError (неудача одного запроса); CircuitOpenError прерывает прогон.
+    Сами запросы выполняются в пуле потоков (asyncio.to_thread).
+    Свежие ответы из HttpCache отдаются без обращения к сети и без расхода лимита,
+    устаревшие перепроверяются условным запросом (If-None-Match/If-Modified-Since).
+    revalidate=True перепроверяет и свежий ответ: так скачиваются карточки вакансий,
+    которые ingest запрашивает как раз потому, что вакансия изменилась.
+    """
+
+    def __init__(self, headers: dict, concurrency: int = HH_CONCURRENCY,
+                 rate: float = HH_RATE, base_url: str = HH_API_URL,
+                 timeout: float = HH_TIMEOUT, cache: HttpCache | None = None,
+                 max_concurrency: int = HH_MAX_CONCURRENCY, retries: int = HH_RETRIES):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.host = urlsplit(self.base_url).netloc
+        max_concurrency = max(max_concurrency, concurrency)
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(max_concurrency, 1))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        with _hosts_lock:
+            initial = _host_limits.get(self.host, concurrency)
+        self.limiter = AdaptiveLimiter(initial, 1, max_concurrency, self.host)
+        self.breaker = get_breaker(self.host)
+        self._bucket = TokenBucket(rate)
+        self.cache = cache if cache is not None else get_default_cache()
+
+    async def get_json(self, path: str, params=None, revalidate: bool = False) -> dict:
+        # чтение и запись кэша — дисковый ввод-вывод SQLite, его держим вне цикла событий
+        url, entry = await asyncio.to_thread(self._lookup, path, params)
+        if not revalidate and entry is not None and entry.is_fresh(self.cache.ttl_for(path)):
+            METRICS.inc("hh_http_cache_hits_total", endpoint=endpoint_of(path))
+            return json.loads(entry.body)
+        for attempt in range(self.retries + 1):
+            probe = await self.breaker.wait()
+            overloaded = None
+            try:
+                generation = await self.limiter.acquire()
+                try:
+                    await self._bucket.acquire()
+                    response, error, reason = await asyncio.to_thread(self._attempt, url, entry)
+                    overloaded = reason is not None
+                finally:
+                    await self.limiter.release(generation, overloaded)
+            except BaseException:
+                if probe:
+                    # пробный запрос отменён — пробу сделает следующий
+                    self.breaker.cancel_probe()
+                raise
+            delay = self._settle(path, response, reason, probe, attempt)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        return await asyncio.to_thread(self._finish, url, response, error, reason, entry)
+
+    def get_json_sync(self, path: str, params=None) -> dict:
+        """Одиночный синхронный запрос через тот же кэш и автомат хоста (для справочников)."""
+        url, entry = self._lookup(path, params)
+        if entry is not None and entry.is_fresh(self.cache.ttl_for(path)):
+            METRICS.inc("hh_http_cache_hits_total", endpoint=endpoint_of(path))
+            return json.loads(entry.body)
+        for attempt in range(self.retries + 1):
+            probe = self.breaker.wait_sync()
+            try:
+                response, error, reason = self._attempt(url, entry)
+            except BaseException:
+                if probe:
+                    self.breaker.cancel_probe()
+                raise
+            delay = self._settle(path, response, reason, probe, attempt)
+            if delay is None:
+                break
+            time.sleep(delay)
+        return self._finish(url, response, error, reason, entry)
+
+    def _attempt(self, url: str, entry) -> tuple:
+        """(ответ, сетевая ошибка, причина повтора)."""
+        try:
+            response = self._request(url, entry)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            return None, e, "network"
+        return response, None, failure_reason(response)
+
+    def _settle(self, path: str, response, reason: str | None, probe: bool, attempt: int) -> float | None:
+        """Учитывает исход попытки в автомате; пауза перед повтором или None, если повторять не нужно."""
+        if reason is None:
+            self.breaker.record_success()
+            return None
+        self.breaker.record_failure(probe)
+        if attempt >= self.retries:
+            return None
+        server_delay = retry_after(response) if response is not None else None
+        if server_delay:
+            # Retry-After относится ко всему клиенту, а не только к этому запросу
+            self._bucket.pause(server_delay)
+        METRICS.inc("hh_http_retries_total", endpoint=endpoint_of(path), reason=reason)
+        return backoff(attempt, server_delay)
+
+    def _finish(self, url: str, response, error: Exception | None, reason: str | None, entry) -> dict:
+        if reason is not None:
+            detail = error if error is not None else f"HTTP {response.status_code}"
+            raise RetriesExhaustedError(f"{url}: {detail} после {self.retries + 1} попыток") from error
+        return self._handle(url, response, entry)
+
+    def _lookup(self, path: str, params) -> tuple:
+        url = requests.Request("GET", f"{self.base_url}{path}", params=params).prepare().url
+        entry = self.cache.get(url) if self.cache is not None else None
+        return url, entry
+
+    def _request(self, url: str, entry) -> requests.Response:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        endpoint = endpoint_of(urlsplit(url).path)
+        status = "error"
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            status = str(response.status_code)
+            return response
+        finally:
+            METRICS.observe("hh_http_request_seconds", time.perf_counter() - started, endpoint=endpoint)
+            METRICS.inc("hh_http_requests_total", endpoint=endpoint, status=status)
+
+    def _handle(self, url: str, response: requests.Response, entry) -> dict:
+        if response.status_code == 304 and entry is not None:
+            self.cache.touch(url)
+            return json.loads(entry.body)
+        response.raise_for_status()
+        if self.cache is not None:
+            self.cache.put(url, response.content, response.headers.get("ETag"),
+                           response.headers.get("Last-Modified"))
+        return response.json()
+
+    def close(self) -> None:
+        with _hosts_lock:
+            _host_limits[self.host] = self.limiter.limit
+        self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
@@ -0,0 +1,183 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Метрики прогона в памяти процесса: счётчики и гистограммы с метками.
+# В конце filling_db пишутся в METRICS_PATH (JSON), при METRICS_PORT во время прогона
+# отдаются в текстовом формате Prometheus на http://METRICS_HOST:METRICS_PORT/metrics.
+# По умолчанию эндпоинт слушает только localhost; METRICS_HOST=0.0.0.0 открывает его наружу.
+METRICS_PATH = os.getenv("METRICS_PATH", ".cache/metrics.json")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+
+# Границы корзин гистограмм, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_VACANCY_ID_RE = re.compile(r"^/vacancies/\d+")
+
+
+def endpoint_of(path: str) -> str:
+    """Путь запроса без id, чтобы не плодить метки: /vacancies/123 -> /vacancies/{id}."""
+    return _VACANCY_ID_RE.sub("/vacancies/{id}", path.split("?", 1)[0])
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float, count: int = 1) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += count
+                break
+        self.count += count
+        self.sum += value * count
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else None,
+            "buckets": {str(bound): n for bound, n in zip(self.buckets, self.counts)},
+        }
+
+
+class Metrics:
+    """Потокобезопасный реестр: inc — счётчики, set — текущие значения, observe/timer — гистограммы."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict = {}
+        self._gauges: dict = {}
+        self._histograms: dict = {}
+        self.started = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, count: int = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram()
+            self._histograms[key].observe(value, count)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self.started = time.time()
+
+    def to_dict(self) -> dict:
+        elapsed = time.time() - self.started
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            gauges = [{"name": name, "labels": dict(labels), "value": value}
+                      for (name, labels), value in sorted(self._gauges.items())]
+            histograms = [{"name": name, "labels": dict(labels), **hist.to_dict()}
+                          for (name, labels), hist in sorted(self._histograms.items())]
+        requests = sum(c["value"] for c in counters if c["name"] == "hh_http_requests_total")
+        return {
+            "started_at": self.started,
+            "elapsed_s": round(elapsed, 3),
+            "requests_per_second": round(requests / elapsed, 3) if elapsed else None,
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": histograms,
+        }
+
+    def write_json(self, path: str = METRICS_PATH) -> None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        lines = []
+        typed = set()
+
+        def declare(name: str, kind: str) -> None:
+            # строка # TYPE — один раз перед первой серией метрики
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                declare(name, "counter")
+                lines.append(f"{name}{_labels(labels)} {value}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                declare(name, "gauge")
+                lines.append(f"{name}{_labels(labels)} {value}")
+            for (name, labels), hist in sorted(self._histograms.items()):
+                declare(name, "histogram")
+                cumulative = 0
+                for bound, n in zip(hist.buckets, hist.counts):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {hist.count}")
+                lines.append(f"{name}_sum{_labels(labels)} {hist.sum}")
+                lines.append(f"{name}_count{_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+METRICS = Metrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.to_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_http_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> ThreadingHTTPServer | None:
+    """Эндпоинт /metrics в фоновом потоке; port=0 — не запускать."""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,109 @@
+import gzip
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+# Архив сырых ответов: вакансия из поиска + полная карточка /vacancies/{id} с временем загрузки.
+# Пишется сегментами gzip JSONL, по сегменту на прогон (и новый при превышении размера),
+# чтобы классификацию и запись в БД можно было повторить без обращения к hh.ru (db.replay).
+# HH_ARCHIVE_DIR='' отключает архив.
+HH_ARCHIVE_DIR = os.getenv("HH_ARCHIVE_DIR", ".cache/raw_archive")
+HH_ARCHIVE_SEGMENT_MB = int(os.getenv("HH_ARCHIVE_SEGMENT_MB", 256))
+# Через сколько записей сбрасывать сжатый поток на диск: при падении теряется не больше
+ARCHIVE_FLUSH_EVERY = 200
+
+SEGMENT_PREFIX = "raw-"
+SEGMENT_SUFFIX = ".jsonl.gz"
+
+
+class RawArchive:
+    """
+    Дописывает записи {"id", "fetched_at", "listing", "vacancy"} в текущий сегмент.
+    Потокобезопасен; close() обязателен, иначе хвост сегмента останется без завершения gzip.
+    """
+
+    def __init__(self, path: str = HH_ARCHIVE_DIR, segment_bytes: int = HH_ARCHIVE_SEGMENT_MB * 1024 * 1024):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.segment_bytes = segment_bytes
+        self._lock = threading.Lock()
+        self._raw = None
+        self._gzip = None
+        self._pending = 0
+
+    def append(self, listing: dict, vacancy: dict, fetched_at: datetime | None = None) -> None:
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        line = json.dumps(
+            {"id": int(listing["id"]), "fetched_at": fetched_at.isoformat(),
+             "listing": listing, "vacancy": vacancy},
+            ensure_ascii=False,
+        ).encode() + b"\n"
+        with self._lock:
+            if self._gzip is None or self._raw.tell() >= self.segment_bytes:
+                self._open_segment()
+            self._gzip.write(line)
+            self._pending += 1
+            if self._pending >= ARCHIVE_FLUSH_EVERY:
+                self._gzip.flush()
+                self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_segment()
+
+    def _open_segment(self) -> None:
+        self._close_segment()
+        name = SEGMENT_PREFIX + datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f") + SEGMENT_SUFFIX
+        self._raw = open(os.path.join(self.path, name), "ab")
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="ab")
+
+    def _close_segment(self) -> None:
+        if self._gzip is not None:
+            self._gzip.close()
+            self._raw.close()
+            self._gzip = self._raw = None
+            self._pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def get_archive() -> RawArchive | None:
+    """Архив для нового прогона; None, если HH_ARCHIVE_DIR пуст."""
+    return RawArchive() if HH_ARCHIVE_DIR else None
+
+
+def iter_archive(path: str = HH_ARCHIVE_DIR, since: datetime | None = None,
+                 until: datetime | None = None):
+    """
+    Записи архива по порядку загрузки: (вакансия из поиска, полная вакансия, fetched_at).
+    since/until — границы по fetched_at (включительно / не включительно).
+    Оборванный хвост сегмента (прогон упал до close) пропускается.
+    """
+    if not os.path.isdir(path):
+        return
+    segments = sorted(name for name in os.listdir(path)
+                      if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+    for name in segments:
+        with gzip.open(os.path.join(path, name), "rb") as f:
+            while True:
+                try:
+                    line = f.readline()
+                except (EOFError, gzip.BadGzipFile):
+                    break
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    # строка, оборванная посередине
+                    break
+                record = json.loads(line)
+                fetched_at = datetime.fromisoformat(record["fetched_at"])
+                if since is not None and fetched_at < since:
+                    continue
+                if until is not None and fetched_at >= until:
+                    continue
+                yield record["listing"], record["vacancy"], fetched_at
@@ -1,40 +1,171 @@
-import requests
+import asyncio
 import json
-import time
+from datetime import datetime, timedelta, timezone
+from vacancy_scraper.http_client import AsyncHttpClient, HH_API_URL, HH_CONCURRENCY, HH_RATE, HostUnavailableError
 
+# hh.ru отдаёт по одному поисковому запросу не больше 2000 вакансий
+HH_SEARCH_LIMIT = 2000
+PER_PAGE = 100
+# Нижняя граница даты публикации, когда шард приходится делить по времени
+MAX_VACANCY_AGE = timedelta(days=365)
+MIN_DATE_WINDOW = timedelta(minutes=5)
 
-def get_professional_role_ids(headers:dict, category_id:int) -> list:
-    roles = requests.get("https://api.hh.ru/professional_roles", headers=headers).json()
+
+def get_professional_role_ids(headers:dict, category_id:int, base_url:str = HH_API_URL) -> list:
+    client = AsyncHttpClient(headers, base_url=base_url)
+    try:
+        roles = client.get_json_sync("/professional_roles")
+    finally:
+        client.close()
     role_ids = []
     for cat in roles["categories"]:
         if int(cat["id"]) == category_id:
             role_ids = [role["id"] for role in cat["roles"]]
             break
-    time.sleep(0.25)
     return role_ids
 
-def get_vacancies(role_ids:list, area_id:int, headers:dict) -> list:
-    all_vacancies = []
-    params = {
-        "area": area_id,
-        "per_page": 100,
-        "page": 0,
-        "professional_role": role_ids,
-    }
-    response = requests.get("https://api.hh.ru/vacancies", params=params, headers=headers).json()
-    all_vacancies.extend(response.get("items", []))
-    pages = response["pages"]
-    time.sleep(0.25)
-
-    for p in range(1, pages):
-        params = {
-            "area": area_id,
-            "per_page": 100,
-            "page": p,
-            "professional_role": role_ids,
-        }
-        response = requests.get("https://api.hh.ru/vacancies", params=params, headers=headers).json()
-        all_vacancies.extend(response.get("items", []))
-        time.sleep(0.25)
+def get_vacancies(role_ids:list, area_id:int, headers:dict, date_from:datetime | None = None,
+                  concurrency:int = HH_CONCURRENCY, rate:float = HH_RATE,
+                  base_url:str = HH_API_URL) -> list:
+    all_vacancies, report = asyncio.run(
+        crawl_vacancies(role_ids, area_id, headers, date_from=date_from,
+                        concurrency=concurrency, rate=rate, base_url=base_url)
+    )
+    print_crawl_report(report)
     return all_vacancies
 
+
+async def crawl_vacancies(role_ids:list, area_id:int, headers:dict,
+                          date_from:datetime | None = None, date_to:datetime | None = None,
+                          concurrency:int = HH_CONCURRENCY, rate:float = HH_RATE,
+                          base_url:str = HH_API_URL) -> tuple[list, list]:
+    """
+    Обходит поиск /vacancies шардами. Шард, упёршийся в лимит HH_SEARCH_LIMIT,
+    дробится сначала по professional_role, потом пополам по дате публикации.
+    Страницы шардов качаются параллельно.
+    Возвращает (вакансии без дублей, отчёт по шардам: expected/collected).
+    """
+    items = []
+
+    async def collect(page_items:list, key:str) -> None:
+        items.extend(page_items)
+
+    async with AsyncHttpClient(headers, concurrency, rate, base_url) as client:
+        report = await stream_vacancies(client, role_ids, area_id, collect, date_from, date_to)
+
+    unique = {}
+    for item in items:
+        unique.setdefault(item["id"], item)
+    return list(unique.values()), report
+
+
+async def stream_vacancies(client:AsyncHttpClient, role_ids:list, area_id:int, on_items,
+                           date_from:datetime | None = None, date_to:datetime | None = None,
+                           done_pages:dict | None = None) -> list:
+    """
+    Тот же обход шардами, но вакансии отдаются постранично в корутину on_items(items, page_key)
+    по мере скачивания, без накопления. Дубли между шардами не отбрасываются.
+    done_pages — {page_key: число вакансий} уже обработанных страниц (при возобновлении):
+    они не скачиваются повторно и не передаются в on_items. Чтобы ключи совпадали
+    между запусками, date_to должен быть зафиксирован.
+    Возвращает отчёт по шардам: expected/collected и failed_pages — номера страниц,
+    которые не удалось скачать (если не скачалась первая, expected = None: размер шарда неизвестен).
+    """
+    report = []
+    params = {"area": area_id, "professional_role": list(role_ids)}
+    await _crawl_shard(client, params, date_from, date_to, report, on_items, done_pages or {})
+    return report
+
+
+def print_crawl_report(report:list) -> None:
+    expected = sum(r["expected"] or 0 for r in report)
+    collected = sum(r["collected"] for r in report)
+    for r in report:
+        if r["failed_pages"]:
+            print(f"Не скачаны страницы {r['failed_pages']} шарда "
+                  f"(собрано {r['collected']}/{r['expected'] if r['expected'] is not None else '?'})", r["shard"])
+        elif r["collected"] < r["expected"]:
+            print(f"Шард собран не полностью: {r['collected']}/{r['expected']}", r["shard"])
+    failed = failed_pages(report)
+    print(f"Шардов: {len(report)}, собрано вакансий: {collected}/{expected}"
+          + (f", не скачано страниц: {failed}" if failed else ""))
+
+
+def failed_pages(report:list) -> int:
+    """Сколько страниц поиска не скачалось: если > 0, обход неполный и отметку прогона двигать нельзя."""
+    return sum(len(r["failed_pages"]) for r in report)
+
+
+async def _crawl_shard(client:AsyncHttpClient, params:dict, date_from:datetime | None,
+                       date_to:datetime | None, report:list, on_items, done_pages:dict) -> None:
+    shard = dict(params)
+    if date_from:
+        shard["date_from"] = date_from.isoformat(timespec="seconds")
+    if date_to:
+        shard["date_to"] = date_to.isoformat(timespec="seconds")
+
+    first = await _get_page(client, shard, 0)
+    if first is None:
+        # без первой страницы неизвестны ни размер шарда, ни число страниц — шард не делится и не собран
+        report.append({"shard": shard, "expected": None, "collected": 0, "failed_pages": [0]})
+        return
+    found = first.get("found", 0)
+
+    if found > HH_SEARCH_LIMIT:
+        sub_shards = _split_shard(params, date_from, date_to)
+        if sub_shards:
+            await asyncio.gather(*(_crawl_shard(client, p, df, dt, report, on_items, done_pages)
+                                   for p, df, dt in sub_shards))
+            return
+
+    collected = 0
+    failed = []
+
+    async def emit(p:int) -> None:
+        nonlocal collected
+        key = page_key(shard, p)
+        if key in done_pages:
+            collected += done_pages[key]
+            return
+        page = first if p == 0 else await _get_page(client, shard, p)
+        if page is None:
+            failed.append(p)
+            return
+        items = page.get("items", [])
+        collected += len(items)
+        if items:
+            await on_items(items, key)
+
+    await emit(0)
+    await asyncio.gather(*(emit(p) for p in range(1, first.get("pages", 0))))
+    report.append({"shard": shard, "expected": found, "collected": collected, "failed_pages": sorted(failed)})
+
+
+def page_key(shard:dict, page:int) -> str:
+    return json.dumps({**shard, "page": page}, sort_keys=True)
+
+
+async def _get_page(client:AsyncHttpClient, shard:dict, page:int) -> dict | None:
+    """Страница поиска; None, если её не удалось получить. Недоступность хоста прерывает обход."""
+    try:
+        return await client.get_json("/vacancies", {**shard, "per_page": PER_PAGE, "page": page})
+    except HostUnavailableError:
+        raise
+    except Exception as e:
+        print(f"Не удалось получить страницу {page} поиска:", e)
+        return None
+
+
+def _split_shard(params:dict, date_from:datetime | None, date_to:datetime | None) -> list:
+    roles = params["professional_role"]
+    if len(roles) > 1:
+        middle = len(roles) // 2
+        return [({**params, "professional_role": roles[:middle]}, date_from, date_to),
+                ({**params, "professional_role": roles[middle:]}, date_from, date_to)]
+
+    hi = date_to or datetime.now(timezone.utc)
+    lo = date_from or hi - MAX_VACANCY_AGE
+    if hi - lo < MIN_DATE_WINDOW:
+        return []
+    mid = lo + (hi - lo) / 2
+    return [(params, lo, mid), (params, mid, hi)]
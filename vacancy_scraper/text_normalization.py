@@ -0,0 +1,38 @@
+import html
+import re
+import unicodedata
+from functools import lru_cache
+
+# Регулярки компилируются один раз при импорте
+_WHITESPACE_RE = re.compile(r"\s+")
+_TAG_RE = re.compile(r"<[^>]*>")
+
+# Навыки повторяются в тысячах вакансий, поэтому их нормализация кэшируется
+SKILL_CACHE_SIZE = 8192
+
+
+def normalize_text(text: str) -> str | None:
+    if text is None:
+        return None
+    text = html.unescape(text)
+    if not unicodedata.is_normalized('NFKD', text):
+        text = unicodedata.normalize('NFKD', text)
+    text = text.replace('\xa0', ' ')
+    return _WHITESPACE_RE.sub(' ', text.lower()).strip()
+
+
+def strip_html(text: str) -> str | None:
+    """Убирает теги за один проход; тег заменяется пробелом, чтобы не склеивать слова."""
+    if text is None or '<' not in text:
+        return text
+    return _TAG_RE.sub(' ', text)
+
+
+def normalize_description(text: str) -> str | None:
+    # Сначала теги, потом html.unescape: экранированный "&lt;...&gt;" — это текст, а не тег
+    return normalize_text(strip_html(text))
+
+
+@lru_cache(maxsize=SKILL_CACHE_SIZE)
+def normalize_skill(text: str) -> str | None:
+    return normalize_text(text)